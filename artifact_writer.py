@@ -0,0 +1,121 @@
+"""
+artifact_writer.py
+
+Writes run artifacts (loot screenshots and run store records) on a
+background thread. loot_items() hands them over and goes on to Save and
+Exit instead of waiting for PNG encoding and the disk.
+
+submit(fn, *args) queues one job, and jobs run in order on the "artifacts"
+thread. The queue holds at most QUEUE_MAX jobs. When it is full, submit()
+blocks until there is room: a slow disk slows the bot down rather than
+losing a rune screenshot or growing memory without bound. The time spent
+blocked is kept as stalled. A job that raises is reported through log()
+and kept in errors, and the writer carries on.
+
+flush() waits until every job submitted so far is done. close() flushes
+and stops the thread. main() and replay() call close() on the way out, so
+an abort never loses a queued screenshot or run record.
+
+    depth       jobs waiting now (max_depth: the most ever waiting)
+    latencies   seconds from submit() to the job being done, per job
+
+write_png() encodes a frame once and writes the bytes to every path given
+(the run screenshot and its found_runes/ copy).
+
+    writer = ArtifactWriter().start()
+    writer.submit(write_png, img, "screens/run_1.png", label="screenshot")
+    writer.submit(store.add, record, label="run record")
+    writer.close(); print(writer.report())
+"""
+
+import os
+import queue
+import threading
+import time
+
+import cv2
+import numpy as np
+
+QUEUE_MAX = 64   # jobs waiting before submit() blocks
+
+
+def write_png(img: np.ndarray, *paths: str) -> None:
+    """Encode *img* as PNG once and write it to each of *paths*."""
+    ok, data = cv2.imencode(".png", img)
+    if not ok:
+        raise ValueError("PNG encoding failed")
+    for path in paths:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data.tobytes())
+
+
+class ArtifactWriter:
+    def __init__(self, maxsize: int = QUEUE_MAX, log=print):
+        self.queue: queue.Queue = queue.Queue(maxsize)
+        self.log = log
+        self.latencies: list[float] = []   # seconds from submit() to done, per job
+        self.errors: list[str] = []
+        self.max_depth = 0
+        self.stalled = 0.0                 # seconds submit() spent waiting for room
+        self._thread: threading.Thread | None = None
+
+    @property
+    def depth(self) -> int:
+        """Jobs waiting to be written."""
+        return self.queue.qsize()
+
+    def start(self) -> "ArtifactWriter":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="artifacts", daemon=True)
+            self._thread.start()
+        return self
+
+    # ── Jobs ─────────────────────────────────────────────────────────────────
+    def submit(self, fn, *args, label: str | None = None) -> None:
+        """Queue fn(*args), blocking while the queue is full."""
+        self.start()
+        t0 = time.perf_counter()
+        self.queue.put((label or fn.__name__, fn, args, t0))
+        self.stalled += time.perf_counter() - t0
+        self.max_depth = max(self.max_depth, self.queue.qsize())
+
+    def _run(self) -> None:
+        while True:
+            job = self.queue.get()
+            try:
+                if job is None:
+                    return
+                label, fn, args, t0 = job
+                try:
+                    fn(*args)
+                except Exception as e:
+                    self.errors.append(f"{label}: {e}")
+                    self.log(f"[WRITE FAILED] {label}: {e}")
+                self.latencies.append(time.perf_counter() - t0)
+            finally:
+                self.queue.task_done()
+
+    def flush(self) -> None:
+        """Wait until every job submitted so far is done."""
+        if self._thread is not None:
+            self.queue.join()
+
+    def close(self) -> None:
+        """Write everything still queued and stop the thread."""
+        if self._thread is None:
+            return
+        self.queue.put(None)
+        self._thread.join()
+        self._thread = None
+
+    # ── Cost ─────────────────────────────────────────────────────────────────
+    def report(self) -> str:
+        """Jobs done, latency from submit to done, deepest queue and time blocked."""
+        if not self.latencies:
+            return "nothing written"
+        ms = np.asarray(self.latencies) * 1000
+        return (f"{len(ms)} jobs, {ms.mean():.1f} ms mean / {ms.max():.1f} ms max to disk, "
+                f"queue depth max {self.max_depth}/{self.queue.maxsize}, "
+                f"{self.stalled * 1000:.0f} ms blocked"
+                + (f", {len(self.errors)} failed" if self.errors else ""))
@@ -0,0 +1,271 @@
+"""
+backends.py
+
+Pluggable I/O for bot.py: screen capture, mouse/keyboard input and time.
+
+bot.py never talks to mss, pyautogui or time.sleep directly; it goes through
+the active backend (bot.backend).  Two implementations:
+
+LiveBackend    the real thing — mss grabs, pyautogui input, wall-clock sleeps.
+ReplayBackend  a virtual screen and a virtual clock.  Sleeping and input
+               just advance the clock, grabs read from an in-memory screen,
+               and every input call is logged with its virtual timestamp.
+               Subclass it (see replay.py) to script how the screen reacts;
+               on its own it is a recording stub for tests.
+
+Input calls take an explicit tween duration and post-action pause (None =
+the backend's input_pause, 0.1 s like pyautogui.PAUSE).  MoveProfile bundles
+the two for a kind of movement, batch() sends a sequence back to back with
+one pause at the end, and input_stats accounts for the time spent in input
+calls and pauses.
+
+Usage
+-----
+    import bot
+    from backends import ReplayBackend
+    bot.set_backend(ReplayBackend(width=1680, height=1100))
+"""
+
+import heapq
+import itertools
+import sys
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+
+import numpy as np
+
+from lazy_import import lazy_import
+
+mss       = lazy_import("mss")
+pyautogui = lazy_import("pyautogui")
+
+# Event.wait() on Windows only wakes on the ~15.6 ms scheduler tick, so the
+# last stretch before a deadline is spun on perf_counter instead.
+SPIN_WINDOW = 0.016 if sys.platform == "win32" else 0.002
+
+
+@dataclass(frozen=True, slots=True)
+class MoveProfile:
+    """How a mouse move is made: tween time, easing and pause afterwards."""
+    duration: float = 0.0
+    tween: str = "linear"      # any pyautogui easing name, e.g. "easeOutQuad"
+    pause: float = 0.0
+
+
+INSTANT = MoveProfile()
+
+
+class InputStats:
+    """Time spent inside input calls (incl. tweens) and post-input pauses."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.calls: Counter[str] = Counter()
+        self.seconds: defaultdict[str, float] = defaultdict(float)
+        self.pause = 0.0
+
+    @property
+    def total(self) -> float:
+        return sum(self.seconds.values()) + self.pause
+
+    def snapshot(self) -> dict[str, float]:
+        """{kind: seconds, ..., "pause": s, "total": s} for logging."""
+        return {**self.seconds, "pause": self.pause, "total": self.total}
+
+    def summary(self) -> str:
+        parts = [f"{kind} {secs:.2f}s x{self.calls[kind]}"
+                 for kind, secs in sorted(self.seconds.items())]
+        return f"input {self.total:.2f}s ({', '.join(parts)}, pauses {self.pause:.2f}s)"
+
+
+class InputBackend:
+    """Explicit pauses, movement profiles, batching and input accounting.
+
+    Subclasses provide now/sleep/monotonic and _move_to/_click/_press."""
+
+    input_pause = 0.1
+
+    def __init__(self):
+        self.input_stats = InputStats()
+
+    def _timed(self, kind: str, fn, *args) -> None:
+        t0 = self.monotonic()
+        fn(*args)
+        self.input_stats.seconds[kind] += self.monotonic() - t0
+        self.input_stats.calls[kind] += 1
+
+    def _after(self, pause: float | None) -> None:
+        pause = self.input_pause if pause is None else pause
+        if pause > 0:
+            self.sleep(pause)
+            self.input_stats.pause += pause
+
+    def move_to(self, x: int, y: int, duration: float = 0.0,
+                pause: float | None = None, tween: str = "linear") -> None:
+        self._timed("move", self._move_to, x, y, duration, tween)
+        self._after(pause)
+
+    def move(self, x: int, y: int, profile: MoveProfile = INSTANT) -> None:
+        self.move_to(x, y, profile.duration, profile.pause, profile.tween)
+
+    def click(self, pause: float | None = None) -> None:
+        self._timed("click", self._click)
+        self._after(pause)
+
+    def press(self, key: str, pause: float | None = None) -> None:
+        self._timed("press", self._press, key)
+        self._after(pause)
+
+    def batch(self, actions, pause: float | None = None) -> None:
+        """
+        Send inputs back to back, then pause once.  Each action is one of
+            ("move", x, y)  ("move", x, y, MoveProfile)  ("click",)  ("press", key)
+        Only a move's own profile pause is honoured inside the batch.
+        """
+        for kind, *args in actions:
+            if kind == "move":
+                x, y, *profile = args
+                self.move(x, y, profile[0] if profile else INSTANT)
+            elif kind == "click":
+                self.click(pause=0.0)
+            elif kind == "press":
+                self.press(args[0], pause=0.0)
+            else:
+                raise ValueError(f"unknown input action {kind!r}")
+        self._after(pause)
+
+
+class LiveBackend(InputBackend):
+    """Real screen (mss), real input (pyautogui) and the wall clock."""
+
+    def now(self) -> float:
+        return time.time()
+
+    def sleep(self, seconds: float) -> None:
+        time.sleep(seconds)
+
+    def monotonic(self) -> float:
+        return time.perf_counter()
+
+    def wait_until(self, deadline: float, event) -> bool:
+        """Block until monotonic() reaches *deadline*; True if *event* is set first."""
+        while True:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                return event.is_set()
+            if remaining > SPIN_WINDOW:
+                if event.wait(remaining - SPIN_WINDOW):
+                    return True
+            elif event.is_set():
+                return True
+
+    def grab(self, region: dict) -> np.ndarray:
+        """Grab a screen region and return it as a BGR numpy array."""
+        with mss.mss() as sct:
+            raw = sct.grab(region)
+            return np.array(raw)[:, :, :3]
+
+    def position(self) -> tuple[int, int]:
+        x, y = pyautogui.position()
+        return x, y
+
+    # pyautogui's own PAUSE is bypassed (_pause=False); _after() does it explicitly
+    def _move_to(self, x: int, y: int, duration: float, tween: str) -> None:
+        pyautogui.moveTo(x, y, duration=duration, tween=getattr(pyautogui, tween),
+                         _pause=False)
+
+    def _click(self) -> None:
+        pyautogui.click(_pause=False)
+
+    def _press(self, key: str) -> None:
+        pyautogui.press(key, _pause=False)
+
+
+class ReplayBackend(InputBackend):
+    """
+    Virtual screen + virtual clock.
+
+    screen       BGR array the grabs are cut from; mutate it (or use
+                 schedule()) to change what the bot sees.
+    events       [(t, kind, args), ...] log of every input call.
+    input_pause  default virtual seconds added after each input call,
+                 mirroring pyautogui.PAUSE (0.1 s).
+    """
+
+    def __init__(self, width: int, height: int, start: float | None = None,
+                 input_pause: float = 0.1):
+        super().__init__()
+        self.screen = np.zeros((height, width, 3), dtype=np.uint8)
+        self.t = time.time() if start is None else start
+        self.input_pause = input_pause
+        self.mouse = (width // 2, height // 2)
+        self.events: list[tuple[float, str, tuple]] = []
+        self._timers: list[tuple[float, int, object]] = []
+        self._seq = itertools.count()
+
+    # ── Clock ────────────────────────────────────────────────────────────────
+    def now(self) -> float:
+        return self.t
+
+    def sleep(self, seconds: float) -> None:
+        self.advance(max(0.0, seconds))
+
+    def monotonic(self) -> float:
+        return self.t
+
+    def wait_until(self, deadline: float, event) -> bool:
+        self.advance(max(0.0, deadline - self.t))
+        return event.is_set()
+
+    def advance(self, seconds: float) -> None:
+        """Move the clock forward, firing any scheduled callbacks on the way."""
+        end = self.t + seconds
+        while self._timers and self._timers[0][0] <= end:
+            due, _, fn = heapq.heappop(self._timers)
+            self.t = max(self.t, due)
+            fn()
+        self.t = end
+
+    def schedule(self, delay: float, fn) -> None:
+        """Call fn() once the virtual clock is *delay* seconds further on."""
+        heapq.heappush(self._timers, (self.t + delay, next(self._seq), fn))
+
+    def cancel_timers(self) -> None:
+        self._timers.clear()
+
+    # ── Capture ──────────────────────────────────────────────────────────────
+    def grab(self, region: dict) -> np.ndarray:
+        top, left = region["top"], region["left"]
+        crop = self.screen[top:top + region["height"], left:left + region["width"]]
+        if crop.shape[:2] == (region["height"], region["width"]):
+            return crop.copy()
+        out = np.zeros((region["height"], region["width"], 3), dtype=np.uint8)
+        out[:crop.shape[0], :crop.shape[1]] = crop
+        return out
+
+    # ── Input ────────────────────────────────────────────────────────────────
+    def position(self) -> tuple[int, int]:
+        return self.mouse
+
+    def _move_to(self, x: int, y: int, duration: float, tween: str) -> None:
+        self.events.append((self.t, "move", (x, y, duration)))
+        self.mouse = (x, y)
+        self.advance(duration)
+
+    def _click(self) -> None:
+        self.events.append((self.t, "click", self.mouse))
+        self.on_click(*self.mouse)
+
+    def _press(self, key: str) -> None:
+        self.events.append((self.t, "press", (key,)))
+        self.on_press(key)
+
+    # ── Hooks for subclasses ─────────────────────────────────────────────────
+    def on_click(self, x: int, y: int) -> None:
+        """Called for every click, before any post-input pause."""
+
+    def on_press(self, key: str) -> None:
+        """Called for every key press, before any post-input pause."""
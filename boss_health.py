@@ -0,0 +1,67 @@
+"""
+boss_health.py
+
+Reads the targeted monster's health bar, so the kill can end as soon as
+Pindleskin is dead instead of after a fixed rotation.
+
+With the cursor on a monster D2R draws its name over a red health bar at
+the top centre of the screen.  bar_fill() measures that bar in a small
+ROI: a column counts as filled when at least FILL_ROWS of its pixels are
+bar red (strong red, weak green and blue).  The ROI is ~400x24 pixels, so
+a sample costs well under a millisecond beyond the grab.
+
+KillDetector is fed one fill per sample and reports "dead" once
+
+  1. the bar has been seen (fill above SEEN_FILL at least once),
+  2. the last fill it showed was at most LOW_FILL — the boss was nearly
+     dead, and
+  3. DEAD_SAMPLES consecutive samples show it at or below DEAD_FILL —
+     the bar empties and disappears with the corpse.
+
+The bar is only drawn while the cursor is on a monster, so it also
+vanishes when Pindleskin walks out from under the cursor, when the aim
+moves, or when a hovered minion dies.  None of those is a kill, so a bar
+that vanishes while still well filled does not end the rotation.  Until the
+bar has been seen nothing counts, so a missed target or a boss that
+never showed up just runs the rotation out.
+
+bot.kill_pindleskin() drives this against the live screen.
+"""
+
+import numpy as np
+
+RED_MIN      = 110    # minimum red level of bar pixels
+RED_RATIO    = 2.0    # red must exceed green and blue by this factor
+FILL_ROWS    = 0.5    # fraction of a column's rows that must be bar red
+SEEN_FILL    = 0.05   # fill that shows the bar is up
+DEAD_FILL    = 0.005  # fill at or below this counts as empty
+LOW_FILL     = 0.15   # the bar must have been this low before it emptied
+DEAD_SAMPLES = 3      # consecutive empty samples needed
+
+
+def bar_fill(frame: np.ndarray) -> float:
+    """Fraction of the ROI's columns that are health-bar red (BGR frame)."""
+    b, g, r = (frame[..., i].astype(np.int16) for i in range(3))
+    red = (r >= RED_MIN) & (r >= RED_RATIO * g) & (r >= RED_RATIO * b)
+    return float((red.mean(axis=0) >= FILL_ROWS).mean())
+
+
+class KillDetector:
+    """Feed bar_fill() values one at a time; feed() returns True once dead."""
+
+    def __init__(self):
+        self.seen = False
+        self.empty = 0
+        self.last = 0.0
+        self.visible = 1.0   # the last fill above DEAD_FILL
+
+    def feed(self, fill: float) -> bool:
+        self.last = fill
+        if fill > SEEN_FILL:
+            self.seen = True
+        if fill > DEAD_FILL:
+            self.visible = fill
+            self.empty = 0
+        else:
+            self.empty += 1
+        return self.seen and self.visible <= LOW_FILL and self.empty >= DEAD_SAMPLES
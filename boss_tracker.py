@@ -0,0 +1,127 @@
+"""
+boss_tracker.py
+
+Keeps the spell aim on Pindleskin while he moves.
+
+He spawns and paths a little differently every game, so a fixed aim point
+wastes casts.  BossTracker holds his last known position and, each tick,
+looks for him only inside a search window of SEARCH_RADIUS pixels around
+it:
+
+  template  with a capture of him (templates/pindleskin.png, see
+            capture_boss.py), normalised correlation on a grayscale,
+            SCALE-times downsampled window; a score of MATCH_MIN or better
+            is a fix.
+  motion    otherwise (or when the match is weak), the centroid of the
+            pixels that changed by more than MOTION_THRESHOLD since the
+            previous tick, if at least MOTION_MIN_PIXELS did.  A fix moves
+            the aim at most MAX_STEP pixels, so one spell flash cannot
+            drag it across the window.
+
+With neither, the aim stays put.  At SCALE 2 a 240x240 window is 120x120
+pixels of work, well under a millisecond per tick; every update's cost
+is kept in .costs.
+
+    tracker = BossTracker((1047, 536), template, bounds=GAME_REGION)
+    region = tracker.window()
+    x, y = tracker.update(grab(region), region)
+"""
+
+import time
+from collections import Counter
+
+import cv2
+import numpy as np
+
+SEARCH_RADIUS     = 120   # half-size of the search window, screen pixels
+SCALE             = 2     # downsampling factor of the search window
+MATCH_MIN         = 0.6   # template score that counts as a fix
+MOTION_THRESHOLD  = 25    # gray-level change that counts as motion
+MOTION_MIN_PIXELS = 20    # changed (downsampled) pixels needed for a motion fix
+MAX_STEP          = 40    # furthest a motion fix moves the aim, screen pixels
+
+
+def _gray(frame: np.ndarray) -> np.ndarray:
+    """Grayscale, SCALE-times smaller (area averaging, so no aliasing)."""
+    h, w = frame.shape[:2]
+    small = cv2.resize(frame, (w // SCALE, h // SCALE), interpolation=cv2.INTER_AREA)
+    return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+
+class BossTracker:
+    def __init__(self, start: tuple[int, int], template: np.ndarray | None = None,
+                 bounds: dict | None = None):
+        self.pos = start
+        self.template = _gray(template) if template is not None else None
+        self.bounds = bounds
+        self.costs: list[float] = []     # seconds per update()
+        self.fixes: Counter[str] = Counter()   # "template" / "motion" / "none"
+        self._prev: np.ndarray | None = None
+        self._prev_region: dict | None = None
+
+    def window(self) -> dict:
+        """Screen region to grab for the next update(), clamped to *bounds*."""
+        x, y = self.pos
+        left, top = x - SEARCH_RADIUS, y - SEARCH_RADIUS
+        size = 2 * SEARCH_RADIUS
+        if self.bounds is not None:
+            b = self.bounds
+            left = min(max(left, b["left"]), b["left"] + b["width"] - size)
+            top = min(max(top, b["top"]), b["top"] + b["height"] - size)
+        return {"left": left, "top": top, "width": size, "height": size}
+
+    def update(self, frame: np.ndarray, region: dict) -> tuple[int, int]:
+        """Locate him in *frame* (a grab of *region*) and return the aim point."""
+        t0 = time.perf_counter()
+        gray = _gray(frame)
+        kind = "template"
+        fix = self._match(gray, region)
+        if fix is None:
+            kind = "motion"
+            fix = self._motion(gray, region)
+            if fix is not None:
+                fix = self._step_towards(fix)
+        if fix is None:
+            kind = "none"
+        else:
+            self.pos = (round(fix[0]), round(fix[1]))
+        self.fixes[kind] += 1
+        self._prev, self._prev_region = gray, region
+        self.costs.append(time.perf_counter() - t0)
+        return self.pos
+
+    def _step_towards(self, target: tuple[float, float]) -> tuple[float, float]:
+        """*target*, or the point MAX_STEP pixels towards it from the aim."""
+        dx, dy = target[0] - self.pos[0], target[1] - self.pos[1]
+        dist = (dx * dx + dy * dy) ** 0.5
+        if dist <= MAX_STEP:
+            return target
+        return self.pos[0] + dx * MAX_STEP / dist, self.pos[1] + dy * MAX_STEP / dist
+
+    def _match(self, gray: np.ndarray, region: dict) -> tuple[float, float] | None:
+        """Screen position of the template's centre, or None."""
+        t = self.template
+        if t is None or t.shape[0] > gray.shape[0] or t.shape[1] > gray.shape[1]:
+            return None
+        _, score, _, (x, y) = cv2.minMaxLoc(cv2.matchTemplate(gray, t, cv2.TM_CCOEFF_NORMED))
+        if score < MATCH_MIN:
+            return None
+        return (region["left"] + (x + t.shape[1] / 2) * SCALE,
+                region["top"] + (y + t.shape[0] / 2) * SCALE)
+
+    def _motion(self, gray: np.ndarray, region: dict) -> tuple[float, float] | None:
+        """Screen centroid of what changed since the last tick, or None."""
+        if self._prev is None or self._prev_region != region:
+            return None
+        ys, xs = np.nonzero(cv2.absdiff(gray, self._prev) > MOTION_THRESHOLD)
+        if len(xs) < MOTION_MIN_PIXELS:
+            return None
+        return region["left"] + xs.mean() * SCALE, region["top"] + ys.mean() * SCALE
+
+    def report(self) -> str:
+        """Updates, fixes by kind and cost per update."""
+        if not self.costs:
+            return "no updates"
+        ms = np.asarray(self.costs) * 1000
+        fixes = ", ".join(f"{k} {v}" for k, v in self.fixes.most_common())
+        return f"{len(ms)} updates ({fixes}), {ms.mean():.2f} ms mean, {ms.max():.2f} ms max"
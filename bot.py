@@ -15,20 +15,45 @@ One-time setup required before running:
     python capture_template.py   (while standing in town in-game)
 """
 
+import copy
 import os
 import sys
 import threading
 import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from dataclasses import replace
 from datetime import datetime
+from functools import partial
 
-import cv2
-import mss
 import numpy as np
-import pyautogui
 
-from find_charms import find_charms_img
-from find_runes import find_runes_img
-from ocr_items import read_items
+import artifact_writer
+import boss_health
+import health_globe
+import inventory
+import label_prior
+import pickit
+import pickup
+import run_store
+import settle
+from backends import LiveBackend, MoveProfile
+from lazy_import import lazy_import
+from run_state import RunMachine, State, Stuck, resume_point
+from session_store import RecordingBackend
+from timeline import Aborted, Timeline, jitter_report
+
+# Heavy modules load on first use so `import bot` stays cheap; main() pulls
+# them all in up front via warm_up() while we sit on character select.
+cv2         = lazy_import("cv2")
+boss_tracker = lazy_import("boss_tracker")
+find_charms = lazy_import("find_charms")
+find_runes  = lazy_import("find_runes")
+minimap     = lazy_import("minimap")
+ocr_items   = lazy_import("ocr_items")
+rune_names  = lazy_import("rune_names")
+scene_classifier = lazy_import("scene_classifier")
+screen_archive = lazy_import("screen_archive")
 
 # ---------------------------------------------------------------------------
 # Game window config.
@@ -39,6 +64,7 @@ GAME_X = 0      # left edge of game window on screen
 GAME_Y = 0      # top edge of game window on screen
 GAME_W = 1680
 GAME_H = 1050
+GAME_REGION = {"left": GAME_X, "top": GAME_Y, "width": GAME_W, "height": GAME_H}
 
 # Set to True to print step-by-step progress to the console.
 VERBOSE = False
@@ -49,14 +75,34 @@ DEBUG_OCR = True
 # Template match threshold (0-1). Lower = more lenient.
 MATCH_THRESHOLD = 0.8
 
-# Directory for per-run loot screenshots
+# Loot screenshots go to a packed, deduplicated archive (screen_archive.py):
+# every run that picked something up, and one in ARCHIVE_SAMPLE_EVERY of the
+# runs without loot.  Set to False for one PNG per run with loot in
+# SCREENS_DIR instead.
+USE_SCREEN_ARCHIVE   = True
+SCREEN_ARCHIVE       = "screen_archive"
+ARCHIVE_SAMPLE_EVERY = 20
+
+# Directory for per-run loot screenshots (USE_SCREEN_ARCHIVE off)
 SCREENS_DIR = "screens_from_runs"
 
-# Log file for run results
-RUN_LOG = "runs.log"
+# Run results, phases, detections and all-time totals (run_store.py).
+# Import an old runs.log / totals.txt once with
+#   python run_store.py --import runs.log totals.txt
+# (done automatically on the first open when they are here).
+RUN_STORE = "runs.db"
+LEGACY_RUN_LOG = "runs.log"     # imported into RUN_STORE the first time it is opened
+LEGACY_TOTALS  = "totals.txt"
+
+# Screenshots and run records are written on a background thread
+# (artifact_writer.py); loot_items() blocks only when this many are queued.
+ARTIFACT_QUEUE = 64
 
-# Persistent totals file (human-editable key=value lines)
-TOTALS_FILE = "totals.txt"
+# Set to True to record each bot session (whole game window + every input)
+# to SESSIONS_DIR for offline replay — see session_store.py.
+RECORD_SESSION = False
+SESSIONS_DIR   = "sessions"
+SESSION_FPS    = 10
 
 # Loot capture region — same as capture_loot.py
 LOOT_CENTER_X = 1047
@@ -67,9 +113,109 @@ LOOT_HEIGHT   = 640
 # Delay between actions (seconds)
 STEP_DELAY = 1.0
 
+# Mouse movement profiles: tween seconds, easing, pause after the move
+PARK_MOVE = MoveProfile(0.2, pause=0.2)   # cursor off the loot before the grab
+LOOT_MOVE = MoveProfile(0.5, pause=0.2)   # onto a label, hover before clicking
+
+# Detectors search the loot crop where labels have landed before (see
+# label_prior.py); the prior learns from every run and is kept here.
+USE_LABEL_PRIOR  = True
+LABEL_PRIOR_FILE = "label_prior.npz"
+
+# Pickit rules (pickit.py): labels are chosen by name and class from one OCR
+# pass.  Without the file only the "Rune" / "Charm" word templates are used.
+PICKIT_FILE = "pickit.txt"
+
+# Loot pickup (pickup.py): every label is clicked in one planned pass, LOOT_CLICK_GAP
+# apart, then all are checked in one capture PICKUP_SETTLE later.  Labels still
+# there are re-planned, up to PICKUP_ROUNDS passes.
+LOOT_CLICK_GAP = 0.3
+PICKUP_SETTLE  = 0.5
+PICKUP_ROUNDS  = 3
+
+# Inventory check (inventory.py): in town, after any run that picked something
+# up and every INVENTORY_EVERY runs anyway, the inventory is opened and its
+# grid read.  Loot that cannot fit is not clicked; the bot stops once not even
+# a rune fits, and warns below INVENTORY_WARN_FREE free cells.  Off until
+# INVENTORY_REGION and the thresholds are checked on real captures (see
+# inventory.py).
+USE_INVENTORY_CHECK = False
+INVENTORY_KEY       = "i"
+INVENTORY_REGION    = {"left": GAME_X + 1105, "top": GAME_Y + 545, "width": 480, "height": 192}
+INVENTORY_OPEN      = 0.2   # seconds for the panel to draw
+INVENTORY_EVERY     = 20
+INVENTORY_WARN_FREE = 6
+
+# Fixed delays after menu presses, walk clicks and warps are ceilings: each
+# step moves on as soon as the screen has visibly reacted and come to rest
+# (see settle.py).  Sampled above the HUD, every SETTLE_INTERVAL seconds.
+USE_SETTLE      = True
+SETTLE_REGION   = {"left": GAME_X, "top": GAME_Y, "width": GAME_W, "height": 900}
+SETTLE_INTERVAL = 0.03
+
+# Walk to the portal by minimap localization (minimap.py): each tick the
+# minimap overlay is placed on the stitched Harrogath map and we click
+# towards the next node on the shortest path.  PORTAL_WALK_PATH is the
+# fallback when there is no map or no fix at the start of the walk.
+USE_MINIMAP_WALK = True
+MINIMAP_REGION   = {"left": GAME_X + 1400, "top": GAME_Y + 40, "width": 240, "height": 180}
+PLAYER_SCREEN    = (GAME_X + GAME_W // 2, GAME_Y + GAME_H // 2)   # where we stand on screen
+MAP_SCALE        = 6.0   # screen pixels per minimap pixel
+NAV_INTERVAL     = 0.3   # seconds between fixes (and clicks)
+NAV_CLICK_MAX    = 350   # furthest click from PLAYER_SCREEN, screen pixels
+ARRIVE_DIST      = 8     # map pixels from the portal node at which we click it
+LOST_TICKS       = 5     # fixes in a row we may miss before giving up the walk
+
+# The kill rotation is a cap: casting stops as soon as Pindleskin's health
+# bar (top centre while the cursor is on him) shows him dead — see
+# boss_health.py.  Sampled every KILL_INTERVAL seconds during the rotation.
+USE_KILL_DETECT = True
+BOSS_BAR_REGION = {"left": GAME_X + 640, "top": GAME_Y + 8, "width": 400, "height": 24}
+KILL_INTERVAL   = 0.02
+KILL_ROUNDS     = 6
+KILL_ROTATION   = [("d", 0.1), ("f", 0.1), ("f", 0.1), ("f", 0.5)]   # Abyss + 3x Miasma Bolt
+
+# Health watcher (health_globe.py): a background thread reads the life globe
+# HEALTH_HZ times a second.  In game, life below CHICKEN_FILL wakes whatever
+# the bot is waiting on with Chicken, and the run ends with Save and Exit.
+USE_HEALTH_WATCH = True
+HEALTH_GLOBE_AT  = (GAME_X + 360, GAME_Y + 1012)   # centre of the globe on screen
+HEALTH_REGION    = {"left": HEALTH_GLOBE_AT[0] - 8, "top": HEALTH_GLOBE_AT[1] - 55,
+                    "width": 16, "height": 110}   # a strip down its middle
+HEALTH_TEMPLATE  = "templates/health_globe.png"   # 110x110 around HEALTH_GLOBE_AT, full life
+HEALTH_HZ        = 40
+CHICKEN_FILL     = 0.35
+
+# Aim each cast at Pindleskin as tracked by boss_tracker.py instead of the
+# fixed BOSS_AIM point — only once BOSS_TEMPLATE has been captured with
+# capture_boss.py.  Without it the casts stay on BOSS_AIM: tracking by
+# motion alone follows our own Abyss/Miasma effects and the minions.
+USE_AIM_TRACKING = True
+BOSS_AIM         = (1047, 536)   # where he usually stands; the tracker starts here
+BOSS_TEMPLATE    = "templates/pindleskin.png"
+AIM_TOLERANCE    = 8             # pixels the target may drift before re-aiming
+
+# Learned screen-transition times (see scene_classifier.LoadTimes)
+SCENE_STATS_FILE = "scene_times.json"
+
+# Run state transitions, appended as JSON lines; read back to resume (run_state.py)
+STATE_HISTORY_FILE = "run_states.jsonl"
+RECOVER_POLL = 1.0   # seconds between looks at an unrecognised screen
+
+# UI templates and the screen regions they are searched in
+GAME_LOAD_TEMPLATE   = "templates/ui_cross.png"
+GAME_LOAD_REGION     = {"left": 0, "top": 900, "width": 1680, "height": 200}
+PLAY_BUTTON_TEMPLATE = "templates/play_button.png"
+PLAY_BUTTON_REGION   = {"left": 765, "top": 951, "width": 160, "height": 80}
+
 # Move the mouse left of this x-coordinate to abort the bot cleanly.
 ABORT_ZONE_X = 100
 
+# Run on the asyncio runtime (runtime.py): one shared capture stream feeding
+# the abort, scene and alert watchers.  Not yet proven on the live game;
+# False = the plain threaded loop.
+ASYNC_RUNTIME = False
+
 # Blade Warp path from Anya portal into Nihlathak's temple to reach Pindleskin.
 # Each entry is (x, y, move_duration, delay_after) where:
 #   move_duration — seconds to take moving the mouse to (x, y)
@@ -98,37 +244,199 @@ PORTAL_WALK_PATH = [
 ]
 
 
+# Screen capture, input and time all go through this (see backends.py).
+# replay.py swaps in a ReplayBackend to run the bot offline.
+backend = LiveBackend()
+
+
+def set_backend(new_backend) -> None:
+    global backend
+    backend = new_backend
+
+
+# Time spent in each phase of a run, in backend (possibly virtual) seconds.
+phase_times: dict[str, list[float]] = defaultdict(list)
+
+# Seconds saved per settle step versus its fixed-delay ceiling.
+step_savings: dict[str, list[float]] = defaultdict(list)
+
+# How late each timeline action started versus its schedule, in seconds.
+action_lateness: dict[str, list[float]] = defaultdict(list)
+
+# Seconds from the first attack to Pindleskin's death, per confirmed kill.
+kill_times: list[float] = []
+
+# This run's measurements for the run store, e.g. {"walk": s, "kill": s}.
+_run_stats: dict[str, float] = {}
+
+# This run's time in each phase so far, for the run store.
+_run_phases: dict[str, float] = {}
+_run_started: float | None = None   # backend.now() when the run began
+
+# Per-run input accounting: backend.input_stats.snapshot() for each run.
+input_per_run: list[dict[str, float]] = []
+
+
+@contextmanager
+def phase(name: str):
+    """Record how long the enclosed block takes under phase_times[name]."""
+    t0 = backend.now()
+    try:
+        yield
+    finally:
+        phase_times[name].append(backend.now() - t0)
+        _run_phases[name] = _run_phases.get(name, 0.0) + phase_times[name][-1]
+
+
 class AbortBot(Exception):
     """Raised when the user moves the mouse into the abort zone (x < ABORT_ZONE_X)."""
 
 
+class InventoryFull(AbortBot):
+    """Raised in town when not even a rune fits in the inventory any more."""
+
+
+class Chicken(Exception):
+    """Raised mid-run when life drops below CHICKEN_FILL; the run is abandoned."""
+
+
 _abort_flag = threading.Event()
+_chicken_flag = threading.Event()
+_wake = threading.Event()   # set with either flag; every wait sleeps on it
+
+
+def abort() -> None:
+    """Stop the bot: set _abort_flag and wake every wait."""
+    _abort_flag.set()
+    _wake.set()
 
 
 def _mouse_monitor():
-    """Background thread: sets _abort_flag the moment the mouse enters the abort zone."""
+    """Background thread: aborts the moment the mouse enters the abort zone."""
     while not _abort_flag.is_set():
-        if pyautogui.position().x < ABORT_ZONE_X:
-            _abort_flag.set()
+        if backend.position()[0] < ABORT_ZONE_X:
+            abort()
             return
         time.sleep(0.05)   # 20 checks/second — responsive but not spammy
 
 
+def _settle_wake() -> None:
+    """Let the waits sleep again once a chicken is handled (not after an abort)."""
+    if not _abort_flag.is_set():
+        _wake.clear()
+
+
 def check_abort():
-    """Raise AbortBot if the abort flag has been set."""
+    """Raise AbortBot if the abort flag has been set, Chicken on low life."""
     if _abort_flag.is_set():
         raise AbortBot("Mouse moved into abort zone — stopping bot.")
+    if _chicken_flag.is_set():
+        _chicken_flag.clear()
+        _settle_wake()
+        raise Chicken(f"Life below {CHICKEN_FILL:.0%} — leaving the game.")
+
+
+_health: health_globe.HealthWatcher | None = None
+
+
+def chicken(fill: float) -> None:
+    """HealthWatcher.on_low: wake every wait at once; check_abort() raises Chicken."""
+    log(f"[CHICKEN] life at {fill:.0%}")
+    _chicken_flag.set()
+    _wake.set()
+
+
+def start_health_watch() -> health_globe.HealthWatcher | None:
+    """Start the health watcher thread (None when it is off)."""
+    global _health
+    if not USE_HEALTH_WATCH:
+        return None
+    template = ui_template(HEALTH_TEMPLATE)
+    full = (health_globe.raw_fill(health_globe.strip_of(template, HEALTH_REGION["width"]))
+            if template is not None else 1.0)
+    _health = health_globe.HealthWatcher(lambda region: backend.grab(region), HEALTH_REGION,
+                                         CHICKEN_FILL, full, on_low=chicken, hz=HEALTH_HZ)
+    return _health.start()
+
+
+def health_armed(armed: bool) -> None:
+    """Arm the health watcher once in game; disarm it on the way out."""
+    if _health is not None:
+        _health.arm() if armed else _health.disarm()
+    _chicken_flag.clear()
+    _settle_wake()
+
+
+_machine: RunMachine | None = None   # the running state machine, for its deadlines
+
+
+def check_deadline():
+    """Raise run_state.StateTimeout if the current run state is out of time."""
+    if _machine is not None:
+        _machine.check()
 
 
 def safe_sleep(seconds: float):
-    """Sleep for *seconds*, checking for abort every 0.1 s."""
-    steps = int(seconds / 0.1)
-    for _ in range(steps):
+    """Sleep for *seconds* (to an absolute deadline), waking at once on abort."""
+    check_abort()
+    check_deadline()
+    backend.wait_until(backend.monotonic() + seconds, _wake)
+    check_abort()
+
+
+def run_timeline(tl: Timeline) -> None:
+    """Run *tl* on the backend (AbortBot on abort), keeping each action's lateness."""
+    try:
+        tl.run(backend, _wake)
+    except Aborted:
+        check_abort()
+        raise
+    finally:
+        for label, _, late in tl.timings:
+            action_lateness[label].append(late)
+
+
+def settle_thumbnail() -> np.ndarray | None:
+    """Thumbnail of the play area, taken just before an action whose effect
+    wait_settled() should wait for (None when settling is off)."""
+    if not USE_SETTLE:
+        return None
+    return settle.thumbnail(capture_region(SETTLE_REGION))
+
+
+def wait_settled(step: str, ceiling: float, before: np.ndarray | None = None) -> float:
+    """
+    Wait until the screen has changed from *before* (a settle_thumbnail()
+    taken ahead of the action) and come to rest, for at most *ceiling*
+    seconds.  Without *before*, only wait for it to be still.  Records the
+    time saved under step_savings[step] and returns the time waited.
+    """
+    if not USE_SETTLE:
+        safe_sleep(ceiling)
+        return ceiling
+    detector = settle.SettleDetector(before)
+    t0 = backend.now()
+    deadline = t0 + ceiling
+    while True:
         check_abort()
-        time.sleep(0.1)
-    remainder = seconds - steps * 0.1
-    if remainder > 0:
-        time.sleep(remainder)
+        check_deadline()
+        if detector.feed(settle.thumbnail(capture_region(SETTLE_REGION))):
+            break
+        remaining = deadline - backend.now()
+        if remaining <= 0:
+            break
+        backend.sleep(min(SETTLE_INTERVAL, remaining))
+    waited = min(backend.now() - t0, ceiling)
+    step_savings[step].append(ceiling - waited)
+    log(f"  {step}: ready after {waited:.2f}s (saved {ceiling - waited:.2f}s)")
+    return waited
+
+
+def act_and_settle(step: str, ceiling: float, act) -> None:
+    """Do act() and wait_settled() on its effect, for at most *ceiling* s."""
+    before = settle_thumbnail()
+    act()
+    wait_settled(step, ceiling, before)
 
 
 def log(msg):
@@ -138,116 +446,456 @@ def log(msg):
 
 def capture_region(region: dict) -> np.ndarray:
     """Grab a screen region and return as a BGR numpy array."""
-    with mss.mss() as sct:
-        raw = sct.grab(region)
-        return np.array(raw)[:, :, :3]
+    return backend.grab(region)
 
 
-def template_visible(template: np.ndarray, region: dict, threshold=MATCH_THRESHOLD) -> bool:
-    """Return True if the template is found within the given screen region."""
-    screen = capture_region(region)
+_ui_templates: dict[str, np.ndarray] = {}
+
+
+def ui_template(path: str) -> np.ndarray | None:
+    """Load a UI template image (cached); None if the file is missing."""
+    tmpl = _ui_templates.get(path)
+    if tmpl is None and os.path.exists(path):
+        tmpl = cv2.imread(path)
+        if tmpl is not None:
+            _ui_templates[path] = tmpl
+    return tmpl
+
+
+def match_score(screen: np.ndarray, template: np.ndarray) -> float:
+    """Best normalised-correlation score of *template* anywhere in *screen*."""
     result = cv2.matchTemplate(screen, template, cv2.TM_CCOEFF_NORMED)
     _, max_val, _, _ = cv2.minMaxLoc(result)
-    return max_val >= threshold
+    return max_val
+
+
+def template_visible(template: np.ndarray, region: dict, threshold=MATCH_THRESHOLD) -> bool:
+    """Return True if the template is found within the given screen region."""
+    return match_score(capture_region(region), template) >= threshold
+
+
+_scenes = None       # scene_classifier.SceneClassifier, loaded on first use
+_load_times = None   # scene_classifier.LoadTimes for SCENE_STATS_FILE
+
+
+def scenes():
+    """The scene classifier over templates/scenes (loaded once)."""
+    global _scenes
+    if _scenes is None:
+        _scenes = scene_classifier.SceneClassifier.load()
+    return _scenes
+
+
+def load_times():
+    """Learned transition times, persisted to SCENE_STATS_FILE."""
+    global _load_times
+    if _load_times is None or _load_times.path != SCENE_STATS_FILE:
+        _load_times = scene_classifier.LoadTimes(SCENE_STATS_FILE)
+    return _load_times
+
+
+def current_scene() -> str | None:
+    """Classify the whole game window; None if it matches no reference."""
+    label, _ = scenes().classify(capture_region(GAME_REGION))
+    return label
+
+
+def detect_scene() -> str | None:
+    """
+    current_scene(), falling back to the UI templates: "char_select" when
+    the Play button shows, "in_game" when the HUD's UI cross does.
+    """
+    label = current_scene()
+    if label is not None:
+        return label
+    for scene, path, region in (("char_select", PLAY_BUTTON_TEMPLATE, PLAY_BUTTON_REGION),
+                                ("in_game", GAME_LOAD_TEMPLATE, GAME_LOAD_REGION)):
+        template = ui_template(path)
+        if template is not None and template_visible(template, region):
+            return scene
+    return None
+
+
+def wait_for_scene(scene: str, template_path: str, region: dict):
+    """
+    Block until *scene* is on screen.
+
+    Uses the scene classifier when it has references for *scene*, otherwise
+    falls back to finding *template_path* in *region*.  Polls slowly while
+    the transition is younger than its usual duration and at 25 Hz once it
+    is due, then records how long it took.
+    """
+    if scenes().knows(scene):
+        def arrived():
+            return current_scene() == scene
+    else:
+        template = ui_template(template_path)
+        if template is None:
+            log(f"ERROR: Template not found at '{template_path}' and no "
+                f"'{scene}' references in templates/scenes.")
+            log("Run capture_template.py or scene_classifier.py capture first.")
+            sys.exit(1)
+
+        def arrived():
+            return template_visible(template, region)
+
+    times = load_times()
+    t0 = backend.now()
+    while not arrived():
+        check_abort()
+        check_deadline()
+        backend.sleep(times.poll_interval(scene, backend.now() - t0))
+    times.record(scene, backend.now() - t0)
 
 
 def wait_for_game_load():
-    """Block until the health globe is visible, indicating we're in town."""
-    template_path = "templates/ui_cross.png"
-    template = cv2.imread(template_path)
-    if template is None:
-        log(f"ERROR: Template not found at '{template_path}'.")
-        log("Run capture_template.py while in-game first.")
-        sys.exit(1)
+    """Block until the game has loaded and we're standing in town."""
+    log("Waiting for game to load...")
+    wait_for_scene("town", GAME_LOAD_TEMPLATE, GAME_LOAD_REGION)
+    log("Game loaded — in town.")
 
-    # Scan the full bottom strip — template matching finds the cross wherever it is
-    region = {"left": 0, "top": 900, "width": 1680, "height": 200}
 
-    log("Waiting for game to load (watching for UI cross)...")
-    while not template_visible(template, region):
-        check_abort()
-        time.sleep(0.5)
-    log("Game loaded — UI detected, in town.")
+def enter_game():
+    """From character select: Enter, then H for Hell difficulty."""
+    log("Pressing Enter, then H for Hell difficulty...")
+    tl = Timeline("enter_game")
+    tl.call(partial(act_and_settle, "difficulty menu", STEP_DELAY,
+                    partial(backend.press, "enter", pause=0.0)), label="press enter")
+    tl.press("h").move(840, 525, duration=0.3)
+    run_timeline(tl)
 
 
-def walk_to_portal():
-    """Click through the waypoint path to reach the Anya portal."""
-    log(f"Walking to Anya portal ({len(PORTAL_WALK_PATH)} waypoints)...")
-    safe_sleep(1)
+def cast_buffs():
+    health_armed(True)
+    log("Summon a pal, cast the healing thinger")
+    run_timeline(Timeline("buffs")
+                 .wait(0.1).press("f8")    # defiler
+                 .wait(0.1).press("f7"))   # healing hex thinger
+
+
+_inventory: np.ndarray | None = None   # inventory.occupancy(), as of the last read
+_inventory_runs = 0                    # runs since it was read
+
+
+def check_inventory():
+    """Read the inventory grid if it may have changed; stop the bot when it is full."""
+    global _inventory, _inventory_runs
+    if not USE_INVENTORY_CHECK:
+        return
+    if _inventory is not None and _inventory_runs < INVENTORY_EVERY:
+        _inventory_runs += 1
+        return
+    backend.press(INVENTORY_KEY)
+    safe_sleep(INVENTORY_OPEN)
+    occ = inventory.occupancy(capture_region(INVENTORY_REGION))
+    backend.press(INVENTORY_KEY)
+    _inventory, _inventory_runs = occ, 0
+    log(f"Inventory: {inventory.report(occ)}")
+    if inventory.place(occ, 1, 1) is None:
+        raise InventoryFull("Inventory is full — stopping bot.")
+    if inventory.free_cells(occ) < INVENTORY_WARN_FREE:
+        log(f"WARNING: only {inventory.free_cells(occ)} inventory cells left.")
+
+
+_town_map = None   # minimap.Localizer, loaded on the first walk
+
+
+def town_map():
+    """The minimap Localizer, or None when minimap walking is off or unmapped."""
+    global _town_map
+    if not USE_MINIMAP_WALK:
+        return None
+    if _town_map is None and os.path.exists(minimap.MAP_PATH):
+        _town_map = minimap.Localizer.load()
+    return _town_map
+
+
+def click_towards(pos, target) -> None:
+    """Click on screen in the direction of map point *target* from *pos*."""
+    dx = (target[0] - pos[0]) * MAP_SCALE
+    dy = (target[1] - pos[1]) * MAP_SCALE
+    dist = (dx * dx + dy * dy) ** 0.5
+    if dist > NAV_CLICK_MAX:
+        dx, dy = dx * NAV_CLICK_MAX / dist, dy * NAV_CLICK_MAX / dist
+    backend.move_to(round(PLAYER_SCREEN[0] + dx), round(PLAYER_SCREEN[1] + dy), pause=0.0)
+    backend.click(pause=0.0)
+
+
+def minimap_walk(loc) -> bool:
+    """
+    Steer to the portal by minimap fixes.  False if there is no fix to
+    start from (walk the recorded path instead); RuntimeError if the fix
+    is lost for LOST_TICKS ticks mid-walk.
+    """
+    loc.pos = None
+    if loc.locate(capture_region(MINIMAP_REGION)) is None:
+        log(f"Minimap: no fix (score {loc.score:.2f}), walking the recorded path.")
+        return False
+    lost = 0
+    while True:
+        pos = loc.locate(capture_region(MINIMAP_REGION))
+        if pos is None:
+            lost += 1
+            if lost >= LOST_TICKS:
+                raise RuntimeError(f"Minimap: lost our position (score {loc.score:.2f})")
+        elif loc.to_portal(pos) <= ARRIVE_DIST:
+            portal = loc.nodes[loc.portal]
+            act_and_settle("portal", 2.0, partial(click_towards, pos, portal))
+            return True
+        else:
+            lost = 0
+            click_towards(pos, loc.next_target(pos))
+        safe_sleep(NAV_INTERVAL)
+
+
+def walk_recorded_path():
+    """Click through PORTAL_WALK_PATH, settling after each click."""
+    tl = Timeline("walk_to_portal")
+    tl.call(partial(wait_settled, "walk start", 1.0), label="settle")
     for i, (x, y, delay) in enumerate(PORTAL_WALK_PATH, 1):
-        log(f"  Waypoint {i}/{len(PORTAL_WALK_PATH)}: ({x}, {y}) — waiting {delay}s")
-        check_abort()
-        pyautogui.moveTo(x, y, duration=0.3)
-        safe_sleep(0.2)
-        pyautogui.click()
-        safe_sleep(delay)
-    log("Entered portal.")
+        tl.move(x, y, duration=0.3).wait(0.2)
+        tl.call(partial(act_and_settle, f"walk {i}", delay,
+                        partial(backend.click, pause=0.0)), label="click")
+    run_timeline(tl)
+
+
+def walk_to_portal():
+    """Walk to the Anya portal: by minimap when there is a town map, else the recorded path."""
+    t0 = backend.now()
+    loc = town_map()
+    if loc is not None and minimap_walk(loc):
+        log("Entered portal (minimap).")
+    else:
+        log(f"Walking to Anya portal ({len(PORTAL_WALK_PATH)} waypoints)...")
+        walk_recorded_path()
+        log("Entered portal.")
+    _run_stats["walk"] = backend.now() - t0
 
 
 def blade_warp_to_pindleskin():
     """Blade Warp through the temple to reach Pindleskin."""
     log(f"Blade Warping to Pindleskin ({len(BLADE_WARP_PATH)} warps)...")
+    tl = Timeline("blade_warp")
     for i, (x, y, move_dur, delay) in enumerate(BLADE_WARP_PATH, 1):
-        log(f"  Warp {i}/{len(BLADE_WARP_PATH)}: ({x}, {y})")
-        check_abort()
-        pyautogui.moveTo(x, y, duration=move_dur)
-        pyautogui.press("s")
-        safe_sleep(delay)
+        tl.move(x, y, duration=move_dur)
+        tl.call(partial(act_and_settle, f"warp {i}", delay,
+                        partial(backend.press, "s", pause=0.0)), label="press s")
+    run_timeline(tl)
     log("Arrived at Pindleskin.")
 
 
+def watch_kill(deadline: float, detector: boss_health.KillDetector | None) -> bool:
+    """
+    Sample the boss health bar into *detector* until *deadline* (backend
+    monotonic).  Returns True as soon as it reports the kill; without a
+    detector just waits.
+    """
+    while True:
+        check_abort()
+        check_deadline()
+        if detector is not None and detector.feed(
+                boss_health.bar_fill(capture_region(BOSS_BAR_REGION))):
+            return True
+        now = backend.monotonic()
+        if now >= deadline:
+            return False
+        step = deadline if detector is None else min(now + KILL_INTERVAL, deadline)
+        backend.wait_until(step, _wake)
+
+
+def aim_tracker():
+    """A BossTracker starting at BOSS_AIM, or None when tracking is off or has no template."""
+    template = ui_template(BOSS_TEMPLATE) if USE_AIM_TRACKING else None
+    if template is None:
+        return None
+    return boss_tracker.BossTracker(BOSS_AIM, template, bounds=GAME_REGION)
+
+
 def kill_pindleskin():
-    """Fight Pindleskin: cast weakness sigil then alternate Abyss and Miasma Bolt."""
+    """
+    Fight Pindleskin: cast weakness sigil then alternate Abyss and Miasma Bolt
+    until his health bar shows him dead, or KILL_ROUNDS rotations.  Each
+    cast is aimed at him as tracked by aim_tracker().
+    """
     log("Engaging Pindleskin...")
-    check_abort()
-    pyautogui.moveTo(1047, 536, duration=0.3)
-
-    # Cast lethargy sigil
-    pyautogui.press("f5")
-    safe_sleep(0.2)
-
-    # 7 rounds of Abyss (D) + 3x Miasma Bolt (F)
-    for i in range(1, 7):
-        log(f"  Attack round {i}/7")
-        pyautogui.press("d")
-        safe_sleep(0.1)
-        pyautogui.press("f")
-        safe_sleep(0.1)
-        pyautogui.press("f")
-        safe_sleep(0.1)
-        pyautogui.press("f")
-        safe_sleep(0.5)
-
-    log("Pindleskin down. Check loot.")
-    safe_sleep(1.0)
-    pyautogui.press("alt")
-
-
-def _read_totals() -> dict:
-    totals = {"total_runes_found": 0, "mal_plus_runes_found": 0, "total_charms_found": 0}
-    try:
-        with open(TOTALS_FILE) as f:
-            for line in f:
-                key, _, val = line.strip().partition("=")
-                if key in totals:
-                    totals[key] = int(val)
-    except FileNotFoundError:
-        pass
-    return totals
+    run_timeline(Timeline("kill")
+                 .move(*BOSS_AIM, duration=0.3)
+                 .press("f5").wait(0.2))   # lethargy sigil
+
+    detector = boss_health.KillDetector() if USE_KILL_DETECT else None
+    tracker = aim_tracker()
+    aim = BOSS_AIM
+    cap = KILL_ROUNDS * sum(wait for _, wait in KILL_ROTATION)
+    origin = backend.monotonic()
+    at = 0.0
+    dead = False
+    for _ in range(KILL_ROUNDS):
+        for key, wait in KILL_ROTATION:
+            if tracker is not None:
+                region = tracker.window()
+                x, y = tracker.update(capture_region(region), region)
+                if abs(x - aim[0]) > AIM_TOLERANCE or abs(y - aim[1]) > AIM_TOLERANCE:
+                    aim = (x, y)
+                    backend.move_to(x, y, pause=0.0)
+            action_lateness[f"press {key}"].append(backend.monotonic() - (origin + at))
+            backend.press(key, pause=0.0)
+            at += wait
+            if dead := watch_kill(origin + at, detector):
+                break
+        if dead:
+            break
+    elapsed = backend.monotonic() - origin
 
+    if dead:
+        _run_stats["kill"] = elapsed
+        kill_times.append(elapsed)
+        log(f"Pindleskin dead after {elapsed:.2f}s (cap {cap:.2f}s, saved {cap - elapsed:.2f}s).")
+    else:
+        log(f"Rotation done after {elapsed:.2f}s without seeing the kill.")
+    if tracker is not None:
+        log(f"  aim tracking: {tracker.report()}")
+    safe_sleep(1.0)   # let the loot drop
+    backend.press("alt", pause=0.0)
+    log("Check loot.")
 
-def _write_totals(totals: dict) -> None:
-    with open(TOTALS_FILE, "w") as f:
-        for key, val in totals.items():
-            f.write(f"{key}={val}\n")
 
+_run_store: dict[str, run_store.RunStore] = {}
+
+
+def runs_db() -> run_store.RunStore:
+    """The RUN_STORE database (opened once per path; old text logs imported once)."""
+    if RUN_STORE not in _run_store:
+        store = _run_store[RUN_STORE] = run_store.RunStore(RUN_STORE)
+        runs, keys = store.import_legacy(LEGACY_RUN_LOG, LEGACY_TOTALS)
+        if runs or keys:
+            print(f"Imported {runs} runs and {keys} totals from {LEGACY_RUN_LOG} "
+                  f"and {LEGACY_TOTALS} into {RUN_STORE}")
+    return _run_store[RUN_STORE]
 
-def loot_items(run_number: int):
-    """Scan for runes and charms, picking up one at a time and re-scanning after each."""
-    pyautogui.moveTo(200, 200, duration=0.2)
-    time.sleep(0.2)
 
-    os.makedirs(SCREENS_DIR, exist_ok=True)
+_totals: dict[str, int] | None = None
+
+
+def run_totals(counts: dict[str, int]) -> dict[str, int]:
+    """
+    All-time totals with a run's *counts* added: read from the run store
+    once, then kept here, since the store is written behind the bot.
+    """
+    global _totals
+    if _totals is None:
+        _totals = runs_db().totals()
+    for key, n in counts.items():
+        _totals[key] = _totals.get(key, 0) + n
+    return _totals
+
+
+_archive: dict[str, "screen_archive.ScreenArchive"] = {}
+
+
+def loot_archive() -> "screen_archive.ScreenArchive":
+    """The SCREEN_ARCHIVE of loot screenshots (opened once per path)."""
+    if SCREEN_ARCHIVE not in _archive:
+        _archive[SCREEN_ARCHIVE] = screen_archive.ScreenArchive(SCREEN_ARCHIVE)
+    return _archive[SCREEN_ARCHIVE]
+
+
+_artifacts: artifact_writer.ArtifactWriter | None = None
+
+
+def artifacts() -> artifact_writer.ArtifactWriter:
+    """The background writer for screenshots and run records (started once)."""
+    global _artifacts
+    if _artifacts is None:
+        _artifacts = artifact_writer.ArtifactWriter(ARTIFACT_QUEUE).start()
+    return _artifacts
+
+
+def close_artifacts() -> str | None:
+    """Write everything still queued and stop the writer; its report, if it ran."""
+    global _artifacts
+    if _artifacts is None:
+        return None
+    writer, _artifacts = _artifacts, None
+    writer.close()
+    return writer.report()
+
+
+def run_counts(picked: Counter, names: Counter) -> dict[str, int]:
+    """What a run adds to the totals: runes and charms, and each rune by name."""
+    counts = {"total_runes_found": picked["Rune"], "total_charms_found": picked["Charm"],
+              "mal_plus_runes_found": sum(n for name, n in names.items()
+                                          if rune_names.is_mal_plus(name))}
+    for name, n in names.items():
+        counts[f"{name.lower()}_runes_found"] = n
+    return counts
+
+
+_loot_prior: label_prior.LabelPrior | None = None
+
+
+def loot_prior() -> label_prior.LabelPrior | None:
+    """The label-location prior (loaded once), or None when it is off."""
+    global _loot_prior
+    if not USE_LABEL_PRIOR:
+        return None
+    if _loot_prior is None:
+        _loot_prior = label_prior.LabelPrior.load(LABEL_PRIOR_FILE, (LOOT_HEIGHT, LOOT_WIDTH))
+    return _loot_prior
+
+
+def detect(img: np.ndarray, fn, full: bool = True) -> list:
+    """fn(img), restricted to the prior's hot regions unless *full*."""
+    prior = loot_prior()
+    return fn(img) if prior is None else prior.search(img, fn, full)
+
+
+_pickit: dict[str, pickit.Pickit] = {}
+
+
+def loot_rules() -> pickit.Pickit | None:
+    """The compiled PICKIT_FILE rules (loaded once), or None if there is no file."""
+    if PICKIT_FILE not in _pickit:
+        if not os.path.exists(PICKIT_FILE):
+            return None
+        _pickit[PICKIT_FILE] = pickit.Pickit.load(
+            PICKIT_FILE, set(ocr_items.COLOR_TO_CLASS.values()))
+    return _pickit[PICKIT_FILE]
+
+
+def loot_targets(img: np.ndarray, crop: dict, full: bool = True,
+                 items: list | None = None) -> list[pickup.Target]:
+    """
+    Labels to pick up in *img* (a grab of *crop*), in screen pixels: the
+    pickit rules over an OCR pass (*items*, if already read), plus the
+    "Rune" and "Charm" word templates, with each rune's name read by
+    rune_names.  A word hit inside the label of a rule match is that same
+    label; the rest are labels the OCR missed (at the crop edge, say).
+    """
+    targets = []
+    rules = loot_rules()
+    if rules is not None:
+        if items is None:
+            items = detect(img, ocr_items.read_items_img, full)
+        targets = [pickup.Target(pickit.kind_of(it), crop["left"] + it.x, crop["top"] + it.y,
+                                 it.name)
+                   for it in items if rules.wants(it)]
+    boxes = [pickup.label_box(img, t.x - crop["left"], t.y - crop["top"]) for t in targets]
+    words = ([("Rune", x, y) for x, y in detect(img, find_runes.find_runes_img, full)]
+             + [("Charm", x, y) for x, y in detect(img, find_charms.find_charms_img, full)])
+    for kind, x, y in words:
+        if any(box.contains(x, y) for box in boxes):
+            continue
+        name = ""
+        if kind == "Rune" and (rune := rune_names.classify(img, x, y)):
+            name = f"{rune} Rune"
+        targets.append(pickup.Target(kind, crop["left"] + x, crop["top"] + y, name))
+    return targets
+
+
+def loot_items(run_number: int):
+    """Scan for runes and charms and pick up all that fit along a planned route."""
+    global _inventory, _inventory_runs
+    backend.move(200, 200, PARK_MOVE)
 
     crop = {
         "left":   LOOT_CENTER_X - LOOT_WIDTH  // 2,
@@ -256,189 +904,367 @@ def loot_items(run_number: int):
         "height": LOOT_HEIGHT,
     }
 
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    path = os.path.join(SCREENS_DIR, f"run_{timestamp}.png")
+    timestamp = datetime.fromtimestamp(backend.now()).strftime("%Y%m%d_%H%M%S")
 
-    runes_picked  = 0
-    charms_picked = 0
-    first_img     = None
+    img = capture_region(crop)
+    first_img = img   # the run's screenshot, written at the end if it is kept
 
-    while True:
-        with mss.mss() as sct:
-            raw = sct.grab(crop)
-            img = np.array(raw)[:, :, :3]
-
-        # Save the first frame as the run's screenshot record
-        if first_img is None:
-            first_img = img
-            cv2.imwrite(path, img)
-            log(f"Saved loot screenshot: {path}")
-
-            if DEBUG_OCR:
-                ocr_items = read_items(path)
-                if ocr_items:
-                    print(f"  [OCR] {', '.join(f'{it.name} ({it.classification})' for it in ocr_items)}")
-                else:
-                    print("  [OCR] no items detected")
-
-        # Check runes first, then charms
-        rune_hits  = find_runes_img(img)
-        charm_hits = find_charms_img(img)
-
-        if rune_hits:
-            cx, cy = rune_hits[0]
-            kind = "Rune"
-        elif charm_hits:
-            cx, cy = charm_hits[0]
-            kind = "Charm"
-        else:
-            break
+    # Search where labels usually land; the whole crop while the prior is
+    # learning and on its audit runs
+    prior = loot_prior()
+    full = prior is None or prior.audit_due()
 
-        screen_x = crop["left"] + cx
-        screen_y = crop["top"]  + cy
-        log(f"{kind} at crop ({cx}, {cy}) → screen ({screen_x}, {screen_y}) — picking up!")
-        check_abort()
-        pyautogui.moveTo(screen_x, screen_y, duration=0.5)
-        safe_sleep(0.2)
-        pyautogui.click()
-        safe_sleep(0.5)
-
-        if kind == "Rune":
-            runes_picked += 1
+    ocr_found = None
+    if DEBUG_OCR or loot_rules() is not None:
+        ocr_found = detect(img, ocr_items.read_items_img, full)
+    if DEBUG_OCR:
+        if ocr_found:
+            print(f"  [OCR] {', '.join(f'{it.name} ({it.classification})' for it in ocr_found)}")
         else:
-            charms_picked += 1
-
-    total_picked = runes_picked + charms_picked
-
-    # Build log line
+            print("  [OCR] no items detected")
+
+    # Click every label back to back in planned order, then check each in its
+    # own label box in one capture.  Before each click after the first, the
+    # label is found again in a fresh grab, and the click follows the view
+    # as it scrolls.  Missed labels are clicked again; only if a label moved
+    # (they re-flow as others go) is the region searched again.
+    picked: Counter[str] = Counter()
+    names: Counter[str] = Counter()   # picked runes by name
+    targets = first_targets = loot_targets(img, crop, full, ocr_found)
+    if prior is not None:
+        prior.add(ocr_found or [(t.x - crop["left"], t.y - crop["top"]) for t in targets])
+    before = img
+    room = _inventory if USE_INVENTORY_CHECK else None
+    for _ in range(PICKUP_ROUNDS):
+        if not targets:
+            break
+        route = pickup.plan(targets, backend.position())
+        if room is not None:
+            route, no_room, _ = inventory.fit(route, room)
+            if no_room:
+                log("No inventory room for: " + ", ".join(t.name or t.kind for t in no_room))
+            if not route:
+                targets = []
+                break
+        boxes = {t: pickup.label_box(before, t.x - crop["left"], t.y - crop["top"])
+                 for t in route}
+        log(f"Picking up {len(route)}: " + ", ".join(f"{t.kind} ({t.x}, {t.y})" for t in route))
+        shift = (0, 0)   # how far the view has scrolled since `before`
+        for i, t in enumerate(route):
+            check_abort()
+            if i:
+                # The camera follows the character to each label: find this one again
+                found = pickup.find_text(before, capture_region(crop), boxes[t], shift)
+                if found is None:
+                    continue   # picked up on the way, or out of sight; the check sorts it out
+                shift = found
+            backend.batch([("move", t.x + shift[0], t.y + shift[1], LOOT_MOVE), ("click",)],
+                          pause=LOOT_CLICK_GAP)
+        safe_sleep(PICKUP_SETTLE)
+        after = capture_region(crop)
+        verdicts = {t: pickup.verify(before, after, boxes[t], shift) for t in route}
+        log("  " + ", ".join(f"{t.kind} {v}" for t, v in verdicts.items()))
+        gone = Counter((t.kind, t.name) for t, v in verdicts.items() if v == pickup.PICKED)
+        targets = [replace(t, x=t.x + shift[0], y=t.y + shift[1])
+                   for t in route if verdicts[t] != pickup.PICKED]
+        if pickup.MOVED in verdicts.values():
+            # Whatever of the unresolved labels is not found again was picked up
+            found = loot_targets(after, crop, full)
+            left = Counter((t.kind, t.name) for t in targets)
+            left.subtract((t.kind, t.name) for t in found)
+            gone += left   # keeps the positive counts only
+            targets = found
+        for (kind, name), n in gone.items():
+            picked[kind] += n
+            if rune := rune_names.rune_of(name):
+                names[rune] += n
+            if room is not None:
+                room = inventory.fit([pickup.Target(kind, 0, 0, name)] * n, room)[2]
+        before = after
+    if targets:
+        log(f"Left behind after {PICKUP_ROUNDS} rounds: {', '.join(t.kind for t in targets)}")
+
+    total_picked = sum(picked.values())
+    if total_picked and room is not None:
+        # Best guess until the next town check reads the grid again
+        _inventory, _inventory_runs = room, INVENTORY_EVERY
+    kinds = sorted(picked, key=lambda k: -pickup.VALUES.get(k, 0))
+
+    # Build the run's summary line
     if total_picked:
-        parts = []
-        if runes_picked:  parts.append(f"RUNE x{runes_picked}")
-        if charms_picked: parts.append(f"CHARM x{charms_picked}")
-        log_line = "  +  ".join(parts)
+        summary = "  +  ".join(f"{kind.upper()} x{picked[kind]}" for kind in kinds)
+        if names:
+            summary += "  runes=" + ",".join(f"{name}x{n}" for name, n in names.items())
     else:
-        log_line = "no items"
-
-    with open(RUN_LOG, "a") as f:
-        f.write(f"{timestamp}  run={run_number}  {log_line}\n")
+        summary = "no items"
+
+    # The screenshot (if the run is kept), the run record and the label prior
+    # are written behind us while the bot leaves the game
+    writer = artifacts()
+    shot = None
+    if USE_SCREEN_ARCHIVE:
+        tags = kinds + sorted(names)
+        if screen_archive.keep(run_number, tags, ARCHIVE_SAMPLE_EVERY):
+            shot = f"run_{timestamp}"
+            writer.submit(loot_archive().put, first_img, shot, run_number, tags,
+                          label="screenshot")
+    elif total_picked:
+        shot = os.path.join(SCREENS_DIR, f"run_{timestamp}.png")
+        writer.submit(artifact_writer.write_png, first_img, shot,
+                      os.path.join(SCREENS_DIR, "found_runes", f"run_{timestamp}.png"),
+                      label="screenshot")
+    if shot:
+        log(f"Saving loot screenshot: {shot}")
+    counts = run_counts(picked, names)
+    totals = run_totals(counts)   # reads the store (once) before queueing the first record
+    writer.submit(runs_db().add, run_store.RunRecord(
+        run_number=run_number, started=_run_started or backend.now(), summary=summary,
+        screenshot=shot, phases=dict(_run_phases), stats=dict(_run_stats),
+        detections=[(t.kind, t.name, t.x, t.y) for t in first_targets],
+        items=[(it.name, it.classification, it.x, it.y, it.confidence)
+               for it in ocr_found or []],
+        counts=counts), label="run record")
+    if prior is not None:   # a copy: the next run adds to the prior while this one saves
+        writer.submit(copy.deepcopy(prior).save, LABEL_PRIOR_FILE, label="label prior")
 
     if not total_picked:
         log("No items found.")
-        os.remove(path)
-        totals = _read_totals()
         print(f"{timestamp}  run={run_number:>4}  ·  no items  "
               f"(runes: {totals['total_runes_found']}  charms: {totals['total_charms_found']})")
         return
 
-    found_dir = os.path.join(SCREENS_DIR, "found_runes")
-    os.makedirs(found_dir, exist_ok=True)
-    cv2.imwrite(os.path.join(found_dir, f"run_{timestamp}.png"), first_img)
-
-    totals = _read_totals()
-    totals["total_runes_found"]  += runes_picked
-    totals["total_charms_found"] += charms_picked
-    _write_totals(totals)
-
     # Build pickup summary for the console
-    parts = []
-    if runes_picked:
-        parts.append(f"RUNE{'  x' + str(runes_picked) if runes_picked > 1 else ''}")
-    if charms_picked:
-        parts.append(f"CHARM{'  x' + str(charms_picked) if charms_picked > 1 else ''}")
-    pickup_str = "  +  ".join(parts)
+    pickup_str = "  +  ".join(
+        f"{kind.upper()}{'  x' + str(picked[kind]) if picked[kind] > 1 else ''}" for kind in kinds)
+    if names:
+        pickup_str += f"  ({', '.join(f'{name} x{n}' if n > 1 else name for name, n in names.items())})"
 
     bar = "★" + "═" * 36 + "★"
     print(f"\n{bar}")
     print(f"  ✦  {pickup_str} ACQUIRED!  ✦")
     print(f"  run {run_number}  ·  "
-          f"{totals['total_runes_found']} runes  ·  {totals['total_charms_found']} charms  all-time")
+          f"{totals['total_runes_found']} runes ({totals['mal_plus_runes_found']} Mal+)  ·  "
+          f"{totals['total_charms_found']} charms  all-time")
     print(f"{bar}\n")
 
 
 def exit_game():
     """Press Escape to open the menu then click Save and Exit."""
     log("Exiting game...")
-    pyautogui.press("escape")
-    safe_sleep(0.5)
-    pyautogui.moveTo(819, 507, duration=0.4)
-    pyautogui.click()
+    tl = Timeline("exit_game")
+    tl.call(partial(act_and_settle, "exit menu", 0.5,
+                    partial(backend.press, "escape", pause=0.0)), label="press escape")
+    tl.move(819, 507, duration=0.4).click()
+    run_timeline(tl)
     log("Save and Exit clicked.")
 
 
 def wait_for_play_button():
-    """Block until the Play button is visible, indicating we're on character select."""
-    template = cv2.imread("templates/play_button.png")
-    region = {"left": 765, "top": 951, "width": 160, "height": 80}
-    log("Waiting for character select screen (watching for Play button)...")
-    while not template_visible(template, region):
-        check_abort()
-        time.sleep(0.5)
+    """Block until we're back on the character select screen."""
+    log("Waiting for character select screen...")
+    wait_for_scene("char_select", PLAY_BUTTON_TEMPLATE, PLAY_BUTTON_REGION)
     log("Character select screen detected.")
 
 
-def run_once(run_number: int):
-    """Execute one full Pindleskin farming run."""
+def recover() -> str:
+    """
+    Work out where we are after a failed state and return the state to
+    carry on from: back into a game from character select, Save and Exit
+    from anywhere in a game.  Keeps looking while the screen is unknown
+    (loading); the state's timeout bounds that.
+    """
+    while True:
+        scene = detect_scene()
+        log(f"Recovering — screen looks like: {scene or 'unknown'}")
+        if scene == "char_select":
+            return "enter_game"
+        if scene in ("menu", "death"):
+            backend.press("escape")   # close it; exit_game opens the menu itself
+            return "exit_game"
+        if scene in ("in_game", "town", "temple"):
+            return "exit_game"
+        safe_sleep(RECOVER_POLL)
+
+
+def _start_run(run_number: int) -> None:
+    global _run_started
     log(f"\n=== Run {run_number} ===")
+    _run_started = backend.now()
+    _run_stats.clear()
+    _run_phases.clear()
+    backend.input_stats.reset()
+    enter_game()
 
-    # Enter the game
-    log("Pressing Enter to confirm character...")
-    pyautogui.press("enter")
-    safe_sleep(STEP_DELAY)
-
-    # Select Hell difficulty
-    log("Pressing H for Hell difficulty...")
-    pyautogui.press("h")
-    pyautogui.moveTo(840, 525, duration=0.3)
-
-    # Wait until the loading screen finishes and we're standing in town
-    wait_for_game_load()
-
-    log("Summon a pal")
-    safe_sleep(0.1)
-    pyautogui.press("f8") # defiler
-    log("Cast the healing thinger")
-    safe_sleep(0.1)
-    pyautogui.press("f7") # healing hex thinger
 
+def _walk(run_number: int) -> None:
     walk_to_portal()
-
     safe_sleep(0.5)
 
-    blade_warp_to_pindleskin()
-
-    kill_pindleskin()
-
-    loot_items(run_number)
 
+def _exit(run_number: int) -> None:
+    health_armed(False)
     log("Waiting before next game...")
     safe_sleep(0.5)
-
     exit_game()
-
-
-def _load_run_count() -> int:
+    input_per_run.append(backend.input_stats.snapshot())
+    log(f"Input this run: {backend.input_stats.summary()}")
+
+
+def run_states() -> dict[str, State]:
+    """
+    One farming run as states.  Failing anything after the game has loaded
+    abandons the run with Save and Exit; failing the menus or a wait goes
+    through recover(), which looks at the screen first.
+    """
+    states = [
+        State("enter_game", _start_run, "game_load", 10, begins_run=True),
+        State("game_load", lambda run: wait_for_game_load(), "inventory", 45),
+        State("inventory", lambda run: check_inventory(), "buffs", 5, "exit_game"),
+        State("buffs", lambda run: cast_buffs(), "walk_to_portal", 5, "exit_game"),
+        State("walk_to_portal", _walk, "blade_warp", 30, "exit_game"),
+        State("blade_warp", lambda run: blade_warp_to_pindleskin(), "kill", 20, "exit_game"),
+        State("kill", lambda run: kill_pindleskin(), "loot", 20, "exit_game"),
+        State("loot", loot_items, "exit_game", 60, "exit_game", ends_run=True),
+        State("exit_game", _exit, "char_select", 10),
+        State("char_select", lambda run: wait_for_play_button(), "enter_game", 30),
+        State("recover", lambda run: recover(), None, 60),
+    ]
+    return {s.name: s for s in states}
+
+
+def warm_up() -> dict[str, float]:
+    """Load and exercise every detector once on a blank frame.
+
+    Runs while main() waits on the character select screen, so the first
+    loot frame never pays for imports, template loading or OpenCV's slow
+    first calls. Returns {stage: seconds}.
+    """
+    timings = {}
+
+    def stage(name, fn):
+        t0 = time.perf_counter()
+        fn()
+        timings[name] = time.perf_counter() - t0
+
+    # Small frame: big enough for every template, cheap to scan
+    frame = np.zeros((80, 240, 3), dtype=np.uint8)
+    strip = np.zeros((GAME_LOAD_REGION["height"], GAME_LOAD_REGION["width"], 3),
+                     dtype=np.uint8)
+
+    stage("ui templates", lambda: [ui_template(p) for p in
+                                   (GAME_LOAD_TEMPLATE, PLAY_BUTTON_TEMPLATE)])
+    stage("template match", lambda: cv2.matchTemplate(
+        strip, ui_template(GAME_LOAD_TEMPLATE), cv2.TM_CCOEFF_NORMED))
+    stage("scene classifier", lambda: scenes().classify(frame))
+    stage("town map", town_map)
+    if (tracker := aim_tracker()) is not None:
+        stage("aim tracker", lambda: tracker.update(
+            np.zeros((240, 240, 3), dtype=np.uint8), GAME_REGION))
+    stage("find_runes", lambda: find_runes.find_runes_img(frame))
+    stage("find_charms", lambda: find_charms.find_charms_img(frame))
+    stage("rune_names", lambda: rune_names.classify(frame, 150, 40))
+    stage("ocr_items", lambda: ocr_items.read_items_img(frame))
+    stage("screen capture", lambda: capture_region(
+        {"left": GAME_X, "top": GAME_Y, "width": 1, "height": 1}))
+
+    log("Warm-up: " + "  ".join(f"{k} {v * 1000:.0f}ms" for k, v in timings.items()))
+    return timings
+
+
+def run_machine(first_run: int, states: dict[str, State] | None = None) -> RunMachine:
+    """
+    A RunMachine over run_states() (or *states*), resuming from
+    STATE_HISTORY_FILE: after an interrupted session it keeps the run number
+    and starts by recovering, since the game may be on any screen.
+    """
+    global _machine
+    start = "enter_game"
+    last = resume_point(STATE_HISTORY_FILE)
+    if last is not None:
+        first_run = max(first_run, last["run"])
+        start = "recover"
+        log(f"Resuming at run {first_run} (last state: {last['state']} {last['outcome']})")
+    _machine = RunMachine(states or run_states(), start, first_run,
+                          clock=lambda: backend.monotonic(), now=lambda: backend.now(),
+                          history_path=STATE_HISTORY_FILE, fatal=(AbortBot,),
+                          next_run=lambda n: runs_db().claim_run())
+    return _machine
+
+
+def _phased(name: str, fn):
+    """*fn* timed under phase_times[name]."""
+    def timed(run_number):
+        with phase(name):
+            return fn(run_number)
+    return timed
+
+
+def run_session(first_run: int, max_runs: int | None = None):
+    """Play back-to-back games starting at *first_run* until aborted
+    (or until *max_runs* games have been played)."""
+    states = {name: replace(s, fn=_phased(name, s.fn)) for name, s in run_states().items()}
+    machine = run_machine(first_run, states)
+    t0 = backend.now()
     try:
-        with open(RUN_LOG) as f:
-            return sum(1 for _ in f)
-    except FileNotFoundError:
-        return 0
+        machine.run(max_runs)
+    finally:
+        log(machine.summary(backend.now() - t0))
 
 
 def main():
     print(f"Bot starting — move mouse left of x={ABORT_ZONE_X} at any time to stop.")
-    threading.Thread(target=_mouse_monitor, daemon=True).start()
+    if ASYNC_RUNTIME:
+        import runtime
+        session = runtime.run_session
+    else:
+        threading.Thread(target=_mouse_monitor, daemon=True).start()
+        session = run_session
+    warm = threading.Thread(target=warm_up, daemon=True)
+    warm.start()
     time.sleep(2)
-
-    run_number = _load_run_count() + 1
+    warm.join()
+
+    recorder = None
+    if RECORD_SESSION:
+        os.makedirs(SESSIONS_DIR, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        path = os.path.join(SESSIONS_DIR, f"session_{stamp}.session")
+        recorder = RecordingBackend(backend, path, GAME_REGION, fps=SESSION_FPS)
+        set_backend(recorder)
+        recorder.start()
+        print(f"Recording session to {path}")
+
+    health = start_health_watch()
     try:
-        while True:
-            run_once(run_number)
-            run_number += 1
-            wait_for_play_button()
+        session(runs_db().claim_run())
+    except InventoryFull as e:
+        print(f"\n[FULL] {e}")
+        print("Empty the inventory (or stash the loot) and start the bot again.")
     except AbortBot as e:
         print(f"\n[ABORTED] {e}")
         print("Bot stopped cleanly. Good luck with the runes!")
+        if action_lateness:
+            print("\nAction start times vs schedule:")
+            print(jitter_report(action_lateness))
+    except Stuck as e:
+        print(f"\n[STUCK] {e}")
+        print(f"Recovery kept failing — see {STATE_HISTORY_FILE}.")
+    finally:
+        if health is not None:
+            health.stop()
+            print(f"Health watcher: {health.report()}")
+        if recorder is not None:
+            recorder.close()
+            set_backend(recorder.inner)
+        if (report := close_artifacts()) is not None:
+            print(f"Artifact writer: {report}")
+        if SCREEN_ARCHIVE in _archive:
+            _archive.pop(SCREEN_ARCHIVE).close()
+        runs_db().close()
 
 
 if __name__ == "__main__":
-    main()
+    # Run the "bot" module itself rather than this __main__ copy of it, so
+    # runtime.py (which imports bot) shares the bot's state
+    import bot
+    bot.main()
@@ -0,0 +1,43 @@
+"""
+capture_boss.py
+
+One-time setup helper. Run this while standing next to Pindleskin in D2R
+(right after the last Blade Warp, before attacking) to capture him as a
+template used by the bot to keep its spells aimed at him.
+
+    python capture_boss.py
+
+Saves: templates/pindleskin.png
+"""
+
+import mss
+import numpy as np
+import cv2
+
+# Pindleskin usually stands around (1047, 536), the bot's old fixed aim point.
+# Tall crop to take in his whole body; the tracker searches 240x240 around it.
+CROP = {
+    "left":   1017,   # center_x 1047 - 30
+    "top":     491,   # center_y 536 - 45
+    "width":    60,
+    "height":   90,
+}
+
+OUTPUT = "templates/pindleskin.png"
+
+
+def main():
+    with mss.mss() as sct:
+        raw = sct.grab(CROP)
+        img = np.array(raw)[:, :, :3]
+
+    cv2.imwrite(OUTPUT, img)
+    print(f"Saved {OUTPUT}  ({img.shape[1]}x{img.shape[0]} px)")
+
+    cv2.imshow("Pindleskin template (press any key to close)", img)
+    cv2.waitKey(0)
+    cv2.destroyAllWindows()
+
+
+if __name__ == "__main__":
+    main()
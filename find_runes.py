@@ -18,6 +18,8 @@ import glob
 import numpy as np
 import os
 
+import template_bank
+
 TEMPLATE_PATH  = os.path.join(os.path.dirname(__file__), "templates", "words", "Rune.png")
 SAMPLES_DIR    = os.path.join(os.path.dirname(__file__), "samples")
 THRESHOLD      = 0.75  # match score below which we ignore results
@@ -54,10 +56,16 @@ def _load_template():
 
 _TEMPLATE, _MASK = None, None
 
+def _build_template():
+    tmpl, mask = _load_template()
+    return {"template": tmpl, "mask": mask}
+
 def _get_template():
     global _TEMPLATE, _MASK
     if _TEMPLATE is None:
-        _TEMPLATE, _MASK = _load_template()
+        entry = template_bank.cached("rune_word", [TEMPLATE_PATH, __file__],
+                                     _build_template)
+        _TEMPLATE, _MASK = entry["template"], entry["mask"]
     return _TEMPLATE, _MASK
 
 
@@ -0,0 +1,168 @@
+"""
+health_globe.py
+
+Reads our life from the health globe many times a second, so a fight that
+goes wrong ends with a quick Save and Exit (a "chicken") instead of a death.
+
+The globe is red liquid that drains from the top.  globe_fill() looks at
+a narrow strip down the middle of it (bot.HEALTH_REGION, ~16x110 pixels):
+a pixel is red when its red level is at least RED_MIN and RED_RATIO times
+its green and blue, a row is full when at least ROW_RED of it is red, and
+the raw fill is the share of full rows.  One boolean expression and two
+means over ~2k pixels — a few microseconds.  The raw fill is divided by
+that of the same strip of templates/health_globe.png (captured at full
+life, see capture_template.py), so the darker bottom of the globe still
+reads as 1.0.
+
+HealthWatcher samples the strip on its own thread at HZ and publishes
+
+    value   the latest fill (0-1), with .t its perf_counter() time
+    low     an Event, set as soon as a sample reads below the chicken level
+            while armed; on_low(fill) is called from the watcher thread
+
+It is armed only once in game (arm()); until a sample has shown the globe
+(above SEEN_FILL) nothing counts, so loading screens and character select
+never read as low life.  Each sample's cost goes into running totals
+(count, sum, max), so a session of any length holds a fixed few numbers;
+report() gives the achieved rate, the cost per sample and the share of one
+core used, against BUDGET.
+
+    watcher = HealthWatcher(grab, HEALTH_REGION, chicken=0.35, on_low=bot.chicken)
+    watcher.start(); watcher.arm()
+    ...
+    watcher.value, watcher.low.is_set()
+    watcher.stop(); print(watcher.report())
+"""
+
+import threading
+import time
+
+import numpy as np
+
+HZ        = 40      # samples per second
+RED_MIN   = 40      # minimum red level of globe pixels
+RED_RATIO = 1.8     # red must exceed green and blue by this factor
+ROW_RED   = 0.5     # share of a row that must be red for it to count as full
+SEEN_FILL = 0.5     # a sample this full shows the globe is on screen
+BUDGET    = 0.02    # share of one core the watcher may use
+
+
+def raw_fill(frame: np.ndarray) -> float:
+    """Share of the strip's rows that are globe red (BGR frame)."""
+    b, g, r = (frame[..., i].astype(np.int16) for i in range(3))
+    red = (r >= RED_MIN) & (r >= RED_RATIO * g) & (r >= RED_RATIO * b)
+    return float((red.mean(axis=1) >= ROW_RED).mean())
+
+
+def strip_of(template: np.ndarray, width: int) -> np.ndarray:
+    """The middle *width* columns of a full-globe capture."""
+    left = (template.shape[1] - width) // 2
+    return template[:, left:left + width]
+
+
+def globe_fill(frame: np.ndarray, full: float = 1.0) -> float:
+    """Life left, 0-1, from a strip of the globe; *full* is raw_fill() at full life."""
+    return min(1.0, raw_fill(frame) / full) if full > 0 else 0.0
+
+
+class HealthWatcher:
+    def __init__(self, grab, region: dict, chicken: float, full: float = 1.0,
+                 on_low=None, hz: float = HZ, clock=time.perf_counter):
+        self.grab = grab              # grab(region) -> BGR frame, safe to call off-thread
+        self.clock = clock
+        self.region = region
+        self.chicken = chicken
+        self.full = full
+        self.on_low = on_low
+        self.interval = 1.0 / hz
+        self.value = 1.0
+        self.t = 0.0
+        self.low = threading.Event()
+        self.samples = 0
+        self.cost = 0.0               # seconds over all samples (grab + read)
+        self.cost_max = 0.0           # seconds, the slowest sample
+        self.read = 0.0               # seconds over all globe_fill() calls alone
+        self._armed = False
+        self._seen = False
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._started = 0.0
+        self._stopped: float | None = None
+
+    # ── Arming ───────────────────────────────────────────────────────────────
+    def arm(self) -> None:
+        """Start watching for low life (we are in game)."""
+        self.low.clear()
+        self._seen = False
+        self._armed = True
+
+    def disarm(self) -> None:
+        """Stop reacting (leaving the game); sampling goes on."""
+        self._armed = False
+        self.low.clear()
+
+    # ── Sampling ─────────────────────────────────────────────────────────────
+    def sample(self) -> float:
+        """Grab and read the globe once; publish the value and react to it."""
+        t0 = self.clock()
+        frame = self.grab(self.region)
+        t1 = self.clock()
+        fill = globe_fill(frame, self.full)
+        t2 = self.clock()
+        self.value, self.t = fill, t2
+        self.samples += 1
+        self.cost += t2 - t0
+        self.cost_max = max(self.cost_max, t2 - t0)
+        self.read += t2 - t1
+        if self._armed:
+            if fill >= SEEN_FILL:
+                self._seen = True
+            elif self._seen and fill < self.chicken and not self.low.is_set():
+                self.low.set()
+                if self.on_low is not None:
+                    self.on_low(fill)
+        return fill
+
+    def _run(self) -> None:
+        deadline = self.clock()
+        while not self._stop.is_set():
+            self.sample()
+            deadline = max(deadline + self.interval, self.clock())
+            self._stop.wait(deadline - self.clock())
+
+    def start(self) -> "HealthWatcher":
+        self._stop.clear()
+        self._started, self._stopped = self.clock(), None
+        self._thread = threading.Thread(target=self._run, name="health", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._stopped = self.clock()
+
+    # ── Cost ─────────────────────────────────────────────────────────────────
+    def _elapsed(self) -> float:
+        if self._thread is None:   # sampled by hand: no idle time between samples
+            return self.cost
+        return (self._stopped or self.clock()) - self._started
+
+    def load(self) -> float:
+        """Share of one core spent sampling since start()."""
+        elapsed = self._elapsed()
+        return self.cost / elapsed if elapsed > 0 else 0.0
+
+    def report(self) -> str:
+        """Samples, achieved rate, cost per sample and core share against BUDGET."""
+        if not self.samples:
+            return "no samples"
+        elapsed = self._elapsed()
+        read_us = self.read / self.samples * 1e6
+        load = self.load()
+        verdict = "within" if load <= BUDGET else "OVER"
+        return (f"{self.samples} samples at {self.samples / elapsed:.1f} Hz, "
+                f"{self.cost / self.samples * 1000:.2f} ms mean / "
+                f"{self.cost_max * 1000:.2f} ms max per sample "
+                f"({read_us:.0f} us reading), {load:.1%} of a core ({verdict} {BUDGET:.0%} budget)")
@@ -0,0 +1,154 @@
+"""
+inventory.py
+
+Which inventory cells are taken, so the bot stops farming once nothing it
+wants can be picked up any more, instead of clicking loot that stays put.
+
+The inventory is a COLS x ROWS grid of equal cells.  occupancy() takes a
+grab of just that grid (bot.INVENTORY_REGION, inventory open) and decides
+every cell at once: the grab is reshaped to (row, col, pixel, pixel), each
+cell's inner part (INSET trimmed off, so grid lines do not count) is
+reduced to its mean and standard deviation of brightness, and a cell is
+taken when it is brighter than EMPTY_MEAN or busier than EMPTY_STD —
+empty cells are flat near-black.
+
+fit() decides which loot fits: labels are placed in order (the pickup
+route, most valuable first) at the first free block of their size, column
+by column as the game places picked items, using summed-area tables so
+each placement is one array expression.  Item sizes are (width, height)
+in cells, by name where it is known (SIZES) and by kind otherwise.
+
+The grid region and the EMPTY_* thresholds have to be checked against the
+real game before bot.USE_INVENTORY_CHECK is turned on: a misread grid
+either stops the bot (InventoryFull) or lets it click loot that cannot
+fit.  Capture the grid with the inventory open, write what it holds next
+to it, and test_inventory.py checks every such pair:
+
+    python inventory.py                     # samples/inventory/inventory_<time>.png
+    python inventory.py samples/inventory/*.png   # what occupancy() reads
+
+    samples/inventory/inventory_<time>.txt  # ROWS lines of COLS '#' / '.'
+
+    occ = occupancy(grab)                   # (ROWS, COLS) bool
+    free_cells(occ)                         # 37
+    take, skip, occ = fit(route, occ)
+"""
+
+import argparse
+import glob
+import os
+from datetime import datetime
+
+import numpy as np
+
+COLS, ROWS = 10, 4
+
+INSET      = 0.2    # share of a cell trimmed off each side before measuring
+EMPTY_MEAN = 45     # brightness (0-255) above which a cell is taken
+EMPTY_STD  = 14     # brightness spread above which a cell is taken
+
+# (width, height) in cells, by item base name or, failing that, label kind.
+# Unknown items are assumed to take one cell: worth the click, and a label
+# that does not go away is dropped after bot.PICKUP_ROUNDS.  A charm whose
+# name was not read (the template path) may be a Grand Charm, so it needs
+# the room of one.
+SIZES = {"Small Charm": (1, 1), "Large Charm": (1, 2), "Grand Charm": (1, 3)}
+KIND_SIZES = {"Rune": (1, 1), "Charm": (1, 3)}
+
+SAMPLES_DIR = os.path.join("samples", "inventory")
+
+
+def occupancy(grid: np.ndarray) -> np.ndarray:
+    """(ROWS, COLS) bool: which cells of a BGR grab of the grid hold an item."""
+    ch, cw = grid.shape[0] // ROWS, grid.shape[1] // COLS
+    gray = grid[:ch * ROWS, :cw * COLS].mean(axis=2, dtype=np.float32)
+    cells = gray.reshape(ROWS, ch, COLS, cw).transpose(0, 2, 1, 3)
+    my, mx = int(ch * INSET), int(cw * INSET)
+    inner = cells[:, :, my:ch - my, mx:cw - mx]
+    return (inner.mean(axis=(2, 3)) > EMPTY_MEAN) | (inner.std(axis=(2, 3)) > EMPTY_STD)
+
+
+def free_cells(occ: np.ndarray) -> int:
+    return int(occ.size - occ.sum())
+
+
+def size_of(kind: str, name: str = "") -> tuple[int, int]:
+    """(width, height) in cells of an item with label *kind* and *name*."""
+    for base, size in SIZES.items():
+        if base in name:
+            return size
+    return KIND_SIZES.get(kind, (1, 1))
+
+
+def free_blocks(occ: np.ndarray, w: int, h: int) -> np.ndarray:
+    """Bool (ROWS - h + 1, COLS - w + 1): top-left cells of the free w x h blocks."""
+    if h > occ.shape[0] or w > occ.shape[1]:
+        return np.zeros((0, 0), dtype=bool)
+    s = np.pad(occ.astype(np.int32).cumsum(axis=0).cumsum(axis=1), ((1, 0), (1, 0)))
+    taken = s[h:, w:] - s[:-h, w:] - s[h:, :-w] + s[:-h, :-w]
+    return taken == 0
+
+
+def place(occ: np.ndarray, w: int, h: int) -> np.ndarray | None:
+    """*occ* with a w x h item put in the first free block (by column), or None."""
+    cols, rows = np.nonzero(free_blocks(occ, w, h).T)
+    if not len(cols):
+        return None
+    out = occ.copy()
+    out[rows[0]:rows[0] + h, cols[0]:cols[0] + w] = True
+    return out
+
+
+def fit(targets, occ: np.ndarray) -> tuple[list, list, np.ndarray]:
+    """
+    Split *targets* (in pickup order) into those that fit and those that do
+    not, placing each that fits; also returns the occupancy after them all.
+    """
+    take, skip = [], []
+    for t in targets:
+        placed = place(occ, *size_of(t.kind, t.name))
+        if placed is None:
+            skip.append(t)
+        else:
+            take.append(t)
+            occ = placed
+    return take, skip, occ
+
+
+def report(occ: np.ndarray) -> str:
+    """Grid picture, '#' for taken cells, and the free count."""
+    rows = ["".join("#" if c else "." for c in row) for row in occ]
+    return f"{free_cells(occ)}/{occ.size} free  " + " ".join(rows)
+
+
+def parse_grid(text: str) -> np.ndarray:
+    """(ROWS, COLS) bool from ROWS lines of '#' (taken) and '.' (free)."""
+    return np.array([[c == "#" for c in line.strip()] for line in text.split()], dtype=bool)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Capture or read the inventory grid.")
+    parser.add_argument("paths", nargs="*", help="grid captures to read (default: capture one)")
+    args = parser.parse_args()
+
+    import cv2
+    if not args.paths:
+        import mss
+
+        import bot
+        os.makedirs(SAMPLES_DIR, exist_ok=True)
+        with mss.mss() as sct:
+            grid = np.array(sct.grab(bot.INVENTORY_REGION))[:, :, :3]
+        path = os.path.join(SAMPLES_DIR, f"inventory_{datetime.now():%Y%m%d_%H%M%S}.png")
+        cv2.imwrite(path, grid)
+        print(f"Saved {path}: write its cells to {os.path.splitext(path)[0]}.txt")
+        args.paths = [path]
+    for pattern in args.paths:
+        for path in sorted(glob.glob(pattern)):
+            occ = occupancy(cv2.imread(path))
+            print(f"{path}: {report(occ)}")
+
+
+if __name__ == "__main__":
+    main()
+
@@ -0,0 +1,255 @@
+"""
+item_trie.py
+
+Lexicon-constrained decoding of OCR lines against the known item names.
+
+Instead of committing to the single best letter per glyph and repairing the
+string afterwards, the OCR stage hands over the top-k letter candidates for
+every glyph position.  A beam search then walks a trie compiled from the
+item list, so only prefixes that can still become a real item name are ever
+expanded, and returns the best name together with a confidence score.
+
+Edit operations (all measured in "letters of cost")
+---------------------------------------------------
+- match      : glyph read as a candidate letter   cost = 1 - score
+- substitute : glyph read as some other letter    cost = SUB_COST
+- skip glyph : glyph is noise, not in the name    cost = SKIP_COST
+- skip letter: letter of the name never matched   cost = DEL_COST
+               (UNREADABLE_COST if there is no template for that letter)
+
+Names are compared compact and lower-case, like ocr_items._fuzzy_match.
+
+Usage
+-----
+    trie = ItemTrie(["Shael Rune", "Super Mana Potion", ...])
+    trie.decode([[("s", 0.9)], [("h", 0.8), ("b", 0.75)], ...])
+    # → Decoded(name='Shael Rune', confidence=0.87)
+"""
+
+import heapq
+from dataclasses import dataclass
+
+import numpy as np
+
+SUB_COST        = 1.0
+SKIP_COST       = 0.8
+DEL_COST        = 0.5    # unmatched glyphs are the most common OCR error
+UNREADABLE_COST = 0.25   # deleting a letter we have no template for
+BEAM_WIDTH      = 128
+MAX_GAP         = 3      # consecutive name letters that may go unmatched
+MAX_TAIL        = 8      # unmatched letters allowed at the end of a line
+MAX_COST_RATIO  = 0.55   # prune states costing more than this × name length
+
+_INF = float("inf")
+
+
+@dataclass(slots=True)
+class Decoded:
+    name: str
+    confidence: float
+
+
+def _compact(name: str) -> str:
+    return name.replace(" ", "").lower()
+
+
+class ItemTrie:
+    """Character trie over compact item names, stored as flat per-node lists."""
+
+    __slots__ = ("children", "names", "depth", "min_rest", "max_rest",
+                 "readable", "_edges", "_cap")
+
+    def __init__(self, names, readable=None):
+        """
+        names    : iterable of item names (display form).
+        readable : set of lower-case letters the OCR can actually produce;
+                   letters outside it are cheap to skip.  None = all letters.
+        """
+        self.children: list[dict[str, int]] = [{}]
+        self.names: list[str | None] = [None]
+        self.depth: list[int] = [0]
+        for name in names:
+            node = 0
+            for ch in _compact(name):
+                nxt = self.children[node].get(ch)
+                if nxt is None:
+                    nxt = len(self.children)
+                    self.children[node][ch] = nxt
+                    self.children.append({})
+                    self.names.append(None)
+                    self.depth.append(self.depth[node] + 1)
+                node = nxt
+            if self.names[node] is None:   # first listed spelling wins
+                self.names[node] = name
+        self.readable = readable
+        self._compute_rest_lengths()
+        self._compile()
+
+    # Serialization (for template_bank) ────────────────────────────────────
+    def to_arrays(self) -> dict[str, np.ndarray]:
+        """Flatten the trie into plain arrays; inverse of from_arrays()."""
+        edges = [(p, ch, c) for p, kids in enumerate(self.children)
+                 for ch, c in kids.items()]
+        return {
+            "edge_parent": np.array([e[0] for e in edges], dtype=np.int32),
+            "edge_char":   np.array([e[1] for e in edges], dtype="<U1"),
+            "edge_child":  np.array([e[2] for e in edges], dtype=np.int32),
+            "name_node":   np.array([i for i, n in enumerate(self.names) if n],
+                                    dtype=np.int32),
+            "name_text":   np.array([n for n in self.names if n], dtype=str),
+            "depth":       np.array(self.depth, dtype=np.int16),
+            "min_rest":    np.array(self.min_rest, dtype=np.int16),
+            "max_rest":    np.array(self.max_rest, dtype=np.int16),
+            "readable":    np.array(sorted(self.readable or ()), dtype="<U1"),
+            "all_readable": np.array(self.readable is None),
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays) -> "ItemTrie":
+        trie = cls.__new__(cls)
+        n = len(arrays["depth"])
+        trie.readable = (None if bool(arrays["all_readable"])
+                         else set(arrays["readable"].tolist()))
+        # Edges are stored grouped by parent, so each node's edges are a slice
+        parent = arrays["edge_parent"]
+        chars = arrays["edge_char"].tolist()
+        kids = arrays["edge_child"].tolist()
+        triples = list(zip(chars, kids, map(trie._del_cost, chars)))
+        bounds = np.searchsorted(parent, np.arange(n + 1)).tolist()
+        spans = list(zip(bounds[:-1], bounds[1:]))
+        trie.children = [dict(zip(chars[a:b], kids[a:b])) for a, b in spans]
+        trie._edges = [tuple(triples[a:b]) for a, b in spans]
+
+        trie.names = [None] * n
+        for node, name in zip(arrays["name_node"].tolist(),
+                              arrays["name_text"].tolist()):
+            trie.names[node] = name
+        trie.depth = arrays["depth"].tolist()
+        trie.min_rest = arrays["min_rest"].tolist()
+        trie.max_rest = arrays["max_rest"].tolist()
+        trie._cap = (MAX_COST_RATIO * (arrays["depth"].astype(np.float64)
+                                       + arrays["max_rest"])).tolist()
+        return trie
+
+    # Search tables ────────────────────────────────────────────────────────
+    def _compute_rest_lengths(self):
+        """Min / max number of letters from each node to a complete name."""
+        n = len(self.children)
+        self.min_rest = [0] * n
+        self.max_rest = [0] * n
+        # Children always have larger ids than their parent, so a reverse
+        # sweep visits every node after all of its descendants.
+        for node in range(n - 1, -1, -1):
+            kids = self.children[node].values()
+            if self.names[node] is None and kids:
+                self.min_rest[node] = 1 + min(self.min_rest[k] for k in kids)
+            self.max_rest[node] = max((1 + self.max_rest[k] for k in kids), default=0)
+
+    def _compile(self):
+        """Precompute per-node search tables used by decode()."""
+        n = len(self.children)
+        # (char, child, cost of skipping char) per node
+        self._edges = [
+            tuple((ch, child, self._del_cost(ch)) for ch, child in kids.items())
+            for kids in self.children
+        ]
+        # Cost ceiling for the longest name reachable through each node
+        self._cap = [MAX_COST_RATIO * (self.depth[i] + self.max_rest[i])
+                     for i in range(n)]
+
+    def _del_cost(self, ch):
+        if self.readable is not None and ch not in self.readable:
+            return UNREADABLE_COST
+        return DEL_COST
+
+    def _with_deletions(self, beam, floor, max_gap):
+        """Extend *beam* with up to *max_gap* consecutive skipped name letters.
+
+        States whose cost exceeds their budget (max of *floor* and the node's
+        own cap) are dropped.
+        """
+        edges, cap = self._edges, self._cap
+        out = dict(beam)
+        frontier = beam
+        for _ in range(max_gap):
+            grown = {}
+            for node, cost in frontier.items():
+                for _, child, dc in edges[node]:
+                    c = cost + dc
+                    if c <= floor or c <= cap[child]:
+                        if c < out.get(child, _INF):
+                            out[child] = grown[child] = c
+            if not grown:
+                break
+            frontier = grown
+        return out
+
+    def decode(self, positions, beam_width=BEAM_WIDTH):
+        """
+        Decode a line of glyph candidates into the best matching item name.
+
+        positions : list (left to right) of candidate lists [(char, score), ...]
+                    for each glyph; scores in 0-1, higher = better.
+
+        Returns a Decoded, or None if no name fits within the cost budget.
+        """
+        cands = []
+        for pos in positions:
+            best_by_char: dict[str, float] = {}
+            for ch, score in pos:
+                ch = ch.lower()
+                if score > best_by_char.get(ch, 0.0):
+                    best_by_char[ch] = score
+            cands.append(best_by_char)
+        n = len(cands)
+        if n == 0:
+            return None
+
+        edges, cap = self._edges, self._cap
+        min_rest, max_rest = self.min_rest, self.max_rest
+        floor = MAX_COST_RATIO * n
+        cheapest_del = min(DEL_COST, UNREADABLE_COST)
+
+        beam = {0: 0.0}
+        for i, pos in enumerate(cands):
+            beam = self._with_deletions(beam, floor, MAX_GAP)
+            remaining = n - i - 1
+            nxt: dict[int, float] = {}
+            for node, cost in beam.items():
+                # Glyph is noise — stay on the same node
+                c = cost + SKIP_COST
+                if c < nxt.get(node, _INF):
+                    nxt[node] = c
+                for ch, child, _ in edges[node]:
+                    score = pos.get(ch)
+                    c = cost + (1.0 - score if score is not None else SUB_COST)
+                    if c < nxt.get(child, _INF):
+                        nxt[child] = c
+
+            # Prune prefixes that cannot finish within budget, keep the best
+            ranked = []
+            for node, c in nxt.items():
+                short = min_rest[node] - remaining
+                if short > 0:
+                    bound = c + short * cheapest_del
+                else:
+                    bound = c + max(0, remaining - max_rest[node]) * SKIP_COST
+                if bound <= floor or bound <= cap[node]:
+                    ranked.append((bound, node, c))
+            if not ranked:
+                return None
+            beam = {node: c for _, node, c in heapq.nsmallest(beam_width, ranked)}
+
+        # Trailing name letters that were never seen
+        beam = self._with_deletions(beam, floor, MAX_TAIL)
+
+        best = None
+        for node, cost in beam.items():
+            name = self.names[node]
+            if name is None:
+                continue
+            length = max(self.depth[node], n)
+            conf = max(0.0, 1.0 - cost / length)
+            if best is None or conf > best.confidence:
+                best = Decoded(name, conf)
+        return best
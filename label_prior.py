@@ -0,0 +1,218 @@
+"""
+label_prior.py
+
+Where item labels show up in the loot crop, learned from past runs, so the
+detectors look there first.
+
+Pindleskin dies in about the same spot every game, so his loot labels land
+in the same part of the LOOT_* crop.  LabelPrior keeps a heatmap of label
+centres over TILE-pixel tiles (each label also counts towards the tiles
+around it, SPREAD deep).  regions() picks the hottest tiles until they hold
+COVERAGE of all labels seen, merges them into a few rectangles and widens
+those by MARGIN so a label straddling a tile edge still matches.  search()
+runs a detector on just those rectangles.
+
+The rest of the crop is searched only when it is needed to keep the prior
+honest: while it has seen fewer than MIN_LABELS labels, and on every
+AUDIT_EVERY-th run — otherwise a label that lands somewhere new would
+never be found, and so never learned.
+
+Every run adds its labels (add()), so the heatmap follows the data as runs
+come in; bot.py saves it after each run.  Seed it from the screenshots of
+earlier runs with:
+
+    python label_prior.py                    # screen_archive/ and screens_from_runs/, OCR'd
+    python label_prior.py some/dir a.png     # or these (archives, dirs or PNGs)
+"""
+
+import argparse
+import dataclasses
+import glob
+import json
+import os
+
+import numpy as np
+
+TILE        = 32      # heatmap cell, crop pixels
+SPREAD      = 1       # tiles either side a label also counts towards
+COVERAGE    = 0.995   # share of seen labels the searched tiles must hold
+MIN_LABELS  = 50      # labels seen before the prior is trusted
+AUDIT_EVERY = 20      # every Nth run searches the whole crop
+MARGIN      = 24      # pixels each hot rectangle is widened by
+DEDUPE_DIST = 8       # hits this close (from overlapping rectangles) are one
+
+
+def _shifted(hit, dx: int, dy: int):
+    """*hit* — an (x, y) tuple or anything with .x/.y — moved by (dx, dy)."""
+    if isinstance(hit, tuple):
+        return (hit[0] + dx, hit[1] + dy)
+    return dataclasses.replace(hit, x=hit.x + dx, y=hit.y + dy)
+
+
+def _xy(hit) -> tuple[int, int]:
+    return hit if isinstance(hit, tuple) else (hit.x, hit.y)
+
+
+class LabelPrior:
+    def __init__(self, shape: tuple[int, int], tile: int = TILE):
+        self.shape = shape   # (height, width) of the loot crop
+        self.tile = tile
+        self.counts = np.zeros((-(-shape[0] // tile), -(-shape[1] // tile)))
+        self.labels = 0
+        self.runs = 0
+        self.sources: set[str] = set()   # screenshots already added
+
+    # ── Persistence ──────────────────────────────────────────────────────────
+    @classmethod
+    def load(cls, path: str, shape: tuple[int, int]) -> "LabelPrior":
+        """The prior saved at *path*, or an empty one (missing, or another crop size)."""
+        prior = cls(shape)
+        try:
+            data = np.load(path)
+            meta = json.loads(str(data["meta"]))
+        except (OSError, KeyError, ValueError):
+            return prior
+        if tuple(meta["shape"]) != tuple(shape) or meta["tile"] != prior.tile:
+            return prior
+        prior.counts = data["counts"].astype(np.float64)
+        prior.labels, prior.runs = meta["labels"], meta["runs"]
+        prior.sources = set(meta["sources"])
+        return prior
+
+    def save(self, path: str) -> None:
+        meta = {"shape": list(self.shape), "tile": self.tile, "labels": self.labels,
+                "runs": self.runs, "sources": sorted(self.sources)}
+        with open(path, "wb") as f:
+            np.savez(f, counts=self.counts, meta=json.dumps(meta))
+
+    # ── Learning ─────────────────────────────────────────────────────────────
+    def add(self, hits, source: str | None = None) -> None:
+        """Count one run's label centres (crop pixels)."""
+        rows, cols = self.counts.shape
+        for hit in hits:
+            x, y = _xy(hit)
+            r, c = int(y) // self.tile, int(x) // self.tile
+            self.counts[max(0, r - SPREAD):min(rows, r + SPREAD + 1),
+                        max(0, c - SPREAD):min(cols, c + SPREAD + 1)] += 1
+            self.labels += 1
+        self.runs += 1
+        if source is not None:
+            self.sources.add(source)
+
+    @property
+    def trusted(self) -> bool:
+        return self.labels >= MIN_LABELS
+
+    def audit_due(self) -> bool:
+        """Whether this run should search the whole crop."""
+        return not self.trusted or self.runs % AUDIT_EVERY == 0
+
+    # ── Searching ────────────────────────────────────────────────────────────
+    def hot_tiles(self, coverage: float = COVERAGE) -> np.ndarray:
+        """Boolean tile mask: the fewest hottest tiles holding *coverage* of the counts."""
+        flat = self.counts.ravel()
+        order = np.argsort(-flat, kind="stable")
+        cum = np.cumsum(flat[order])
+        n = int(np.searchsorted(cum, coverage * cum[-1])) + 1 if cum[-1] else 0
+        mask = np.zeros(flat.shape, dtype=bool)
+        mask[order[:n]] = True
+        return mask.reshape(self.counts.shape)
+
+    def regions(self, coverage: float = COVERAGE) -> list[dict]:
+        """
+        Rectangles (crop pixels) to search: per tile row, the span of its hot
+        tiles; rows with the same span merged; each widened by MARGIN.
+        """
+        h, w = self.shape
+        spans = []   # [first row, last row, first col, last col]
+        for r, row in enumerate(self.hot_tiles(coverage)):
+            cols = np.flatnonzero(row)
+            if not len(cols):
+                continue
+            c0, c1 = int(cols[0]), int(cols[-1])
+            if spans and spans[-1][1] == r - 1 and spans[-1][2:] == [c0, c1]:
+                spans[-1][1] = r
+            else:
+                spans.append([r, r, c0, c1])
+        rects = []
+        for r0, r1, c0, c1 in spans:
+            left = max(0, c0 * self.tile - MARGIN)
+            top = max(0, r0 * self.tile - MARGIN)
+            right = min(w, (c1 + 1) * self.tile + MARGIN)
+            bottom = min(h, (r1 + 1) * self.tile + MARGIN)
+            rects.append({"left": left, "top": top,
+                          "width": right - left, "height": bottom - top})
+        return rects
+
+    def search(self, img: np.ndarray, detect, full: bool = False) -> list:
+        """
+        detect(img) restricted to regions() (the whole image if *full* or
+        the prior is not trusted yet), hits mapped back to *img* pixels.
+        """
+        if full or not self.trusted:
+            return detect(img)
+        hits = []
+        for r in self.regions():
+            sub = img[r["top"]:r["top"] + r["height"], r["left"]:r["left"] + r["width"]]
+            for hit in detect(sub):
+                hit = _shifted(hit, r["left"], r["top"])
+                x, y = _xy(hit)
+                if all(abs(x - hx) > DEDUPE_DIST or abs(y - hy) > DEDUPE_DIST
+                       for hx, hy in map(_xy, hits)):
+                    hits.append(hit)
+        return hits
+
+    def report(self) -> str:
+        searched = sum(r["width"] * r["height"] for r in self.regions())
+        share = searched / (self.shape[0] * self.shape[1])
+        return (f"{self.labels} labels over {self.runs} runs; "
+                f"hot regions cover {share:.0%} of the crop")
+
+
+def main():
+    import cv2
+
+    import bot
+    import ocr_items
+    import screen_archive
+
+    parser = argparse.ArgumentParser(description="Build / update the loot label prior.")
+    parser.add_argument("paths", nargs="*", default=[bot.SCREEN_ARCHIVE, bot.SCREENS_DIR],
+                        help="screenshot archives, loot screenshots or dirs "
+                             "(default: %(default)s)")
+    parser.add_argument("-o", "--output", default=bot.LABEL_PRIOR_FILE)
+    args = parser.parse_args()
+
+    def screenshots():
+        """(key, loader) per screenshot; a run's key is the same in an archive and as a PNG."""
+        files = []
+        for p in args.paths:
+            if screen_archive.is_archive(p):
+                archive = screen_archive.ScreenArchive(p)
+                for ref in archive.refs:
+                    yield f"{ref.name}.png", lambda d=ref.digest: archive.get(d)
+                archive.close()
+            elif os.path.isdir(p):
+                files += glob.glob(os.path.join(p, "**", "*.png"), recursive=True)
+            else:
+                files += glob.glob(p)
+        for f in sorted(files):
+            yield os.path.basename(f), lambda f=f: cv2.imread(f)
+
+    shape = (bot.LOOT_HEIGHT, bot.LOOT_WIDTH)
+    prior = LabelPrior.load(args.output, shape)
+    added = 0
+    for key, load in screenshots():
+        if key in prior.sources:   # found_runes/ keeps a copy of the same run
+            continue
+        img = load()
+        if img is None or img.shape[:2] != shape:
+            continue
+        prior.add(ocr_items.read_items_img(img), source=key)
+        added += 1
+    prior.save(args.output)
+    print(f"Added {added} screenshots → {args.output}: {prior.report()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""
+lazy_import.py
+
+Deferred imports for the heavy modules (cv2, mss, pyautogui, the detectors).
+
+    cv2 = lazy_import("cv2")
+
+returns a module object straight away; the real import runs the first time
+an attribute is touched.  Scripts can then load in a few milliseconds and
+only pay for what they actually use — and modules that need a display
+(pyautogui, mss) can be imported on a headless machine as long as nothing
+calls into them.
+
+Measure with:
+    python -X importtime bot.py 2> importtime.log
+    python startup_profile.py
+"""
+
+import importlib.util
+import sys
+
+
+def lazy_import(name: str):
+    """Return module *name*, deferring its execution until first attribute access."""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
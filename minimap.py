@@ -0,0 +1,257 @@
+"""
+minimap.py
+
+Localization on the minimap, so the walk to the Anya portal can steer by
+where we actually are instead of replaying fixed screen clicks.
+
+A reference map of Harrogath (templates/harrogath.npz) holds
+
+    map     grayscale minimap overlay stitched from one recorded walk
+    nodes   (N, 2) map positions along that walk (x, y)
+    edges   (M, 2) node index pairs: consecutive nodes, plus any two nodes
+            within LINK_DIST of each other (where the walk doubled back)
+    portal  index of the node where the walk entered the portal
+
+Every tick the bot grabs the minimap overlay (bot.MINIMAP_REGION) and
+Localizer.locate() finds it in the reference map by normalised correlation,
+searching SEARCH_RADIUS pixels around the last fix (the whole map for the
+first one, or when that fails).  The overlay is centred on the player, so the match centre is
+our position.  Shortest paths to the portal are precomputed over the node
+graph once (Dijkstra from the portal), and next_target() returns the
+furthest node along ours that is still within CLICK_REACH — the next
+thing to click towards.
+
+Build the reference map from a recorded session (RECORD_SESSION in bot.py);
+the walk is the stretch between the last buff key (F7) and the first Blade
+Warp (S):
+
+    python minimap.py sessions/session_x.session
+"""
+
+import argparse
+import heapq
+
+import cv2
+import numpy as np
+
+MAP_PATH = "templates/harrogath.npz"
+
+SEARCH_RADIUS = 60    # map pixels searched around the last fix
+MATCH_MIN     = 0.5   # correlation that counts as a fix
+CLICK_REACH   = 40    # furthest node ahead to steer towards, map pixels
+NODE_SPACING  = 6     # map pixels between path nodes
+LINK_DIST     = 10    # nodes this close are linked even if not consecutive
+CANVAS        = 2000  # stitching canvas size, map pixels
+
+
+def to_gray(frame: np.ndarray) -> np.ndarray:
+    return frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+
+def _best_match(image: np.ndarray, patch: np.ndarray) -> tuple[tuple[int, int], float]:
+    """Top-left of *patch*'s best match in *image* and its score."""
+    _, score, _, loc = cv2.minMaxLoc(cv2.matchTemplate(image, patch, cv2.TM_CCOEFF_NORMED))
+    return loc, score
+
+
+class Localizer:
+    def __init__(self, ref_map: np.ndarray, nodes: np.ndarray, edges: np.ndarray,
+                 portal: int):
+        self.map = ref_map
+        self.nodes = np.asarray(nodes, dtype=np.float64)
+        self.portal = portal
+        self.pos: tuple[int, int] | None = None
+        self.score = 0.0
+        self.dist, self.next_hop = self._shortest_paths(edges)
+
+    @classmethod
+    def load(cls, path: str = MAP_PATH) -> "Localizer":
+        data = np.load(path)
+        return cls(data["map"], data["nodes"], data["edges"], int(data["portal"]))
+
+    def _shortest_paths(self, edges) -> tuple[np.ndarray, np.ndarray]:
+        """Distance to the portal and the next node towards it, for every node."""
+        n = len(self.nodes)
+        adj: list[list[int]] = [[] for _ in range(n)]
+        for a, b in edges:
+            adj[a].append(b)
+            adj[b].append(a)
+        dist = np.full(n, np.inf)
+        next_hop = np.full(n, -1)
+        dist[self.portal] = 0.0
+        heap = [(0.0, self.portal)]
+        while heap:
+            d, u = heapq.heappop(heap)
+            if d > dist[u]:
+                continue
+            for v in adj[u]:
+                nd = d + float(np.hypot(*(self.nodes[u] - self.nodes[v])))
+                if nd < dist[v]:
+                    dist[v] = nd
+                    next_hop[v] = u
+                    heapq.heappush(heap, (nd, v))
+        return dist, next_hop
+
+    # ── Localization ─────────────────────────────────────────────────────────
+    def locate(self, minimap: np.ndarray) -> tuple[int, int] | None:
+        """
+        Our map position from a minimap grab, searched near the last fix and
+        then, failing that, over the whole map (None if it cannot be placed).
+        """
+        patch = to_gray(minimap)
+        ph, pw = patch.shape
+        if self.pos is not None:
+            x0 = max(0, self.pos[0] - pw // 2 - SEARCH_RADIUS)
+            y0 = max(0, self.pos[1] - ph // 2 - SEARCH_RADIUS)
+            window = self.map[y0:y0 + ph + 2 * SEARCH_RADIUS, x0:x0 + pw + 2 * SEARCH_RADIUS]
+            if self._place(window, patch, x0, y0):
+                return self.pos
+        if self._place(self.map, patch, 0, 0):
+            return self.pos
+        return None
+
+    def _place(self, window: np.ndarray, patch: np.ndarray, x0: int, y0: int) -> bool:
+        ph, pw = patch.shape
+        if window.shape[0] < ph or window.shape[1] < pw:
+            return False
+        (x, y), self.score = _best_match(window, patch)
+        if self.score < MATCH_MIN:
+            return False
+        self.pos = (x0 + x + pw // 2, y0 + y + ph // 2)
+        return True
+
+    # ── Planning ─────────────────────────────────────────────────────────────
+    def nearest_node(self, pos) -> int:
+        reachable = np.isfinite(self.dist)
+        d = np.hypot(*(self.nodes - pos).T)
+        d[~reachable] = np.inf
+        return int(d.argmin())
+
+    def route(self, pos) -> list[int]:
+        """Nodes from the one nearest *pos* to the portal, along the shortest path."""
+        node = self.nearest_node(pos)
+        path = [node]
+        while node != self.portal and self.next_hop[node] >= 0:
+            node = int(self.next_hop[node])
+            path.append(node)
+        return path
+
+    def next_target(self, pos) -> tuple[float, float]:
+        """Map point to head for: the furthest route node within CLICK_REACH."""
+        route = self.route(pos)
+        target = self.nodes[route[0]]
+        for node in route:
+            if np.hypot(*(self.nodes[node] - pos)) > CLICK_REACH:
+                break
+            target = self.nodes[node]
+        return float(target[0]), float(target[1])
+
+    def to_portal(self, pos) -> float:
+        """Map distance left to the portal from *pos*."""
+        node = self.nearest_node(pos)
+        return float(np.hypot(*(self.nodes[node] - pos)) + self.dist[node])
+
+
+# ── Building the reference map ────────────────────────────────────────────────
+def stitch(frames) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Stitch consecutive minimap grabs into one map.  Each grab is placed by
+    matching its centre half against what is stitched so far, near the last
+    placement.  Returns (map, player position per placed grab).
+    """
+    canvas = np.zeros((CANVAS, CANVAS), dtype=np.uint8)
+    positions = []
+    last = None
+    for frame in frames:
+        gray = to_gray(frame)
+        h, w = gray.shape
+        if last is None:
+            left, top = (CANVAS - w) // 2, (CANVAS - h) // 2
+        else:
+            qh, qw = h // 4, w // 4
+            patch = gray[qh:h - qh, qw:w - qw]
+            x0, y0 = max(0, last[0] - SEARCH_RADIUS), max(0, last[1] - SEARCH_RADIUS)
+            window = canvas[y0:y0 + h + 2 * SEARCH_RADIUS, x0:x0 + w + 2 * SEARCH_RADIUS]
+            (x, y), score = _best_match(window, patch)
+            if score < MATCH_MIN:
+                continue
+            left, top = x0 + x - qw, y0 + y - qh
+        region = canvas[top:top + h, left:left + w]
+        np.maximum(region, gray, out=region)
+        last = (left, top)
+        positions.append((left + w // 2, top + h // 2))
+    if not positions:
+        raise ValueError("no minimap frames to stitch")
+    ys, xs = np.nonzero(canvas)
+    x0, y0 = xs.min(), ys.min()
+    ref = canvas[y0:ys.max() + 1, x0:xs.max() + 1].copy()
+    return ref, np.asarray(positions) - (x0, y0)
+
+
+def path_graph(positions: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Nodes every NODE_SPACING pixels along the walk, and the edges between them."""
+    nodes = [positions[0]]
+    for p in positions[1:]:
+        if np.hypot(*(p - nodes[-1])) >= NODE_SPACING:
+            nodes.append(p)
+    nodes = np.asarray(nodes)
+    edges = [(i, i + 1) for i in range(len(nodes) - 1)]
+    for i in range(len(nodes)):
+        for j in range(i + 2, len(nodes)):
+            if np.hypot(*(nodes[i] - nodes[j])) <= LINK_DIST:
+                edges.append((i, j))
+    return nodes, np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+
+
+def build(frames, path: str = MAP_PATH) -> Localizer:
+    """Stitch *frames* (one walk to the portal) and save the reference map."""
+    ref, positions = stitch(frames)
+    nodes, edges = path_graph(positions)
+    portal = len(nodes) - 1
+    np.savez(path, map=ref, nodes=nodes, edges=edges, portal=portal)
+    return Localizer(ref, nodes, edges, portal)
+
+
+def session_walk_frames(path: str, region: dict) -> list[np.ndarray]:
+    """Minimap crops of a recorded session's walk (last F7 to first S press)."""
+    from session_store import SessionReader
+
+    session = SessionReader(path)
+    origin = session.meta.get("region", {"left": 0, "top": 0})
+    left, top = region["left"] - origin["left"], region["top"] - origin["top"]
+    start = end = None
+    for t, kind, args in session.events:
+        if kind != "press":
+            continue
+        if args[0] == "f7":
+            start = t
+        elif args[0] == "s" and start is not None:
+            end = t
+            break
+    if start is None or end is None:
+        session.close()
+        raise ValueError(f"{path}: no walk (F7 ... S) in this session")
+    frames = []
+    for i in range(session.index_at(start), session.index_at(end) + 1):
+        img = session.frame(i)
+        frames.append(img[top:top + region["height"], left:left + region["width"]])
+    session.close()
+    return frames
+
+
+def main():
+    import bot
+
+    parser = argparse.ArgumentParser(description="Build the Harrogath minimap reference.")
+    parser.add_argument("session", help="recorded .session containing a walk to the portal")
+    parser.add_argument("-o", "--output", default=MAP_PATH)
+    args = parser.parse_args()
+
+    frames = session_walk_frames(args.session, bot.MINIMAP_REGION)
+    loc = build(frames, args.output)
+    print(f"Saved {args.output}  (map {loc.map.shape[1]}x{loc.map.shape[0]}, "
+          f"{len(loc.nodes)} nodes, {loc.dist[0]:.0f} px to the portal)")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,27 +9,31 @@ Approach
 1. For each D2R text colour, build an HSV binary mask.
 2. Slide each letter template over the mask to find character matches.
 3. Group matched characters into lines and words by position.
-4. Fuzzy-match the raw OCR text against a known D2 item list using
-   Levenshtein distance to correct OCR errors.
+4. Decode each line against a trie of known D2 item names, keeping the
+   top-k letter candidates per glyph (see item_trie.py); fall back to
+   fuzzy-matching the raw OCR text when the decoder is not confident.
 5. Map the text colour to a classification and return Item objects.
 """
 
 import cv2
 import numpy as np
 import os
-from collections import Counter
 from dataclasses import dataclass
 
+import template_bank
+from item_trie import ItemTrie
+
 # ───────────────────────────────────────────────────────────
 # Public types
 # ───────────────────────────────────────────────────────────
 
-@dataclass
+@dataclass(slots=True)
 class Item:
     name: str
     classification: str
     x: int = 0
     y: int = 0
+    confidence: float = 0.0   # lexicon-decoder confidence; 0 for fuzzy fallback
 
 # ───────────────────────────────────────────────────────────
 # Colour definitions (OpenCV HSV)
@@ -55,6 +59,55 @@ COLOR_TO_CLASS = {
     "gold":   "Unique",
 }
 
+# Colour code (index) → colour name, as stored in HIT_DTYPE["color"]
+COLOR_NAMES = tuple(ITEM_COLORS)
+
+# ───────────────────────────────────────────────────────────
+# Character hits
+#
+# Every matched letter is one record of a NumPy structured array, so the
+# grouping stages below can sort and split thousands of hits with a few
+# vectorized passes instead of Python loops over tuples.  Characters and
+# colours are stored as small integer codes; see char_of() / COLOR_NAMES.
+#
+# "alt" / "alt_score" keep the TOP_K best distinct letters seen at the hit's
+# position (slot 0 is the hit itself, the rest come from hits it suppressed)
+# for the lexicon decoder.  Unused slots hold NO_CHAR.
+# ───────────────────────────────────────────────────────────
+
+TOP_K   = 3
+NO_CHAR = 255
+
+HIT_DTYPE = np.dtype([
+    ("x",         np.int32),
+    ("y",         np.int32),
+    ("w",         np.int16),
+    ("h",         np.int16),
+    ("char",      np.uint8),
+    ("score",     np.float32),
+    ("color",     np.uint8),
+    ("alt",       np.uint8,   (TOP_K,)),
+    ("alt_score", np.float32, (TOP_K,)),
+])
+
+_char_table: list[str] = []       # code → character
+_char_codes: dict[str, int] = {}  # character → code
+
+def _char_code(char):
+    """Return the integer code for *char*, assigning a new one if unseen."""
+    code = _char_codes.get(char)
+    if code is None:
+        code = _char_codes[char] = len(_char_table)
+        _char_table.append(char)
+    return code
+
+def char_of(code):
+    """Return the character for an integer char code."""
+    return _char_table[code]
+
+def _empty_hits():
+    return np.empty(0, dtype=HIT_DTYPE)
+
 # ───────────────────────────────────────────────────────────
 # Letter template loading
 # ───────────────────────────────────────────────────────────
@@ -81,10 +134,19 @@ def _load_templates():
                 all_tmpls.append((name, tmpl_bin))
     return all_tmpls
 
+def _template_sources():
+    dirs = [os.path.join(_TEMPLATE_DIR, d) for d in ("lower", "upper")]
+    return template_bank.png_sources(*dirs) + [__file__]
+
 def _get_templates():
     global _templates
     if _templates is None:
-        _templates = _load_templates()
+        entry = template_bank.cached(
+            "ocr_letters", _template_sources(),
+            lambda: template_bank.pack_images(_load_templates()))
+        _templates = template_bank.unpack_images(entry)
+        for name, _ in _templates:
+            _char_code(name)
     return _templates
 
 # ───────────────────────────────────────────────────────────
@@ -97,68 +159,102 @@ MATCH_THRESHOLD = 0.70
 # These are matched last and only in positions not already claimed.
 DEFERRED_CHARS = {"i", "l"}
 
+def _match_templates(mask, templates):
+    """Match each template over *mask*; return all hits above threshold."""
+    parts = []
+    for char, tmpl in templates:
+        th, tw = tmpl.shape[:2]
+        if th > mask.shape[0] or tw > mask.shape[1]:
+            continue
+        result = cv2.matchTemplate(mask, tmpl, cv2.TM_CCOEFF_NORMED)
+        ys, xs = np.nonzero(result >= MATCH_THRESHOLD)
+        if len(xs) == 0:
+            continue
+        hits = np.zeros(len(xs), dtype=HIT_DTYPE)
+        hits["x"], hits["y"] = xs, ys
+        hits["w"], hits["h"] = tw, th
+        hits["char"] = _char_code(char)
+        hits["score"] = result[ys, xs]
+        hits["alt"] = NO_CHAR
+        hits["alt"][:, 0] = hits["char"]
+        hits["alt_score"][:, 0] = hits["score"]
+        parts.append(hits)
+    return np.concatenate(parts) if parts else _empty_hits()
+
+def _suppress(hits, kept):
+    """Greedy non-max suppression of *hits* against the already *kept* hits.
+
+    Hits are visited best-score first; one is kept unless its centre lies
+    within half a glyph of a kept hit's centre.  Returns (kept, suppressed,
+    owner): the kept array (old kept hits first, then the newly accepted ones
+    in score order), the suppressed hits, and for each suppressed hit the
+    index in *kept* of the hit that suppressed it.
+    """
+    hits = hits[np.argsort(-hits["score"], kind="stable")]
+    n_old = len(kept)
+    out = np.concatenate([kept, hits])
+    cx = out["x"] + out["w"] // 2
+    cy = out["y"] + out["h"] // 2
+    w = out["w"].astype(np.int32)
+    h = out["h"].astype(np.int32)
+
+    keep = np.zeros(len(out), dtype=bool)
+    keep[:n_old] = True
+    owner = np.full(len(out), -1, dtype=np.intp)
+    kept_idx = list(range(n_old))
+    for i in range(n_old, len(out)):
+        k = np.asarray(kept_idx, dtype=np.intp)
+        overlap = ((np.abs(cx[i] - cx[k]) < np.maximum(w[i], w[k]) * 0.5) &
+                   (np.abs(cy[i] - cy[k]) < np.maximum(h[i], h[k]) * 0.5))
+        if overlap.any():
+            owner[i] = k[np.argmax(overlap)]
+        else:
+            keep[i] = True
+            kept_idx.append(i)
+    new_index = np.cumsum(keep) - 1
+    return out[keep], out[~keep], new_index[owner[~keep]]
+
+def _attach_alternatives(kept, suppressed, owner):
+    """Fill kept["alt"][:, 1:] with the best other letters each hit suppressed."""
+    if len(suppressed) == 0:
+        return
+    # Best score per (owner, char), excluding the owner's own letter
+    order = np.lexsort((-suppressed["score"], suppressed["char"], owner))
+    o = owner[order]
+    c = suppressed["char"][order]
+    s = suppressed["score"][order]
+    first = np.ones(len(o), dtype=bool)
+    first[1:] = (o[1:] != o[:-1]) | (c[1:] != c[:-1])
+    first &= c != kept["char"][o]
+    o, c, s = o[first], c[first], s[first]
+
+    # Rank within each owner by score and keep the top TOP_K - 1
+    order = np.lexsort((-s, o))
+    o, c, s = o[order], c[order], s[order]
+    rank = np.arange(len(o)) - np.searchsorted(o, o)
+    m = rank < TOP_K - 1
+    kept["alt"][o[m], rank[m] + 1] = c[m]
+    kept["alt_score"][o[m], rank[m] + 1] = s[m]
+
 def _find_characters_in_mask(mask):
-    """Slide each letter template over a binary mask, return matched chars with positions."""
+    """Slide each letter template over a binary mask, return matched chars
+    as a HIT_DTYPE structured array (colour code left at 0)."""
     templates = _get_templates()
     if not templates:
-        return []
+        return _empty_hits()
 
     # Split templates into primary (matched first) and deferred (matched last)
     primary = [(c, t) for c, t in templates if c not in DEFERRED_CHARS]
     deferred = [(c, t) for c, t in templates if c in DEFERRED_CHARS]
 
-    hits = []  # (x, y, w, h, char, score)
+    kept, sup1, own1 = _suppress(_match_templates(mask, primary), _empty_hits())
 
-    for char, tmpl in primary:
-        th, tw = tmpl.shape[:2]
-        if th > mask.shape[0] or tw > mask.shape[1]:
-            continue
-        result = cv2.matchTemplate(mask, tmpl, cv2.TM_CCOEFF_NORMED)
-        locs = np.where(result >= MATCH_THRESHOLD)
-        for y, x in zip(locs[0], locs[1]):
-            score = float(result[y, x])
-            hits.append((x, y, tw, th, char, score))
-
-    # Non-max suppression for primary hits
-    hits.sort(key=lambda h: -h[5])
-    kept = []
-    for hit in hits:
-        x, y, w, h = hit[:4]
-        cx, cy = x + w // 2, y + h // 2
-        overlap = False
-        for kx, ky, kw, kh, _, _ in kept:
-            kcx, kcy = kx + kw // 2, ky + kh // 2
-            if abs(cx - kcx) < max(w, kw) * 0.5 and abs(cy - kcy) < max(h, kh) * 0.5:
-                overlap = True
-                break
-        if not overlap:
-            kept.append(hit)
-
-    # Now match deferred templates, only keeping hits that don't overlap with primary
-    deferred_hits = []
-    for char, tmpl in deferred:
-        th, tw = tmpl.shape[:2]
-        if th > mask.shape[0] or tw > mask.shape[1]:
-            continue
-        result = cv2.matchTemplate(mask, tmpl, cv2.TM_CCOEFF_NORMED)
-        locs = np.where(result >= MATCH_THRESHOLD)
-        for y, x in zip(locs[0], locs[1]):
-            score = float(result[y, x])
-            deferred_hits.append((x, y, tw, th, char, score))
-
-    deferred_hits.sort(key=lambda h: -h[5])
-    for hit in deferred_hits:
-        x, y, w, h = hit[:4]
-        cx, cy = x + w // 2, y + h // 2
-        overlap = False
-        for kx, ky, kw, kh, _, _ in kept:
-            kcx, kcy = kx + kw // 2, ky + kh // 2
-            if abs(cx - kcx) < max(w, kw) * 0.5 and abs(cy - kcy) < max(h, kh) * 0.5:
-                overlap = True
-                break
-        if not overlap:
-            kept.append(hit)
+    # Now match deferred templates, only keeping hits that don't overlap with primary.
+    # Earlier kept hits keep their indices, so own1 stays valid.
+    kept, sup2, own2 = _suppress(_match_templates(mask, deferred), kept)
 
+    _attach_alternatives(kept, np.concatenate([sup1, sup2]),
+                         np.concatenate([own1, own2]))
     return kept
 
 # ───────────────────────────────────────────────────────────
@@ -171,78 +267,60 @@ ITEM_X_GAP = 40   # horizontal gap between chars to split into separate items
 
 def _group_into_lines(chars):
     """Group character hits into lines by vertical proximity,
-    then split lines with large horizontal gaps (different items at same height)."""
-    if not chars:
+    then split lines with large horizontal gaps (different items at same height).
+
+    Returns a list of structured-array slices, each sorted left to right.
+    """
+    if len(chars) == 0:
         return []
-    # Sort by y first
-    chars = sorted(chars, key=lambda c: (c[1], c[0]))
-    raw_lines, current = [], [chars[0]]
-    for c in chars[1:]:
-        prev_cy = current[-1][1] + current[-1][3] // 2
-        curr_cy = c[1] + c[3] // 2
-        if abs(curr_cy - prev_cy) <= LINE_Y_GAP:
-            current.append(c)
-        else:
-            raw_lines.append(sorted(current, key=lambda c: c[0]))
-            current = [c]
-    raw_lines.append(sorted(current, key=lambda c: c[0]))
+    # Sort by y first; a new raw line starts wherever consecutive centres jump
+    chars = chars[np.lexsort((chars["x"], chars["y"]))]
+    cy = chars["y"] + chars["h"] // 2
+    line_id = np.concatenate(([0], np.cumsum(np.abs(np.diff(cy)) > LINE_Y_GAP)))
+
+    # Order each raw line by x (stable, so ties keep their y order)
+    chars = chars[np.lexsort((chars["x"], line_id))]
+    line_id = np.sort(line_id)
 
     # Split lines that have large horizontal gaps (separate items at same Y)
-    lines = []
-    for line in raw_lines:
-        segment = [line[0]]
-        for c in line[1:]:
-            prev = segment[-1]
-            gap = c[0] - (prev[0] + prev[2])
-            if gap > ITEM_X_GAP:
-                lines.append(segment)
-                segment = [c]
-            else:
-                segment.append(c)
-        lines.append(segment)
+    gap = chars["x"][1:] - (chars["x"][:-1] + chars["w"][:-1])
+    breaks = (line_id[1:] != line_id[:-1]) | (gap > ITEM_X_GAP)
+    bounds = np.concatenate(([0], np.flatnonzero(breaks) + 1, [len(chars)]))
+    return [chars[a:b] for a, b in zip(bounds[:-1], bounds[1:])]
 
-    return lines
+def _word_bounds(line_chars):
+    """Return [start, ..., end] indices splitting a line into words."""
+    gap = line_chars["x"][1:] - (line_chars["x"][:-1] + line_chars["w"][:-1])
+    return np.concatenate(([0], np.flatnonzero(gap > WORD_X_GAP) + 1,
+                           [len(line_chars)]))
 
 def _line_to_text(line_chars):
     """Convert a line of character hits into text with spaces between words."""
-    if not line_chars:
+    if len(line_chars) == 0:
         return ""
-    words = []
-    current_word = [line_chars[0]]
-    for c in line_chars[1:]:
-        prev = current_word[-1]
-        gap = c[0] - (prev[0] + prev[2])  # x - (prev_x + prev_w)
-        if gap > WORD_X_GAP:
-            words.append(current_word)
-            current_word = [c]
-        else:
-            current_word.append(c)
-    words.append(current_word)
-
-    parts = []
-    for word in words:
-        parts.append("".join(c[4] for c in word))
-    return " ".join(parts)
+    letters = [_char_table[c] for c in line_chars["char"].tolist()]
+    bounds = _word_bounds(line_chars).tolist()
+    return " ".join("".join(letters[a:b]) for a, b in zip(bounds[:-1], bounds[1:]))
 
 def _line_center(line_chars):
     """Return (cx, cy) average center of a line."""
-    xs = [c[0] + c[2] // 2 for c in line_chars]
-    ys = [c[1] + c[3] // 2 for c in line_chars]
-    return sum(xs) // len(xs), sum(ys) // len(ys)
+    xs = line_chars["x"] + line_chars["w"] // 2
+    ys = line_chars["y"] + line_chars["h"] // 2
+    n = len(line_chars)
+    return int(xs.sum()) // n, int(ys.sum()) // n
 
 def _word_lengths(line_chars):
     """Return list of word lengths (in chars) for noise filtering."""
-    if not line_chars:
+    if len(line_chars) == 0:
         return []
-    words = [[line_chars[0]]]
-    for c in line_chars[1:]:
-        prev = words[-1][-1]
-        gap = c[0] - (prev[0] + prev[2])
-        if gap > WORD_X_GAP:
-            words.append([c])
-        else:
-            words[-1].append(c)
-    return [len(w) for w in words]
+    return np.diff(_word_bounds(line_chars)).tolist()
+
+def _line_color(line_chars):
+    """Dominant colour name of a line (ties go to the leftmost colour)."""
+    colors = line_chars["color"]
+    counts = np.bincount(colors, minlength=len(COLOR_NAMES))
+    is_top = counts == counts.max()
+    return COLOR_NAMES[colors[np.argmax(is_top[colors])]]
 
 # ───────────────────────────────────────────────────────────
 # Levenshtein distance
@@ -266,10 +344,13 @@ def _levenshtein(s1, s2):
 # Known D2 item names — loaded from item_names.txt plus extras
 # ───────────────────────────────────────────────────────────
 
+_ITEM_NAMES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "item_names.txt")
+
 def _load_item_names():
     """Load known item names from item_names.txt, plus a few extras."""
     names = []
-    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "item_names.txt")
+    path = _ITEM_NAMES_PATH
     try:
         with open(path) as f:
             for line in f:
@@ -292,7 +373,23 @@ def _load_item_names():
             names.append(e)
     return names
 
-KNOWN_ITEMS = _load_item_names()
+_known_items = None
+
+def _get_known_items():
+    """KNOWN_ITEMS, loaded (via the template bank) on first use."""
+    global _known_items
+    if _known_items is None:
+        entry = template_bank.cached(
+            "lexicon", [_ITEM_NAMES_PATH, __file__],
+            lambda: {"names": np.array(_load_item_names(), dtype=str)})
+        _known_items = entry["names"].tolist()
+    return _known_items
+
+def __getattr__(name):
+    # Keep ocr_items.KNOWN_ITEMS working without loading it at import time
+    if name == "KNOWN_ITEMS":
+        return _get_known_items()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # ───────────────────────────────────────────────────────────
 # Fuzzy matching
@@ -335,7 +432,7 @@ def _fuzzy_match(raw_text, min_score=0.45):
     best_score = min_score - 0.01
     best_lcs = 0
 
-    for name in KNOWN_ITEMS:
+    for name in _get_known_items():
         name_compact = name.replace(" ", "").lower()
         lcs = _lcs_length(raw_compact, name_compact)
         total_len = len(raw_compact) + len(name_compact)
@@ -351,6 +448,41 @@ def _fuzzy_match(raw_text, min_score=0.45):
 
     return best
 
+# ───────────────────────────────────────────────────────────
+# Lexicon-constrained decoding
+# ───────────────────────────────────────────────────────────
+
+DECODE_MIN_CONFIDENCE = 0.65   # below this, fall back to _fuzzy_match
+
+_ITEM_TRIE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                               "item_trie.py")
+
+_item_trie = None
+
+def _build_item_trie():
+    readable = {name.lower() for name, _ in _get_templates()}
+    return ItemTrie(_get_known_items(), readable=readable).to_arrays()
+
+def _get_item_trie():
+    global _item_trie
+    if _item_trie is None:
+        sources = _template_sources() + [_ITEM_NAMES_PATH, _ITEM_TRIE_PATH]
+        _item_trie = ItemTrie.from_arrays(
+            template_bank.cached("item_trie", sources, _build_item_trie))
+    return _item_trie
+
+def _line_candidates(line_chars):
+    """Per-glyph [(char, score), ...] candidate lists for the decoder."""
+    return [
+        [(_char_table[c], s) for c, s in zip(alt, scores) if c != NO_CHAR]
+        for alt, scores in zip(line_chars["alt"].tolist(),
+                               line_chars["alt_score"].tolist())
+    ]
+
+def _decode_line(line_chars):
+    """Beam-search a line against the item trie; returns Decoded or None."""
+    return _get_item_trie().decode(_line_candidates(line_chars))
+
 def _looks_like_gold(raw_text):
     """Heuristic: does this line look like 'NNN Gold'?
 
@@ -373,20 +505,25 @@ def read_items(image_path: str) -> list[Item]:
     img = cv2.imread(image_path)
     if img is None:
         raise FileNotFoundError(f"Cannot load image: {image_path}")
+    return read_items_img(img)
 
+def read_items_img(img: np.ndarray) -> list[Item]:
+    """Same as read_items() but on an already-loaded BGR numpy array."""
     hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
 
-    all_chars = []  # (x, y, w, h, char, score, color_name)
+    per_color = []
 
-    for color_name, (lo, hi) in ITEM_COLORS.items():
+    for code, (lo, hi) in enumerate(ITEM_COLORS.values()):
         mask = cv2.inRange(hsv, np.array(lo), np.array(hi))
         # Morphological close to merge dots/serifs
         kernel = np.ones((2, 2), np.uint8)
         mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
 
         chars = _find_characters_in_mask(mask)
-        for x, y, w, h, char, score in chars:
-            all_chars.append((x, y, w, h, char, score, color_name))
+        chars["color"] = code
+        per_color.append(chars)
+
+    all_chars = np.concatenate(per_color)
 
     # Group into lines
     lines = _group_into_lines(all_chars)
@@ -408,11 +545,14 @@ def read_items(image_path: str) -> list[Item]:
             continue
 
         # Determine dominant color for this line
-        color_counts = Counter(c[6] for c in line_chars)
-        color = color_counts.most_common(1)[0][0]
-        cls = COLOR_TO_CLASS.get(color, "Normal")
+        cls = COLOR_TO_CLASS.get(_line_color(line_chars), "Normal")
 
-        # Regular items: fuzzy match
+        # Regular items: trie decode, fuzzy match if not confident
+        decoded = _decode_line(line_chars)
+        if decoded and decoded.confidence >= DECODE_MIN_CONFIDENCE:
+            items.append(Item(name=decoded.name, classification=cls,
+                              x=cx, y=cy, confidence=decoded.confidence))
+            continue
         matched = _fuzzy_match(raw_text)
         if matched:
             items.append(Item(name=matched, classification=cls,
@@ -0,0 +1,106 @@
+"""
+pickit.py
+
+Pickit rules: which loot labels the bot picks up, decided from one OCR pass
+(ocr_items.read_items_img) instead of one template scan per kind of item.
+
+The rule file (pickit.txt) has one rule per line; a rule is one or more
+conditions joined with "&", all of which must hold:
+
+    name: Shael Rune       the exact item name (case-insensitive)
+    class: Unique          the label colour's class (ocr_items.COLOR_TO_CLASS;
+                           case-insensitive)
+    match: Charm$          a regular expression searched in the name
+                           (case-insensitive)
+
+An item is picked if any rule matches it.  Blank lines and # comments are
+ignored.
+
+Rules are compiled once into hash sets — names, classes, (class, name)
+pairs — and, for patterns, one precompiled alternation per class (plus one
+for rules without a class).  Deciding on an item is a few set lookups and
+at most two regex searches, however many rules there are.
+
+    rules = Pickit.load("pickit.txt")
+    wanted = [it for it in ocr_items.read_items_img(img) if rules.wants(it)]
+"""
+
+import re
+from collections import defaultdict
+
+KEYS = ("name", "class", "match")
+
+
+def kind_of(item) -> str:
+    """What an item counts as in the run totals: Rune, Charm, or its class."""
+    if item.classification == "Rune":
+        return "Rune"
+    if "charm" in item.name.lower():
+        return "Charm"
+    return item.classification
+
+
+class Pickit:
+    def __init__(self, rules: list[dict[str, str]], classes=None):
+        """*rules*: [{"name": ..., "class": ..., "match": ...}, ...] (any subset of keys)."""
+        self.rules = rules
+        self.names: set[str] = set()
+        self.classes: set[str] = set()
+        self.class_names: set[tuple[str, str]] = set()
+        self.patterns: dict[str | None, re.Pattern] = {}
+        by_class: dict[str | None, list[str]] = defaultdict(list)
+        for rule in rules:
+            if classes is not None and "class" in rule and rule["class"] not in classes:
+                raise ValueError(f"unknown class {rule['class']!r} "
+                                 f"(one of {', '.join(sorted(classes))})")
+            name, cls, pattern = (rule.get(k) for k in KEYS)
+            if pattern is not None:
+                if name is not None:
+                    raise ValueError("a rule takes name or match, not both")
+                re.compile(pattern)   # report a bad pattern on its own
+                by_class[cls].append(pattern)
+            elif name is not None and cls is not None:
+                self.class_names.add((cls, name.lower()))
+            elif name is not None:
+                self.names.add(name.lower())
+            elif cls is not None:
+                self.classes.add(cls)
+        for cls, patterns in by_class.items():
+            self.patterns[cls] = re.compile("|".join(f"(?:{p})" for p in patterns),
+                                            re.IGNORECASE)
+
+    @classmethod
+    def parse(cls, text: str, classes=None) -> "Pickit":
+        rules = []
+        for lineno, line in enumerate(text.splitlines(), 1):
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            rule = {}
+            for cond in line.split("&"):
+                key, sep, value = cond.partition(":")
+                key, value = key.strip().lower(), value.strip()
+                if not sep or key not in KEYS or not value:
+                    raise ValueError(f"line {lineno}: expected name:/class:/match:, got {cond.strip()!r}")
+                rule[key] = value.capitalize() if key == "class" else value
+            rules.append(rule)
+        try:
+            return cls(rules, classes)
+        except (ValueError, re.error) as e:
+            raise ValueError(f"pickit rules: {e}") from None
+
+    @classmethod
+    def load(cls, path: str, classes=None) -> "Pickit":
+        with open(path) as f:
+            return cls.parse(f.read(), classes)
+
+    def wants(self, item) -> bool:
+        """Whether any rule matches *item* (anything with .name and .classification)."""
+        name, cls = item.name.lower(), item.classification
+        if name in self.names or cls in self.classes or (cls, name) in self.class_names:
+            return True
+        for key in (None, cls):
+            pattern = self.patterns.get(key)
+            if pattern is not None and pattern.search(item.name):
+                return True
+        return False
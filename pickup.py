@@ -0,0 +1,210 @@
+"""
+pickup.py
+
+Plans the order in which loot labels are clicked.
+
+loot_items() detects every wanted label in one capture, and plan() turns
+them into a click route: higher-value kinds first (so a full inventory or
+an abort costs the cheap items), and within each kind the order that keeps
+cursor travel shortest — exact over all orderings up to EXACT_MAX labels,
+nearest-neighbour plus 2-opt beyond that.  The labels are then clicked
+back to back and checked with a single capture; only what is still there
+gets planned again.
+
+The check looks only at each label's own box.  label_box() finds it in the
+frame the route was planned from: the text band LABEL_HALF_H rows either
+side of the click point, grown sideways until LABEL_GAP columns without
+text.  verify() compares that box in the planning frame and the check
+frame:
+
+  missed  the box is unchanged (mean difference under SAME_DIFF levels),
+          or its text is still in place — click it again.  "In place"
+          allows for the view having scrolled by a known shift
+  moved   its text turns up elsewhere within SEARCH_PAD pixels (the view
+          scrolls as the character walks to the loot, and labels re-flow
+          when one is picked up), or something else is in the box now;
+          only then is the whole loot region searched
+  picked  its text is gone (at most GONE_TEXT of the text pixels left)
+          and is not found anywhere around the box either
+
+The text is looked for by matching the box's text mask against that of
+the surrounding window (normalised correlation of at least FOUND_MIN).  A
+box is a few thousand pixels and the window a few tens of thousands, so
+each verdict costs well under a millisecond instead of a full rune and
+charm scan.
+
+    route = plan([Target("Rune", 900, 400), Target("Charm", 700, 650)],
+                 start=(200, 200))
+    box = label_box(before, 300, 120)
+    verify(before, after, box)   # "picked" / "missed" / "moved"
+"""
+
+import itertools
+import math
+from dataclasses import dataclass
+
+import cv2
+import numpy as np
+
+# Pickup priority by label kind (pickit.kind_of); anything else is 0
+VALUES = {"Rune": 3, "Unique": 2, "Set": 2, "Charm": 1}
+EXACT_MAX = 6   # labels per kind ordered by brute force
+
+LABEL_HALF_H = 10    # label text rows either side of the click point
+LABEL_GAP    = 20    # columns without text that end a label (word gaps are ~15)
+LABEL_MAX_W  = 300   # widest label box, pixels
+TEXT_LEVEL   = 150   # brightest channel at or above this counts as label text
+SAME_DIFF    = 4.0   # mean abs difference (0-255) under which a box is unchanged
+GONE_TEXT    = 0.25  # fraction of text pixels left that still counts as gone
+SEARCH_PAD   = 80    # pixels around a box searched for its label's text
+FOUND_MIN    = 0.8   # text-mask correlation that counts as the same label
+
+PICKED, MISSED, MOVED = "picked", "missed", "moved"
+
+
+@dataclass(frozen=True, slots=True)
+class Target:
+    kind: str
+    x: int      # screen pixels
+    y: int
+    name: str = ""   # item name, when it was read ("Shael Rune")
+
+    @property
+    def value(self) -> int:
+        return VALUES.get(self.kind, 0)
+
+
+def _dist(a: tuple[float, float], b: tuple[float, float]) -> float:
+    return math.hypot(a[0] - b[0], a[1] - b[1])
+
+
+def travel(route: list[Target], start: tuple[int, int]) -> float:
+    """Cursor travel, in pixels, to visit *route* in order from *start*."""
+    total, at = 0.0, start
+    for t in route:
+        total += _dist(at, (t.x, t.y))
+        at = (t.x, t.y)
+    return total
+
+
+def _shortest(targets: list[Target], start: tuple[int, int]) -> list[Target]:
+    """Visiting order of *targets* from *start* with (near-)minimal travel."""
+    if len(targets) <= EXACT_MAX:
+        return list(min(itertools.permutations(targets), key=lambda r: travel(r, start)))
+    # Nearest neighbour, then 2-opt until no reversal helps
+    route, left, at = [], list(targets), start
+    while left:
+        nxt = min(left, key=lambda t: _dist(at, (t.x, t.y)))
+        left.remove(nxt)
+        route.append(nxt)
+        at = (nxt.x, nxt.y)
+    best = travel(route, start)
+    improved = True
+    while improved:
+        improved = False
+        for i in range(len(route) - 1):
+            for j in range(i + 1, len(route)):
+                cand = route[:i] + route[i:j + 1][::-1] + route[j + 1:]
+                cost = travel(cand, start)
+                if cost < best - 1e-9:
+                    route, best, improved = cand, cost, True
+    return route
+
+
+def plan(targets: list[Target], start: tuple[int, int]) -> list[Target]:
+    """Click order: by value (highest first), shortest cursor path within each value."""
+    route: list[Target] = []
+    at = start
+    for value in sorted({t.value for t in targets}, reverse=True):
+        tier = _shortest([t for t in targets if t.value == value], at)
+        route += tier
+        at = (tier[-1].x, tier[-1].y)
+    return route
+
+
+@dataclass(frozen=True, slots=True)
+class Box:
+    left: int      # frame pixels; right and bottom exclusive
+    top: int
+    right: int
+    bottom: int
+
+    def of(self, frame: np.ndarray) -> np.ndarray:
+        return frame[self.top:self.bottom, self.left:self.right]
+
+    def contains(self, x: int, y: int) -> bool:
+        return self.left <= x < self.right and self.top <= y < self.bottom
+
+    def shifted(self, dx: int, dy: int) -> "Box":
+        return Box(self.left + dx, self.top + dy, self.right + dx, self.bottom + dy)
+
+    def inside(self, frame: np.ndarray) -> bool:
+        return (self.left >= 0 and self.top >= 0
+                and self.right <= frame.shape[1] and self.bottom <= frame.shape[0])
+
+
+def _text(patch: np.ndarray) -> np.ndarray:
+    return patch.max(axis=2) >= TEXT_LEVEL
+
+
+def label_box(frame: np.ndarray, x: int, y: int) -> Box:
+    """The label around (*x*, *y*) in *frame*: its text rows, grown to its text columns."""
+    top, bottom = max(0, y - LABEL_HALF_H), min(frame.shape[0], y + LABEL_HALF_H + 1)
+    cols = _text(frame[top:bottom]).any(axis=0)
+    lo_lim = max(0, x - LABEL_MAX_W // 2)
+    hi_lim = min(len(cols) - 1, x + LABEL_MAX_W // 2)
+    left = right = x
+    gap = 0
+    while left > lo_lim and gap < LABEL_GAP:
+        left -= 1
+        gap = 0 if cols[left] else gap + 1
+    gap = 0
+    while right < hi_lim and gap < LABEL_GAP:
+        right += 1
+        gap = 0 if cols[right] else gap + 1
+    return Box(left, top, right + 1, bottom)
+
+
+def find_text(before: np.ndarray, after: np.ndarray, box: Box,
+              shift: tuple[int, int] = (0, 0), pad: int = SEARCH_PAD) -> tuple[int, int] | None:
+    """
+    Offset (dx, dy) at which the text of *box* in *before* shows up in
+    *after*, searching *pad* pixels around the box moved by *shift* (how far
+    the view is known to have scrolled); None if it is nowhere near (or the
+    box holds no text).
+    """
+    mask = _text(box.of(before)).astype(np.float32)
+    if not mask.any() or mask.all():
+        return None
+    h, w = after.shape[:2]
+    at = box.shifted(*shift)
+    left, top = max(0, at.left - pad), max(0, at.top - pad)
+    window = _text(after[top:max(top, min(h, at.bottom + pad)),
+                         left:max(left, min(w, at.right + pad))]).astype(np.float32)
+    if window.shape[0] < mask.shape[0] or window.shape[1] < mask.shape[1]:
+        return None
+    scores = cv2.matchTemplate(window, mask, cv2.TM_CCOEFF_NORMED)
+    _, best, _, (x, y) = cv2.minMaxLoc(np.nan_to_num(scores))
+    if best < FOUND_MIN:
+        return None
+    return left + x - box.left, top + y - box.top
+
+
+def verify(before: np.ndarray, after: np.ndarray, box: Box,
+           shift: tuple[int, int] = (0, 0)) -> str:
+    """
+    PICKED, MISSED or MOVED for the label in *box*, from two frames, the
+    view having scrolled by *shift* between them.
+    """
+    at = box.shifted(*shift)
+    if not at.inside(after):
+        return MOVED   # scrolled past the crop edge: only a full search can tell
+    b, a = box.of(before), at.of(after)
+    if np.abs(a.astype(np.int16) - b).mean() < SAME_DIFF:
+        return MISSED
+    found = find_text(before, after, box, shift)
+    if found == tuple(shift):
+        return MISSED
+    if found is None and _text(a).sum() <= GONE_TEXT * _text(b).sum():
+        return PICKED
+    return MOVED
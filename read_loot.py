@@ -27,6 +27,8 @@ import numpy as np
 import os
 from dataclasses import dataclass
 
+import template_bank
+
 # ── Item text colour definitions (OpenCV HSV: H 0-180, S 0-255, V 0-255) ────
 COLORS = {
     "white":  ((  0,   0, 170), (180,  30, 255)),
@@ -59,12 +61,25 @@ class LootItem:
 # ── Template loading (cached) ─────────────────────────────────────────────────
 _templates: dict | None = None
 
+def _template_sources() -> list[str]:
+    dirs = [os.path.join(TEMPLATE_DIR, d) for d in ("upper", "lower")]
+    return template_bank.png_sources(*dirs) + [__file__]
+
+
 def load_templates() -> dict:
     """Load all letter PNGs from templates/letters/{upper,lower}/ as binary greyscale."""
     global _templates
-    if _templates is not None:
-        return _templates
-    _templates = {}
+    if _templates is None:
+        entry = template_bank.cached(
+            "read_loot_letters", _template_sources(),
+            lambda: template_bank.pack_images(_read_templates().items()))
+        _templates = dict(template_bank.unpack_images(entry))
+    return _templates
+
+
+def _read_templates() -> dict:
+    """Decode and binarize every letter PNG on disk."""
+    templates = {}
     for subdir in ("upper", "lower"):
         folder = os.path.join(TEMPLATE_DIR, subdir)
         if not os.path.isdir(folder):
@@ -86,8 +101,8 @@ def load_templates() -> dict:
             _, binary = cv2.threshold(gray, 60, 255, cv2.THRESH_BINARY)
             # upper/ → capital key ('H'), lower/ → lowercase key ('h')
             key = char.upper() if subdir == "upper" else char.lower()
-            _templates[key] = binary
-    return _templates
+            templates[key] = binary
+    return templates
 
 
 # ── Colour masking ────────────────────────────────────────────────────────────
@@ -193,15 +208,22 @@ _tc_templates: dict | None = None
 def get_tc_templates() -> dict:
     """Return {char: tight_cropped_binary} for all templates."""
     global _tc_templates
-    if _tc_templates is not None:
-        return _tc_templates
-    _tc_templates = {}
+    if _tc_templates is None:
+        entry = template_bank.cached(
+            "read_loot_tc", _template_sources(),
+            lambda: template_bank.pack_images(_tight_crop_templates().items()))
+        _tc_templates = dict(template_bank.unpack_images(entry))
+    return _tc_templates
+
+
+def _tight_crop_templates() -> dict:
+    tc_templates = {}
     for char, tmpl in load_templates().items():
         _, binary = cv2.threshold(tmpl, 60, 255, cv2.THRESH_BINARY)
         tc = tight_crop(binary)
         if tc.max() > 0:
-            _tc_templates[char] = tc
-    return _tc_templates
+            tc_templates[char] = tc
+    return tc_templates
 
 
 def _fit_to_template(blob_tc: np.ndarray, th: int, tw: int) -> np.ndarray:
@@ -0,0 +1,354 @@
+"""
+replay.py
+
+Offline replay harness: runs the real bot loop (bot.run_session) against a
+simulated D2R screen on a virtual clock, so run-loop throughput can be
+measured — and the loop tested — without the game.
+
+The simulated game (PindleReplay) walks through the same screens the bot
+expects: character select (Play button) → difficulty → loading → in game
+(UI cross).  The sigil press brings up Pindleskin's health bar, and each
+Abyss or Miasma Bolt takes off one of his BOSS_HITS.  When the bot presses
+Alt after the kill, the next recorded loot
+frame is shown in the loot region; clicking an item label erases it, the way
+picking the item up would.  Escape + Save and Exit returns to character
+select after EXIT_TIME.
+
+Nothing sleeps for real, and template matches and detector results are
+cached per frame content (--no-cache turns that off).  What is left is
+the OCR pass for every loot crop not seen before: each new loot frame (a
+couple of seconds), and each hot region of the label prior while it is
+still moving.  Over the 38 shipped frames that is about 25 replays a
+minute for 30 runs and about 55 for 300.  The report shows simulated wall
+time per phase, and the real replay rate.
+
+Usage
+-----
+    python replay.py                      # 100 runs over screen_archive/, screens_from_runs/
+                                          # and test_cases/
+    python replay.py -n 1000              # more runs
+    python replay.py samples/test_rune_*  # replay specific loot frames
+    python replay.py sessions/            # loot frames from recorded sessions
+"""
+
+import argparse
+import glob
+import hashlib
+import os
+import random
+import shutil
+import tempfile
+import time
+import types
+
+import cv2
+import numpy as np
+
+import bot
+import screen_archive
+from backends import ReplayBackend
+from session_store import SessionReader
+
+FRAME_DIRS = ["screen_archive", "screens_from_runs", "test_cases"]
+
+SCREEN_H  = 1100    # tall enough for the UI-cross search strip (900-1100)
+LOAD_TIME = (4.0, 7.0)   # seconds from pressing H to standing in town
+EXIT_TIME = (2.0, 3.5)   # seconds from Save and Exit to character select
+BOSS_HITS = (8, 16)      # casts it takes to kill Pindleskin
+
+UI_CROSS_AT    = (821, 1041)   # top-left of the UI cross on screen
+PLAY_BUTTON_AT = (805, 971)    # top-left of the Play button on screen
+MENU_PANEL     = (540, 250, 1140, 750)  # x0, y0, x1, y1 of the menus
+SAVE_EXIT_BOX  = (700, 450, 940, 560)   # x0, y0, x1, y1 of the menu button
+
+# loot_items() grabs its first frame ~0.5 s after Alt (move + settle)
+SESSION_LOOT_DELAY = 0.5
+
+LABEL_HALF_H = 9    # label text rows either side of the click point
+LABEL_GAP    = 20   # columns without text that end a label
+LABEL_BRIGHT = 200  # label text is near-saturated; scenery behind it is not
+
+
+def load_frames(paths) -> list[np.ndarray]:
+    """
+    Load loot frames from *paths* (files, dirs or globs): every loot-sized
+    PNG and screenshot archive frame, plus the loot region after each Alt
+    press in recorded .session files.
+    """
+    files = []
+    frames = []
+    for p in paths:
+        if os.path.isdir(p) and screen_archive.is_archive(p):
+            archive = screen_archive.ScreenArchive(p)
+            frames += [img for _, img in archive.frames()
+                       if img.shape[:2] == (bot.LOOT_HEIGHT, bot.LOOT_WIDTH)]
+            archive.close()
+        elif os.path.isdir(p):
+            files += glob.glob(os.path.join(p, "**", "*.png"), recursive=True)
+            files += glob.glob(os.path.join(p, "**", "*.session"), recursive=True)
+        else:
+            files += glob.glob(p)
+    for f in sorted(files):
+        if f.endswith(".session"):
+            frames += session_loot_frames(f)
+            continue
+        img = cv2.imread(f)
+        if img is not None and img.shape[:2] == (bot.LOOT_HEIGHT, bot.LOOT_WIDTH):
+            frames.append(img)
+    return frames
+
+
+def session_loot_frames(path: str) -> list[np.ndarray]:
+    """Loot-region crops of a recorded session, one per Alt press."""
+    session = SessionReader(path)
+    region = session.meta.get("region", {"left": 0, "top": 0})
+    left = bot.LOOT_CENTER_X - bot.LOOT_WIDTH // 2 - region["left"]
+    top  = bot.LOOT_CENTER_Y - bot.LOOT_HEIGHT // 2 - region["top"]
+    frames = []
+    for t, kind, args in session.events:
+        if kind == "press" and args[0] == "alt":
+            img = session.frame_at(t + SESSION_LOOT_DELAY)
+            frames.append(img[top:top + bot.LOOT_HEIGHT, left:left + bot.LOOT_WIDTH])
+    session.close()
+    return frames
+
+
+def _paste(screen, img, left, top):
+    h, w = img.shape[:2]
+    screen[top:top + h, left:left + w] = img
+
+
+class PindleReplay(ReplayBackend):
+    """ReplayBackend scripted to behave like the Pindleskin game loop."""
+
+    def __init__(self, frames, seed: int = 0):
+        super().__init__(width=bot.GAME_W, height=SCREEN_H)
+        if not frames:
+            raise ValueError("no loot frames to replay")
+        self.frames = frames
+        self.rng = random.Random(seed)
+        self.next_frame = 0
+        self.loot_rect = (bot.LOOT_CENTER_X - bot.LOOT_WIDTH // 2,
+                          bot.LOOT_CENTER_Y - bot.LOOT_HEIGHT // 2)
+        self.play_button = bot.ui_template(bot.PLAY_BUTTON_TEMPLATE)
+        self.ui_cross = bot.ui_template(bot.GAME_LOAD_TEMPLATE)
+        self.pickups = 0
+        self.boss_hp = 0
+        self.set_scene("char_select")
+
+    def set_scene(self, scene: str) -> None:
+        self.scene = scene
+        self.loot_shown = False
+        self.screen[:] = 0
+        if scene == "char_select":
+            _paste(self.screen, self.play_button, *PLAY_BUTTON_AT)
+        elif scene == "in_game":
+            _paste(self.screen, self.ui_cross, *UI_CROSS_AT)
+        elif scene == "difficulty":
+            self._draw_panel()
+
+    def on_press(self, key: str) -> None:
+        if self.scene == "char_select" and key == "enter":
+            self.set_scene("difficulty")
+        elif self.scene == "difficulty" and key == "h":
+            self.set_scene("loading")
+            self.schedule(self.rng.uniform(*LOAD_TIME),
+                          lambda: self.set_scene("in_game"))
+        elif self.scene == "in_game" and key == "f5":
+            self.boss_hp = self.boss_max = self.rng.randint(*BOSS_HITS)
+            self._draw_boss_bar()
+        elif self.scene == "in_game" and key in ("d", "f") and self.boss_hp:
+            self.boss_hp -= 1
+            self._draw_boss_bar()
+        elif self.scene == "in_game" and key == "alt":
+            self._show_loot()
+        elif self.scene == "in_game" and key == "escape":
+            self.scene = "menu"
+            self._draw_panel()
+
+    def _draw_boss_bar(self) -> None:
+        """Pindleskin's health bar, red in proportion to his hits left."""
+        r = bot.BOSS_BAR_REGION
+        bar = self.screen[r["top"]:r["top"] + r["height"], r["left"]:r["left"] + r["width"]]
+        bar[:] = 0
+        if self.boss_hp:
+            bar[4:-4, :r["width"] * self.boss_hp // self.boss_max] = (20, 20, 180)
+
+    def _draw_panel(self) -> None:
+        x0, y0, x1, y1 = MENU_PANEL
+        self.screen[y0:y1, x0:x1] = 120
+
+    def on_click(self, x: int, y: int) -> None:
+        if self.scene == "menu":
+            x0, y0, x1, y1 = SAVE_EXIT_BOX
+            if x0 <= x <= x1 and y0 <= y <= y1:
+                self.set_scene("exiting")
+                self.schedule(self.rng.uniform(*EXIT_TIME),
+                              lambda: self.set_scene("char_select"))
+        elif self.scene == "in_game" and self.loot_shown:
+            self._pick_up(x, y)
+
+    def _show_loot(self) -> None:
+        frame = self.frames[self.next_frame % len(self.frames)]
+        self.next_frame += 1
+        _paste(self.screen, frame, *self.loot_rect)
+        self.loot_shown = True
+
+    def _pick_up(self, x: int, y: int) -> None:
+        """Erase the item label under (x, y), as picking it up would."""
+        band = self.screen[max(0, y - LABEL_HALF_H):y + LABEL_HALF_H + 1]
+        text_cols = (band.max(axis=2) > LABEL_BRIGHT).any(axis=0)
+        # Grow outwards from the click until LABEL_GAP text-free columns
+        x0 = x1 = x
+        gap = 0
+        while x0 > 0 and gap < LABEL_GAP:
+            x0 -= 1
+            gap = 0 if text_cols[x0] else gap + 1
+        gap = 0
+        while x1 < len(text_cols) - 1 and gap < LABEL_GAP:
+            x1 += 1
+            gap = 0 if text_cols[x1] else gap + 1
+        if not text_cols[x0:x1 + 1].any():
+            return
+        band[:, x0:x1 + 1] = 0
+        self.pickups += 1
+
+
+def _memoized(fn):
+    """Cache fn's result per argument content (frames repeat in replay)."""
+    cache = {}
+
+    def key_of(arg):
+        if isinstance(arg, np.ndarray):
+            return arg.shape, hashlib.sha1(arg.tobytes()).digest()
+        return arg
+
+    def wrapper(*args):
+        key = tuple(key_of(a) for a in args)
+        if key not in cache:
+            cache[key] = fn(*args)
+        return cache[key]
+    return wrapper
+
+
+def replay(frames, runs: int, seed: int = 0, workdir: str | None = None,
+           cache_detections: bool = True,
+           backend_class: type[PindleReplay] = PindleReplay) -> PindleReplay:
+    """
+    Play *runs* games through bot.run_session on a PindleReplay backend.
+
+    Loot screenshots (and their archive), the run store, the learned scene times, the run state
+    history and the label prior go to *workdir* (a temporary directory by default).
+    *backend_class* swaps in a PindleReplay subclass (e.g. one that
+    misbehaves).  Returns the backend; per-phase times are in
+    bot.phase_times.
+    """
+    sim = backend_class(frames, seed=seed)
+    saved = {name: getattr(bot, name) for name in
+             ("backend", "SCREENS_DIR", "SCREEN_ARCHIVE", "RUN_STORE",
+              "LEGACY_RUN_LOG", "LEGACY_TOTALS",
+              "SCENE_STATS_FILE", "STATE_HISTORY_FILE", "LABEL_PRIOR_FILE",
+              "DEBUG_OCR", "USE_MINIMAP_WALK", "USE_INVENTORY_CHECK",
+              "_machine", "_loot_prior", "_totals",
+              "match_score", "find_runes", "find_charms", "ocr_items")}
+    own_dir = workdir is None
+    workdir = workdir or tempfile.mkdtemp(prefix="replay_")
+    try:
+        bot.set_backend(sim)
+        bot.SCREENS_DIR = os.path.join(workdir, "screens")
+        bot.SCREEN_ARCHIVE = os.path.join(workdir, "screen_archive")
+        bot.RUN_STORE   = os.path.join(workdir, "runs.db")
+        bot.LEGACY_RUN_LOG = os.path.join(workdir, "runs.log")
+        bot.LEGACY_TOTALS  = os.path.join(workdir, "totals.txt")
+        bot.SCENE_STATS_FILE = os.path.join(workdir, "scene_times.json")
+        bot.STATE_HISTORY_FILE = os.path.join(workdir, "run_states.jsonl")
+        bot.LABEL_PRIOR_FILE = os.path.join(workdir, "label_prior.npz")
+        bot._loot_prior = None
+        bot._totals = None
+        bot.DEBUG_OCR   = False
+        bot.USE_MINIMAP_WALK = False   # the simulated town has no minimap
+        bot.USE_INVENTORY_CHECK = False   # nor an inventory
+        if cache_detections:
+            bot.match_score = _memoized(saved["match_score"])
+            bot.find_runes = types.SimpleNamespace(
+                find_runes_img=_memoized(saved["find_runes"].find_runes_img))
+            bot.find_charms = types.SimpleNamespace(
+                find_charms_img=_memoized(saved["find_charms"].find_charms_img))
+            bot.ocr_items = types.SimpleNamespace(
+                read_items_img=_memoized(saved["ocr_items"].read_items_img),
+                COLOR_TO_CLASS=saved["ocr_items"].COLOR_TO_CLASS)
+        bot.phase_times.clear()
+        bot.step_savings.clear()
+        bot.action_lateness.clear()
+        bot.input_per_run.clear()
+        bot.kill_times.clear()
+        bot.run_session(bot.runs_db().claim_run(), max_runs=runs)
+    finally:
+        bot.close_artifacts()
+        archive = bot._archive.pop(bot.SCREEN_ARCHIVE, None)
+        if archive is not None:
+            archive.close()
+        store = bot._run_store.pop(bot.RUN_STORE, None)
+        if store is not None:
+            store.close()
+        for name, value in saved.items():
+            setattr(bot, name, value)
+        if own_dir:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return sim
+
+
+def phase_report(runs: int) -> str:
+    """Table of simulated seconds per phase (mean per run and share)."""
+    totals = {name: sum(times) for name, times in bot.phase_times.items()}
+    grand = sum(totals.values()) or 1.0
+    lines = [f"{'phase':<16}{'mean s':>8}{'total s':>10}{'share':>8}"]
+    for name, total in totals.items():
+        lines.append(f"{name:<16}{total / runs:8.2f}{total:10.1f}{total / grand:8.1%}")
+    lines.append(f"{'run total':<16}{grand / runs:8.2f}{grand:10.1f}")
+    lines.append(f"\nsimulated: {runs} runs in {grand / 3600:.2f} h "
+                 f"→ {runs * 3600 / grand:.1f} runs/hour")
+    if bot.input_per_run:
+        kinds = sorted({k for snap in bot.input_per_run for k in snap} - {"total"})
+        mean = {k: sum(s.get(k, 0.0) for s in bot.input_per_run) / len(bot.input_per_run)
+                for k in kinds + ["total"]}
+        lines.append(f"input (s/run): {mean['total']:.2f} = "
+                     + ", ".join(f"{k} {mean[k]:.2f}" for k in kinds))
+    if bot.kill_times:
+        cap = bot.KILL_ROUNDS * sum(wait for _, wait in bot.KILL_ROTATION)
+        mean = sum(bot.kill_times) / len(bot.kill_times)
+        lines.append(f"kill: {mean:.2f} s mean over {len(bot.kill_times)} confirmed kills "
+                     f"(cap {cap:.2f} s, saved {cap - mean:.2f} s/kill)")
+    saved = {step: sum(v) / runs for step, v in bot.step_savings.items() if sum(v) >= 0.005 * runs}
+    if saved:
+        lines.append("settle savings (s/run): " + ", ".join(
+            f"{step} {secs:.2f}" for step, secs in saved.items())
+            + f"  = {sum(saved.values()):.2f}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay the bot loop offline.")
+    parser.add_argument("frames", nargs="*", default=FRAME_DIRS,
+                        help="loot PNGs, .session files, dirs or globs (default: %(default)s)")
+    parser.add_argument("-n", "--runs", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-cache", action="store_true",
+                        help="re-run template matching and detectors on every grab")
+    args = parser.parse_args()
+
+    frames = load_frames(args.frames)
+    print(f"Replaying {args.runs} runs over {len(frames)} loot frames...")
+    t0 = time.perf_counter()
+    sim = replay(frames, args.runs, seed=args.seed,
+                 cache_detections=not args.no_cache)
+    elapsed = time.perf_counter() - t0
+
+    print()
+    print(phase_report(args.runs))
+    print(f"real:      {elapsed:.1f} s → {args.runs * 60 / elapsed:.0f} replays/min, "
+          f"{sim.pickups} pickups, {len(sim.events)} input events")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+run_state.py
+
+The farming loop as an explicit state machine.
+
+Each State names one step of a run (enter the game, wait for the load,
+walk, warp, kill, loot, exit, wait for character select), the state that
+normally follows it, a timeout, and where to go when it fails.  A failure
+is a StateTimeout (the step ran past its timeout) or any other exception
+from the step — anything but the *fatal* ones (AbortBot), which stop the
+machine.  The usual recovery target is a "recover" state that looks at the
+screen and returns the state to resume from, so a stalled load or a missed
+Save and Exit costs one timeout instead of the rest of the session.
+
+Blocking steps cannot be interrupted from outside, so they call check()
+from their wait loops (bot.check_deadline() does this); the async runner
+additionally cancels awaited steps at the deadline.  A step running on an
+executor thread outlives the cancellation of the coroutine awaiting it,
+so on a timeout the async runner also sets .cancelled, which makes
+check() raise at once, and waits for the step to finish before the
+recovery state starts (see runtime.Runtime.blocking) — a stale step never
+sends input during recovery or eats into its time.
+
+Every transition is appended to a JSON-lines history file, which is moved
+aside to <path>.1 once it passes HISTORY_MAX bytes.  resume_point() reads
+only its last entry, so a restarted bot carries on with the right run
+number and knows it was interrupted.
+
+    m = RunMachine(states, "enter_game", first_run=1, clock=time.monotonic,
+                   history_path="run_states.jsonl")
+    m.run(max_runs=10)
+"""
+
+import asyncio
+import inspect
+import json
+import os
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Callable
+
+MAX_FAILURES = 5          # failed states without a completed run before giving up
+HISTORY_MAX  = 4 << 20    # bytes of history before it is moved aside to <path>.1
+TAIL         = 4096       # bytes resume_point() reads from the end of the history
+
+
+class StateTimeout(Exception):
+    """A state ran past its timeout."""
+
+
+class Stuck(Exception):
+    """MAX_FAILURES states failed without a run completing; recovery is not working."""
+
+
+@dataclass(slots=True)
+class State:
+    name: str
+    fn: Callable[[int], object]   # fn(run_number); may return the next state's name
+    next: str | None              # None: fn must return the next state
+    timeout: float                # seconds
+    recover: str = "recover"      # state to go to on failure
+    begins_run: bool = False      # stop here once max_runs runs are done
+    ends_run: bool = False        # success completes the current run
+
+
+class RunMachine:
+    def __init__(self, states: dict[str, State], start: str, first_run: int,
+                 clock: Callable[[], float] = time.monotonic,
+                 now: Callable[[], float] = time.time,
+                 history_path: str | None = None,
+                 fatal: tuple[type[BaseException], ...] = (),
+                 max_failures: int = MAX_FAILURES,
+                 next_run: Callable[[int], int] | None = None):
+        self.states = states
+        self.state = start
+        self.run_number = first_run
+        self.clock = clock
+        self.now = now
+        self.history_path = history_path
+        self.fatal = fatal
+        self.max_failures = max_failures
+        self.next_run = next_run or (lambda n: n + 1)   # number of the run after run n
+        self.deadline: float | None = None
+        self.cancelled = threading.Event()    # set when the async runner gives up on a step
+        self.completed = 0
+        self.failures = 0                      # since the last completed run
+        self.failed: Counter[str] = Counter()  # state → failures, whole session
+        self.history: list[dict] = []
+
+    # ── Deadlines ────────────────────────────────────────────────────────────
+    def check(self) -> None:
+        """Raise StateTimeout if the current state is past its deadline (or cancelled)."""
+        if self.cancelled.is_set() or (self.deadline is not None
+                                       and self.clock() > self.deadline):
+            raise StateTimeout(f"{self.state}: no progress after "
+                               f"{self.states[self.state].timeout:.0f}s")
+
+    # ── Transitions ──────────────────────────────────────────────────────────
+    def _begin(self, max_runs: int | None) -> State | None:
+        state = self.states[self.state]
+        if state.begins_run and max_runs is not None and self.completed >= max_runs:
+            return None
+        self.deadline = self.clock() + state.timeout
+        self.cancelled.clear()
+        return state
+
+    def _finish(self, state: State, t0: float, result=None,
+                error: BaseException | None = None) -> None:
+        entry = {"t": round(self.now(), 3), "run": self.run_number, "state": state.name,
+                 "seconds": round(self.clock() - t0, 3)}
+        self.deadline = None
+        if error is None:
+            entry["outcome"] = "ok"
+            if state.ends_run:
+                self.failures = 0
+                self.completed += 1
+                self.run_number = self.next_run(self.run_number)
+            self.state = result if isinstance(result, str) else state.next
+        elif isinstance(error, self.fatal):
+            entry["outcome"] = "aborted"
+        else:
+            entry["outcome"] = "timeout" if isinstance(error, StateTimeout) else "error"
+            entry["error"] = f"{type(error).__name__}: {error}"
+            self.failures += 1
+            self.failed[state.name] += 1
+            self.state = state.recover
+        entry["next"] = self.state
+        self._record(entry)
+        if error is not None and not isinstance(error, self.fatal) \
+                and self.failures >= self.max_failures:
+            raise Stuck(f"{self.failures} failures without a completed run, last in "
+                        f"{state.name}") from error
+
+    def _record(self, entry: dict) -> None:
+        self.history.append(entry)
+        if self.history_path:
+            try:
+                if os.path.exists(self.history_path) \
+                        and os.path.getsize(self.history_path) > HISTORY_MAX:
+                    os.replace(self.history_path, self.history_path + ".1")
+                with open(self.history_path, "a") as f:
+                    f.write(json.dumps(entry) + "\n")
+            except OSError:
+                pass
+
+    # ── Running ──────────────────────────────────────────────────────────────
+    def run(self, max_runs: int | None = None) -> None:
+        """Step through states until *max_runs* runs are done (or forever)."""
+        while (state := self._begin(max_runs)) is not None:
+            t0 = self.clock()
+            try:
+                result = state.fn(self.run_number)
+            except Exception as e:
+                self._finish(state, t0, error=e)
+                if isinstance(e, self.fatal):
+                    raise
+                continue
+            self._finish(state, t0, result)
+
+    async def run_async(self, max_runs: int | None = None) -> None:
+        """As run(), for steps that may return awaitables (cancelled at the deadline)."""
+        while (state := self._begin(max_runs)) is not None:
+            t0 = self.clock()
+            try:
+                result = state.fn(self.run_number)
+                if inspect.isawaitable(result):
+                    task = asyncio.ensure_future(result)
+                    done, _ = await asyncio.wait({task}, timeout=state.timeout)
+                    if not done:
+                        # Stop blocking work through check(), and let it finish
+                        # before anything else runs
+                        self.cancelled.set()
+                        task.cancel()
+                        await asyncio.wait({task})
+                        if not task.cancelled():
+                            task.exception()   # retrieved: the timeout is what counts
+                        raise StateTimeout(f"{state.name}: no progress after "
+                                           f"{state.timeout:.0f}s")
+                    result = task.result()
+            except Exception as e:
+                self._finish(state, t0, error=e)
+                if isinstance(e, self.fatal):
+                    raise
+                continue
+            self._finish(state, t0, result)
+
+    def summary(self, elapsed: float) -> str:
+        """Runs, effective runs/hour over *elapsed* seconds and failures by state."""
+        rate = self.completed / elapsed * 3600 if elapsed > 0 else 0.0
+        line = f"{self.completed} runs in {elapsed / 60:.1f} min  ({rate:.0f} runs/hour)"
+        if self.failed:
+            line += "  failures: " + ", ".join(f"{k} {v}" for k, v in self.failed.most_common())
+        return line
+
+
+def resume_point(path: str) -> dict | None:
+    """Last history entry in *path* (None if there is no history)."""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            f.seek(max(0, os.path.getsize(path) - TAIL))
+            lines = [line for line in f.read().splitlines() if line.strip()]
+        return json.loads(lines[-1]) if lines else None
+    except (OSError, ValueError):
+        return None
@@ -0,0 +1,350 @@
+"""
+run_store.py
+
+Every run's results in one SQLite database (runs.db), instead of a text
+line appended to runs.log and totals.txt reread and rewritten in full.
+
+Tables
+------
+    runs        one row per run: run number, start time, summary line,
+                screenshot kept (or NULL), writing process
+    phases      (run, name, seconds, source): how long each state took
+                ("state") and the run's own measurements such as the walk
+                and the kill ("stat")
+    detections  (run, kind, name, x, y): every loot label found in the
+                run's first frame
+    ocr_items   (run, name, class, x, y, confidence): the OCR pass, if any
+    counts      (run, key, n): what the run added to the totals —
+                total_runes_found, shael_runes_found, ...; run is NULL for
+                totals imported from totals.txt
+    run_claims  run numbers handed out by claim_run()
+
+Totals and rates are indexed aggregate queries (counts by key, runs by
+start time), so nothing is reread per run.  add() only queues a RunRecord;
+every FLUSH_EVERY records (and on flush(), close() and before any query)
+the queue is written with executemany() in one transaction.
+
+The database is in WAL mode with a BUSY_TIMEOUT, and every write is one
+BEGIN IMMEDIATE transaction, so several bot processes (and the CLI) can
+share it: readers never block, writers queue up instead of failing.
+Run numbers come from claim_run(), one past anything stored or claimed,
+in a write transaction, so two bots sharing the file never number a run
+alike.
+Within a process one RunStore may be used from several threads (the bot
+and its artifact writer); a lock keeps the queue and the connection to one
+thread at a time.
+
+    store = RunStore("runs.db")
+    store.add(RunRecord(run_number=7, started=time.time(), summary="RUNE x1",
+                        counts={"total_runes_found": 1}))
+    store.totals()["total_runes_found"]
+
+    python run_store.py                              # totals, rates, last runs
+    python run_store.py --import runs.log totals.txt # one-shot legacy import
+                                                     # (the bot does it on first open)
+"""
+
+import argparse
+import os
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+
+DB_PATH      = "runs.db"
+FLUSH_EVERY  = 1      # queued runs written per transaction
+BUSY_TIMEOUT = 10.0   # seconds a writer waits for another process's lock
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id          INTEGER PRIMARY KEY,
+    run_number  INTEGER NOT NULL,
+    started     REAL    NOT NULL,          -- epoch seconds
+    summary     TEXT    NOT NULL DEFAULT '',
+    screenshot  TEXT,
+    pid         INTEGER
+);
+CREATE INDEX IF NOT EXISTS runs_started ON runs (started);
+CREATE INDEX IF NOT EXISTS runs_number  ON runs (run_number);
+
+CREATE TABLE IF NOT EXISTS phases (
+    run_id   INTEGER NOT NULL REFERENCES runs (id),
+    name     TEXT    NOT NULL,
+    seconds  REAL    NOT NULL,
+    source   TEXT    NOT NULL               -- 'state' or 'stat'
+);
+CREATE INDEX IF NOT EXISTS phases_run  ON phases (run_id);
+CREATE INDEX IF NOT EXISTS phases_name ON phases (name, source);
+
+CREATE TABLE IF NOT EXISTS detections (
+    run_id  INTEGER NOT NULL REFERENCES runs (id),
+    kind    TEXT    NOT NULL,
+    name    TEXT    NOT NULL DEFAULT '',
+    x       INTEGER,
+    y       INTEGER
+);
+CREATE INDEX IF NOT EXISTS detections_run  ON detections (run_id);
+CREATE INDEX IF NOT EXISTS detections_kind ON detections (kind, name);
+
+CREATE TABLE IF NOT EXISTS ocr_items (
+    run_id          INTEGER NOT NULL REFERENCES runs (id),
+    name            TEXT    NOT NULL,
+    classification  TEXT    NOT NULL,
+    x               INTEGER,
+    y               INTEGER,
+    confidence      REAL
+);
+CREATE INDEX IF NOT EXISTS ocr_items_run  ON ocr_items (run_id);
+CREATE INDEX IF NOT EXISTS ocr_items_name ON ocr_items (name);
+
+CREATE TABLE IF NOT EXISTS counts (
+    run_id  INTEGER REFERENCES runs (id),   -- NULL: imported totals
+    key     TEXT    NOT NULL,
+    n       INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS counts_key ON counts (key, n);
+CREATE INDEX IF NOT EXISTS counts_run ON counts (run_id);
+
+CREATE TABLE IF NOT EXISTS run_claims (
+    run_number  INTEGER PRIMARY KEY,       -- taken by claim_run()
+    pid         INTEGER,
+    claimed     REAL
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key    TEXT PRIMARY KEY,
+    value  TEXT NOT NULL
+);
+"""
+
+# Totals every report shows, even before anything was found
+TOTAL_KEYS = ("total_runes_found", "mal_plus_runes_found", "total_charms_found")
+
+
+@dataclass(slots=True)
+class RunRecord:
+    run_number: int
+    started: float                                     # epoch seconds
+    summary: str = ""
+    screenshot: str | None = None
+    phases: dict[str, float] = field(default_factory=dict)   # state → seconds
+    stats: dict[str, float] = field(default_factory=dict)    # measurement → seconds
+    detections: list[tuple] = field(default_factory=list)    # (kind, name, x, y)
+    items: list[tuple] = field(default_factory=list)         # (name, class, x, y, conf)
+    counts: dict[str, int] = field(default_factory=dict)     # totals key → added
+
+
+class RunStore:
+    def __init__(self, path: str = DB_PATH, flush_every: int = FLUSH_EVERY):
+        self.path = path
+        self.flush_every = flush_every
+        self.pending: list[RunRecord] = []
+        # One connection shared by the bot and its artifact writer thread:
+        # the queue, every transaction and every query hold this lock
+        self._lock = threading.RLock()
+        # Autocommit mode; transactions are opened explicitly in _write()
+        self.db = sqlite3.connect(path, timeout=BUSY_TIMEOUT, isolation_level=None,
+                                  check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        with self._write() as db:
+            for stmt in SCHEMA.split(";"):
+                if stmt.strip():
+                    db.execute(stmt)
+
+    def _write(self):
+        """Context manager: one BEGIN IMMEDIATE ... COMMIT (ROLLBACK on error)."""
+        return _Transaction(self.db, self._lock)
+
+    # ── Writing ──────────────────────────────────────────────────────────────
+    def add(self, record: RunRecord) -> None:
+        """Queue *record*; written with the next flush."""
+        with self._lock:
+            self.pending.append(record)
+            if len(self.pending) >= self.flush_every:
+                self.flush()
+
+    def flush(self) -> None:
+        """Write every queued record in one transaction."""
+        with self._lock:
+            if not self.pending:
+                return
+            with self._write() as db:
+                self._insert(db, self.pending)
+            self.pending = []   # only once committed; a failed write is retried next flush
+
+    @staticmethod
+    def _insert(db: sqlite3.Connection, records: list[RunRecord]) -> None:
+        pid = os.getpid()
+        for r in records:
+            run_id = db.execute(
+                "INSERT INTO runs (run_number, started, summary, screenshot, pid) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (r.run_number, r.started, r.summary, r.screenshot, pid)).lastrowid
+            db.executemany("INSERT INTO phases VALUES (?, ?, ?, ?)",
+                           [(run_id, k, v, "state") for k, v in r.phases.items()]
+                           + [(run_id, k, v, "stat") for k, v in r.stats.items()])
+            db.executemany("INSERT INTO detections VALUES (?, ?, ?, ?, ?)",
+                           [(run_id, *d) for d in r.detections])
+            db.executemany("INSERT INTO ocr_items VALUES (?, ?, ?, ?, ?, ?)",
+                           [(run_id, *it) for it in r.items])
+            db.executemany("INSERT INTO counts VALUES (?, ?, ?)",
+                           [(run_id, k, n) for k, n in r.counts.items() if n])
+
+    def claim_run(self) -> int:
+        """
+        A run number for this process alone: one past every number stored or
+        claimed by any process sharing the database.
+        """
+        with self._write() as db:
+            n = db.execute("SELECT MAX((SELECT COALESCE(MAX(run_number), 0) FROM runs), "
+                           "(SELECT COALESCE(MAX(run_number), 0) FROM run_claims)) + 1"
+                           ).fetchone()[0]
+            db.execute("INSERT INTO run_claims VALUES (?, ?, ?)", (n, os.getpid(), time.time()))
+        return n
+
+    def close(self) -> None:
+        with self._lock:
+            self.flush()
+            self.db.close()
+
+    # ── Queries ──────────────────────────────────────────────────────────────
+    def _query(self, sql: str, args=()) -> list[tuple]:
+        with self._lock:
+            self.flush()
+            return self.db.execute(sql, args).fetchall()
+
+    def last_run_number(self) -> int:
+        return self._query("SELECT COALESCE(MAX(run_number), 0) FROM runs")[0][0]
+
+    def totals(self) -> dict[str, int]:
+        """All-time counts by key (TOTAL_KEYS always present)."""
+        totals = dict.fromkeys(TOTAL_KEYS, 0)
+        totals.update(self._query("SELECT key, SUM(n) FROM counts GROUP BY key"))
+        return totals
+
+    def rates(self, since: float = 0.0) -> dict[str, float]:
+        """Runs, runs per hour and counts per run for runs started at or after *since*."""
+        runs, first, last = self._query(
+            "SELECT COUNT(*), MIN(started), MAX(started) FROM runs WHERE started >= ?",
+            (since,))[0]
+        out = {"runs": runs, "runs_per_hour": 0.0}
+        if runs > 1 and last > first:
+            out["runs_per_hour"] = (runs - 1) * 3600 / (last - first)
+        for key, n in self._query(
+                "SELECT c.key, SUM(c.n) FROM counts c JOIN runs r ON r.id = c.run_id "
+                "WHERE r.started >= ? GROUP BY c.key", (since,)):
+            out[f"{key}_per_run"] = n / runs
+        return out
+
+    def phase_means(self, source: str = "state") -> dict[str, float]:
+        return dict(self._query("SELECT name, AVG(seconds) FROM phases WHERE source = ? "
+                                "GROUP BY name", (source,)))
+
+    def recent(self, n: int = 10) -> list[tuple]:
+        """(run_number, started, summary) of the last *n* runs, oldest first."""
+        rows = self._query("SELECT run_number, started, summary FROM runs "
+                           "ORDER BY started DESC, id DESC LIMIT ?", (n,))
+        return rows[::-1]
+
+    # ── Legacy import ────────────────────────────────────────────────────────
+    def import_legacy(self, run_log: str | None, totals_file: str | None) -> tuple[int, int]:
+        """
+        Load an old runs.log and totals.txt, once per database (later calls
+        are no-ops).  Returns (runs imported, totals keys imported).  Logged
+        runs keep their summary and key=Ns measurements; the counts come from
+        totals.txt alone, so nothing is counted twice.
+        """
+        records = list(parse_run_log(run_log)) if run_log and os.path.exists(run_log) else []
+        totals = parse_totals(totals_file) if totals_file and os.path.exists(totals_file) else {}
+        if not records and not totals:
+            return 0, 0   # nothing to import (yet)
+        self.flush()
+        with self._write() as db:   # check and import in one transaction: one process wins
+            if db.execute("SELECT 1 FROM meta WHERE key = 'legacy_imported'").fetchone():
+                return 0, 0
+            self._insert(db, records)
+            db.executemany("INSERT INTO counts VALUES (NULL, ?, ?)", totals.items())
+            db.execute("INSERT INTO meta VALUES ('legacy_imported', ?)",
+                       (datetime.now().isoformat(timespec="seconds"),))
+        return len(records), len(totals)
+
+
+class _Transaction:
+    def __init__(self, db: sqlite3.Connection, lock: threading.RLock):
+        self.db = db
+        self.lock = lock
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.lock.acquire()
+        try:
+            self.db.execute("BEGIN IMMEDIATE")
+        except BaseException:
+            self.lock.release()
+            raise
+        return self.db
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        try:
+            self.db.execute("COMMIT" if exc_type is None else "ROLLBACK")
+        finally:
+            self.lock.release()
+
+
+# ── Legacy formats ────────────────────────────────────────────────────────────
+_LOG_LINE = re.compile(r"^(\d{8}_\d{6})\s+run=(\d+)\s+(.*)$")
+_STAT     = re.compile(r"\s+(\w+)=([\d.]+)s(?=\s|$)")
+
+
+def parse_run_log(path: str):
+    """RunRecords from runs.log lines: "<stamp>  run=N  <summary>  walk=1.23s ..."."""
+    with open(path) as f:
+        for line in f:
+            m = _LOG_LINE.match(line.strip())
+            if not m:
+                continue
+            stamp, number, rest = m.groups()
+            stats = {k: float(v) for k, v in _STAT.findall(" " + rest)}
+            yield RunRecord(run_number=int(number),
+                            started=datetime.strptime(stamp, "%Y%m%d_%H%M%S").timestamp(),
+                            summary=_STAT.sub("", " " + rest).strip(), stats=stats)
+
+
+def parse_totals(path: str) -> dict[str, int]:
+    """key=value lines of totals.txt."""
+    totals = {}
+    with open(path) as f:
+        for line in f:
+            key, sep, val = line.strip().partition("=")
+            if sep and val.strip().lstrip("-").isdigit():
+                totals[key] = int(val)
+    return totals
+
+
+def main():
+    import bot
+
+    parser = argparse.ArgumentParser(description="Run store totals, rates and legacy import.")
+    parser.add_argument("--db", default=bot.RUN_STORE)
+    parser.add_argument("--import", dest="legacy", nargs=2, metavar=("RUN_LOG", "TOTALS"),
+                        help="import an old runs.log and totals.txt (once)")
+    parser.add_argument("-n", type=int, default=10, help="recent runs to list")
+    args = parser.parse_args()
+
+    store = RunStore(args.db)
+    if args.legacy:
+        runs, keys = store.import_legacy(*args.legacy)
+        print(f"Imported {runs} runs and {keys} totals from {' and '.join(args.legacy)}")
+    for number, started, summary in store.recent(args.n):
+        print(f"{datetime.fromtimestamp(started):%Y%m%d_%H%M%S}  run={number}  {summary}")
+    print("  ".join(f"{k}={v}" for k, v in store.totals().items()))
+    rates = store.rates()
+    print(f"{rates['runs']} runs, {rates['runs_per_hour']:.1f} runs/hour, "
+          f"{rates.get('total_runes_found_per_run', 0):.3f} runes/run")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
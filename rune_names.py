@@ -0,0 +1,195 @@
+"""
+rune_names.py
+
+Reads which rune a "Rune" label names, so totals can count every rune by
+name (and Mal or better separately) without a full-screen OCR pass.
+
+find_runes gives the centre of the word "Rune"; the rune's name is the
+word just left of it.  name_mask() cuts a NAME_MAX_W x ROW_H strip ending
+at the left edge of "Rune", masks the rune-orange pixels and keeps the
+rightmost run of text columns (letters are a few pixels apart, the space
+before "Rune" and anything further left are at least NAME_GAP).  classify()
+compares that mask with one template per rune name in templates/runes/
+(the same orange mask, cut from a real label): only templates within
+WIDTH_TOL pixels of its width are tried — so "El" never matches the end
+of "Shael" — and the best normalised correlation of at least MATCH_MIN
+wins.  The strip is ~100x22 pixels and a handful of templates survive the
+width check, so a label costs well under a millisecond.
+
+Coverage: with pickit rules (bot.PICKIT_FILE, the default) the OCR pass
+reads every label it finds in full, so any of the 33 runes, Mal and up
+included, is named (and counted) from the OCR.  This module names the
+rest: every rune without pickit rules, and with them the "Rune" labels
+the OCR missed.  It names a rune only when templates/runes/ holds its
+template.  The shipped ones are the runes in the sample screenshots (Amn,
+Eth, Ral, Shael, Tal, Thul), none of them Mal or higher, so such a Mal+
+rune counts as an unnamed rune until its template is cut.  Names without
+a template read as None.  Cut the missing templates from loot screenshots
+of earlier runs, named by the OCR:
+
+    python rune_names.py                    # screens_from_runs/, samples/
+    python rune_names.py some/dir a.png     # or these
+
+    name = classify(img, 239, 312)   # "Shael"
+    is_mal_plus(name)                # False
+"""
+
+import argparse
+import glob
+import os
+
+import cv2
+import numpy as np
+
+import template_bank
+
+RUNES = ("El", "Eld", "Tir", "Nef", "Eth", "Ith", "Tal", "Ral", "Ort", "Thul",
+         "Amn", "Sol", "Shael", "Dol", "Hel", "Io", "Lum", "Ko", "Fal", "Lem",
+         "Pul", "Um", "Mal", "Ist", "Gul", "Vex", "Ohm", "Lo", "Sur", "Ber",
+         "Jah", "Cham", "Zod")   # rune number order
+MAL_PLUS = frozenset(RUNES[RUNES.index("Mal"):])
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            "templates", "runes")
+
+# Rune-orange, as ocr_items reads it
+ORANGE_LO = np.array([8, 140, 160])
+ORANGE_HI = np.array([22, 255, 255])
+
+RUNE_HALF_W = 31    # half the width of the "Rune" word template (find_runes)
+ROW_H       = 22    # strip height, centred on the hit (the template's height)
+NAME_MAX_W  = 100   # widest name strip, pixels ("Shael" is ~60)
+NAME_GAP    = 9     # columns without text that end the name (letters are ~5 apart)
+WIDTH_TOL   = 4     # template and name widths may differ by this many pixels
+MATCH_MIN   = 0.7   # correlation that counts as a read
+PAD         = 2     # pixels around the name the templates may shift by
+
+
+def rune_of(item_name: str) -> str | None:
+    """"Shael Rune" → "Shael"; None for anything that is not a rune."""
+    name = item_name.removesuffix(" Rune")
+    return name if name != item_name and name in RUNES else None
+
+
+def is_mal_plus(name: str | None) -> bool:
+    return name in MAL_PLUS
+
+
+def name_mask(img: np.ndarray, x: int, y: int) -> np.ndarray | None:
+    """
+    Orange mask (0/255) of the name left of the "Rune" centred at (*x*, *y*),
+    cropped tight, or None if there is no text there.
+    """
+    right = x - RUNE_HALF_W
+    left = max(0, right - NAME_MAX_W)
+    top = max(0, y - ROW_H // 2)
+    strip = img[top:y + ROW_H // 2, left:max(left, right)]
+    if strip.size == 0:
+        return None
+    mask = cv2.inRange(cv2.cvtColor(strip, cv2.COLOR_BGR2HSV), ORANGE_LO, ORANGE_HI)
+    cols = np.flatnonzero(mask.any(axis=0))
+    if not len(cols):
+        return None
+    # Rightmost run of columns with gaps under NAME_GAP
+    gaps = np.flatnonzero(np.diff(cols) > NAME_GAP)
+    c0 = cols[gaps[-1] + 1] if len(gaps) else cols[0]
+    word = mask[:, c0:cols[-1] + 1]
+    rows = np.flatnonzero(word.any(axis=1))
+    return word[rows[0]:rows[-1] + 1]
+
+
+# ── Templates ────────────────────────────────────────────────────────────────
+_templates = None
+
+
+def _load_templates():
+    pairs = []
+    for name in RUNES:
+        path = os.path.join(TEMPLATE_DIR, f"{name}.png")
+        tmpl = cv2.imread(path, cv2.IMREAD_GRAYSCALE) if os.path.exists(path) else None
+        if tmpl is not None:
+            _, tmpl = cv2.threshold(tmpl, 127, 255, cv2.THRESH_BINARY)
+            pairs.append((name, tmpl))
+    return pairs
+
+
+def _get_templates() -> list[tuple[str, np.ndarray]]:
+    global _templates
+    if _templates is None:
+        entry = template_bank.cached(
+            "rune_names", template_bank.png_sources(TEMPLATE_DIR) + [__file__],
+            lambda: template_bank.pack_images(_load_templates()))
+        _templates = template_bank.unpack_images(entry)
+    return _templates
+
+
+def classify_mask(mask: np.ndarray) -> tuple[str | None, float]:
+    """Best-matching rune name for a name_mask() and its score (None below MATCH_MIN)."""
+    padded = cv2.copyMakeBorder(mask, PAD, PAD, PAD, PAD, cv2.BORDER_CONSTANT, value=0)
+    best, best_score = None, MATCH_MIN
+    for name, tmpl in _get_templates():
+        if abs(tmpl.shape[1] - mask.shape[1]) > WIDTH_TOL:
+            continue
+        if tmpl.shape[0] > padded.shape[0] or tmpl.shape[1] > padded.shape[1]:
+            continue
+        score = float(cv2.matchTemplate(padded, tmpl, cv2.TM_CCOEFF_NORMED).max())
+        if score >= best_score:
+            best, best_score = name, score
+    return best, (best_score if best else 0.0)
+
+
+def classify(img: np.ndarray, x: int, y: int) -> str | None:
+    """Name of the rune whose "Rune" word find_runes found at (*x*, *y*) in *img*."""
+    mask = name_mask(img, x, y)
+    return None if mask is None else classify_mask(mask)[0]
+
+
+# ── Building templates ───────────────────────────────────────────────────────
+HIT_DIST = 60   # OCR line centre to "Rune" centre, at most, pixels
+
+
+def harvest(img: np.ndarray) -> dict[str, np.ndarray]:
+    """Name masks in one screenshot, keyed by the rune name the OCR reads there."""
+    import find_runes
+    import ocr_items
+
+    runes = [(rune_of(it.name), it) for it in ocr_items.read_items_img(img)]
+    masks = {}
+    for x, y in find_runes.find_runes_img(img):
+        near = [(name, it) for name, it in runes
+                if name and abs(it.y - y) <= ROW_H // 2 and abs(it.x - x) <= HIT_DIST]
+        mask = name_mask(img, x, y)
+        if len(near) == 1 and mask is not None:
+            masks[near[0][0]] = mask
+    return masks
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cut rune name templates from loot screenshots.")
+    parser.add_argument("paths", nargs="*", default=["screens_from_runs", "samples"],
+                        help="loot screenshots or dirs (default: %(default)s)")
+    parser.add_argument("--force", action="store_true", help="replace existing templates")
+    args = parser.parse_args()
+
+    files = []
+    for p in args.paths:
+        files += (glob.glob(os.path.join(p, "**", "*.png"), recursive=True)
+                  if os.path.isdir(p) else glob.glob(p))
+    os.makedirs(TEMPLATE_DIR, exist_ok=True)
+    for f in sorted(files):
+        img = cv2.imread(f)
+        if img is None:
+            continue
+        for name, mask in harvest(img).items():
+            out = os.path.join(TEMPLATE_DIR, f"{name}.png")
+            if args.force or not os.path.exists(out):
+                cv2.imwrite(out, mask)
+                print(f"{name:<6} ← {f}")
+    have = {os.path.splitext(n)[0] for n in os.listdir(TEMPLATE_DIR)}
+    missing = [n for n in RUNES if n not in have]
+    print(f"{len(RUNES) - len(missing)}/{len(RUNES)} rune names have a template"
+          + (f"; missing: {' '.join(missing)}" if missing else ""))
+
+
+if __name__ == "__main__":
+    main()
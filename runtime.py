@@ -0,0 +1,244 @@
+"""
+runtime.py
+
+Asyncio runtime for bot.py: one capture stream, many watchers.
+
+A single CaptureStream task grabs the game window (plus the HUD strip
+below it) at CAPTURE_HZ in an executor thread and publishes each frame.
+Watchers are tasks that subscribe to the stream, so adding one costs no
+extra grabs:
+
+    abort zone   mouse left of ABORT_ZONE_X → stop (replaces _mouse_monitor)
+    scene        classifies every frame (scene classifier, or the UI
+                 template checks when it has no references) → runtime.scene
+    alerts       death / dropped back to character select mid-run → log
+
+The run itself is bot.run_states() on run_state.RunMachine.run_async, each
+state's step wrapped in a coroutine, so a step that overruns its timeout
+is cancelled and recovered from.  Steps that drive input (timelines,
+looting with its detectors) run on a single input thread so they never
+interleave; grabs and scene classification run on executor threads; waits
+for a scene simply await the scene watcher.  bot.main() uses this when
+ASYNC_RUNTIME is True.
+
+The offline harness (replay.py) keeps driving the synchronous
+bot.run_session — its virtual clock does not mix with asyncio's.
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+
+import numpy as np
+
+import bot
+from run_state import State
+
+CAPTURE_HZ = 20
+
+
+def _bounding_region(*regions: dict) -> dict:
+    left = min(r["left"] for r in regions)
+    top = min(r["top"] for r in regions)
+    right = max(r["left"] + r["width"] for r in regions)
+    bottom = max(r["top"] + r["height"] for r in regions)
+    return {"left": left, "top": top, "width": right - left, "height": bottom - top}
+
+
+# The window plus the HUD strip and Play button area, which reach below GAME_H
+STREAM_REGION = _bounding_region(bot.GAME_REGION, bot.GAME_LOAD_REGION,
+                                 bot.PLAY_BUTTON_REGION)
+
+
+def crop(frame: np.ndarray, region: dict, origin: dict = STREAM_REGION) -> np.ndarray:
+    """Cut screen *region* out of a frame grabbed at *origin*."""
+    top, left = region["top"] - origin["top"], region["left"] - origin["left"]
+    return frame[top:top + region["height"], left:left + region["width"]]
+
+
+def classify_frame(frame: np.ndarray) -> str | None:
+    """
+    Scene label for a STREAM_REGION frame: the scene classifier where it has
+    references, otherwise the UI template checks ("town" / "char_select").
+    """
+    clf = bot.scenes()
+    label = clf.classify(crop(frame, bot.GAME_REGION))[0] if clf.labels else None
+    if label is not None:
+        return label
+    fallbacks = (("town", bot.GAME_LOAD_TEMPLATE, bot.GAME_LOAD_REGION),
+                 ("char_select", bot.PLAY_BUTTON_TEMPLATE, bot.PLAY_BUTTON_REGION))
+    for scene, path, region in fallbacks:
+        template = bot.ui_template(path)
+        if not clf.knows(scene) and template is not None:
+            if bot.match_score(crop(frame, region), template) >= bot.MATCH_THRESHOLD:
+                return scene
+    return None
+
+
+class CaptureStream:
+    """Grabs *region* every *interval* seconds and fans frames out to subscribers."""
+
+    def __init__(self, grab, region: dict, interval: float, executor):
+        self.grab = grab
+        self.region = region
+        self.interval = interval
+        self.executor = executor
+        self.seq = 0
+        self.t = 0.0
+        self.frame: np.ndarray | None = None
+        self.subscribers = 0
+        self._cond = asyncio.Condition()
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        deadline = time.perf_counter()
+        while True:
+            frame = await loop.run_in_executor(self.executor, self.grab, self.region)
+            async with self._cond:
+                self.seq += 1
+                self.t = time.perf_counter()
+                self.frame = frame
+                self._cond.notify_all()
+            deadline = max(deadline + self.interval, time.perf_counter())
+            await asyncio.sleep(deadline - time.perf_counter())
+
+    async def frames(self):
+        """Yield (seq, frame) for each new frame; slow consumers skip to the latest."""
+        seen = self.seq
+        self.subscribers += 1
+        try:
+            while True:
+                async with self._cond:
+                    await self._cond.wait_for(lambda: self.seq > seen)
+                    seen, frame = self.seq, self.frame
+                yield seen, frame
+        finally:
+            self.subscribers -= 1
+
+
+class Runtime:
+    def __init__(self, capture_hz: float = CAPTURE_HZ):
+        self.input_pool = ThreadPoolExecutor(1, thread_name_prefix="input")
+        self.capture_pool = ThreadPoolExecutor(1, thread_name_prefix="capture")
+        self.cv_pool = ThreadPoolExecutor(2, thread_name_prefix="cv")
+        self.stream = CaptureStream(bot.capture_region, STREAM_REGION,
+                                    1.0 / capture_hz, self.capture_pool)
+        self.aborted = asyncio.Event()
+        self.scene: str | None = None
+        self.scene_waiters = 0
+        self._scene_changed = asyncio.Condition()
+        self.alerts: list[tuple[float, str]] = []
+        self.in_run = False
+        self._tasks: list[asyncio.Task] = []
+
+    # ── Helpers ──────────────────────────────────────────────────────────────
+    async def blocking(self, fn, *args):
+        """
+        Run a blocking input/phase function on the input thread.  If the
+        awaiting step is cancelled (its state timed out), wait until the
+        function has stopped — it sees the machine's cancel through
+        bot.check_deadline() — so it never overlaps the next state.
+        """
+        fut = asyncio.get_running_loop().run_in_executor(self.input_pool, fn, *args)
+        try:
+            return await asyncio.shield(fut)
+        except asyncio.CancelledError:
+            await asyncio.wait({fut})
+            if not fut.cancelled():
+                fut.exception()   # the step's own StateTimeout; the machine records the timeout
+            raise
+
+    async def cv(self, fn, *args):
+        """Run blocking OpenCV / OCR work on the CV pool."""
+        return await asyncio.get_running_loop().run_in_executor(self.cv_pool, fn, *args)
+
+    def check_abort(self) -> None:
+        if self.aborted.is_set():
+            bot.check_abort()
+
+    # ── Watchers ─────────────────────────────────────────────────────────────
+    async def _abort(self) -> None:
+        bot.abort()    # wakes blocking phases on the input thread
+        self.aborted.set()
+        async with self._scene_changed:
+            self._scene_changed.notify_all()
+
+    async def watch_abort_zone(self) -> None:
+        async for _ in self.stream.frames():
+            if bot.backend.position()[0] < bot.ABORT_ZONE_X:
+                await self._abort()
+                return
+
+    async def watch_scene(self) -> None:
+        async for _, frame in self.stream.frames():
+            # Template fallbacks cost ~30 ms a frame: only run them for a waiter
+            if not bot.scenes().labels and not self.scene_waiters:
+                continue
+            scene = await self.cv(classify_frame, frame)
+            if scene != self.scene:
+                async with self._scene_changed:
+                    self.scene = scene
+                    self._scene_changed.notify_all()
+
+    async def watch_alerts(self) -> None:
+        async with self._scene_changed:
+            while True:
+                await self._scene_changed.wait()
+                if self.in_run and self.scene in ("death", "char_select"):
+                    msg = "character died" if self.scene == "death" else "dropped to character select"
+                    self.alerts.append((time.time(), msg))
+                    print(f"  [ALERT] {msg}")
+
+    async def wait_for_scene(self, scene: str) -> None:
+        """Until the scene watcher reports *scene*; records the load time."""
+        t0 = bot.backend.now()
+        self.scene_waiters += 1
+        try:
+            async with self._scene_changed:
+                await self._scene_changed.wait_for(
+                    lambda: self.scene == scene or self.aborted.is_set())
+        finally:
+            self.scene_waiters -= 1
+        self.check_abort()
+        bot.load_times().record(scene, bot.backend.now() - t0)
+
+    # ── Run ──────────────────────────────────────────────────────────────────
+    def _step(self, state: State):
+        """*state*'s step as a coroutine, timed under phase_times."""
+        async def step(run_number: int):
+            with bot.phase(state.name):
+                if state.name in ("game_load", "char_select"):
+                    return await self.wait_for_scene(
+                        "town" if state.name == "game_load" else "char_select")
+                if state.name == "enter_game":
+                    self.in_run = True
+                elif state.name == "exit_game":
+                    self.in_run = False
+                return await self.blocking(state.fn, run_number)
+        return step
+
+    async def run_session(self, first_run: int, max_runs: int | None = None) -> None:
+        loop = asyncio.get_running_loop()
+        self._tasks = [loop.create_task(coro) for coro in
+                       (self.stream.run(), self.watch_abort_zone(),
+                        self.watch_scene(), self.watch_alerts())]
+        states = {name: replace(s, fn=self._step(s)) for name, s in bot.run_states().items()}
+        machine = bot.run_machine(first_run, states)
+        t0 = bot.backend.now()
+        try:
+            await machine.run_async(max_runs)
+        finally:
+            for task in self._tasks:
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+            for pool in (self.input_pool, self.capture_pool, self.cv_pool):
+                pool.shutdown(wait=False, cancel_futures=True)
+            bot.log(machine.summary(bot.backend.now() - t0))
+            bot.log(f"Capture stream: {self.stream.seq} grabs shared by "
+                    f"{len(self._tasks) - 1} watchers")
+
+
+def run_session(first_run: int, max_runs: int | None = None) -> None:
+    """Blocking entry point: play games on the asyncio runtime."""
+    asyncio.run(Runtime().run_session(first_run, max_runs))
@@ -0,0 +1,201 @@
+"""
+scene_classifier.py
+
+Tells which screen D2R is showing — character select, difficulty menu,
+loading, town, temple, in-game menu, death — from one frame in well under a
+millisecond, so the bot can poll transitions at 20+ Hz.
+
+A frame is reduced to a fingerprint: a FP_W x FP_H grayscale thumbnail
+(area-averaged, 0-1 floats).  Labelled reference shots live in
+templates/scenes/<label>/*.png; classify() returns the label of the
+nearest reference fingerprint, or None when nothing is within
+MAX_DISTANCE (RMS difference per thumbnail pixel).  Add a few references
+per scene from different spots — town in particular looks different
+depending on where you are standing.
+
+LoadTimes learns how long each transition takes (persisted as JSON) and
+picks the poll interval: slow while the transition can't plausibly be done
+yet, fast once it is inside its usual window.
+
+Usage
+-----
+    python scene_classifier.py capture town     # save the game window as a town reference
+    python scene_classifier.py watch            # print the live label and classify rate
+"""
+
+import json
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+import template_bank
+
+SCENES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                          "templates", "scenes")
+
+SCENES = ("char_select", "difficulty", "loading", "town", "temple", "menu", "death")
+
+FP_W, FP_H   = 32, 20     # fingerprint size
+REF_W, REF_H = 160, 100   # size reference shots are stored at
+MAX_DISTANCE = 0.08       # RMS gray difference (0-1) to accept a match
+
+FAST_POLL = 0.04   # seconds between polls inside the expected window (25 Hz)
+SLOW_POLL = 0.25   # ... before it
+HISTORY   = 200    # load times kept per transition
+
+
+def fingerprint(frame: np.ndarray) -> np.ndarray:
+    """Flattened FP_W x FP_H grayscale thumbnail of a BGR frame, 0-1 floats."""
+    # Decimate big frames first; area-averaging 4x4 samples per cell is plenty
+    step = max(1, min(frame.shape[0] // (FP_H * 4), frame.shape[1] // (FP_W * 4)))
+    frame = frame[::step, ::step]
+    if frame.ndim == 3:
+        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(frame, (FP_W, FP_H), interpolation=cv2.INTER_AREA)
+    return small.reshape(-1).astype(np.float32) / 255.0
+
+
+def _reference_files() -> list[tuple[str, str]]:
+    """[(label, path), ...] for every reference shot under SCENES_DIR."""
+    refs = []
+    if os.path.isdir(SCENES_DIR):
+        for label in sorted(os.listdir(SCENES_DIR)):
+            folder = os.path.join(SCENES_DIR, label)
+            if os.path.isdir(folder):
+                refs += [(label, os.path.join(folder, f))
+                         for f in sorted(os.listdir(folder)) if f.lower().endswith(".png")]
+    return refs
+
+
+def _build_references() -> dict[str, np.ndarray]:
+    labels, prints = [], []
+    for label, path in _reference_files():
+        img = cv2.imread(path)
+        if img is not None:
+            labels.append(label)
+            prints.append(fingerprint(img))
+    return {"labels": np.array(labels, dtype=str),
+            "prints": np.array(prints, dtype=np.float32).reshape(-1, FP_W * FP_H)}
+
+
+class SceneClassifier:
+    """Nearest-neighbour lookup over labelled fingerprints."""
+
+    def __init__(self, labels, prints: np.ndarray, max_distance: float = MAX_DISTANCE):
+        self.labels = [str(label) for label in labels]
+        self.prints = np.asarray(prints, dtype=np.float32).reshape(len(self.labels),
+                                                                   FP_W * FP_H)
+        self.max_distance = max_distance
+
+    @classmethod
+    def load(cls) -> "SceneClassifier":
+        """Classifier over templates/scenes (via the template bank)."""
+        sources = [path for _, path in _reference_files()] + [__file__]
+        entry = template_bank.cached("scenes", sources, _build_references)
+        return cls(entry["labels"].tolist(), entry["prints"])
+
+    def knows(self, label: str) -> bool:
+        return label in self.labels
+
+    def classify(self, frame: np.ndarray) -> tuple[str | None, float]:
+        """(label, distance) of the nearest reference; label None if too far."""
+        if not self.labels:
+            return None, float("inf")
+        fp = fingerprint(frame)
+        dists = np.sqrt(((self.prints - fp) ** 2).mean(axis=1))
+        best = int(dists.argmin())
+        dist = float(dists[best])
+        return (self.labels[best] if dist <= self.max_distance else None), dist
+
+
+class LoadTimes:
+    """Learned durations per transition, used to pace polling."""
+
+    def __init__(self, path: str | None = None):
+        self.path = path
+        self.history: dict[str, list[float]] = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path) as f:
+                    self.history = {k: list(v) for k, v in json.load(f).items()}
+            except (OSError, ValueError):
+                self.history = {}
+
+    def poll_interval(self, transition: str, elapsed: float) -> float:
+        """Seconds to wait before the next poll, *elapsed* into *transition*."""
+        times = self.history.get(transition, [])
+        if len(times) < 3:
+            return FAST_POLL
+        # Fast polling from just before the quickest 10% of past loads
+        start_fast = float(np.percentile(times, 10)) - 2 * SLOW_POLL
+        if elapsed >= start_fast:
+            return FAST_POLL
+        return min(SLOW_POLL, max(FAST_POLL, start_fast - elapsed))
+
+    def record(self, transition: str, seconds: float) -> None:
+        times = self.history.setdefault(transition, [])
+        times.append(round(seconds, 3))
+        del times[:-HISTORY]
+        if self.path:
+            try:
+                with open(self.path, "w") as f:
+                    json.dump(self.history, f)
+            except OSError:
+                pass
+
+    def summary(self, transition: str) -> str:
+        times = self.history.get(transition)
+        if not times:
+            return f"{transition}: no data"
+        p10, p50, p90 = np.percentile(times, [10, 50, 90])
+        return (f"{transition}: n={len(times)}  p10 {p10:.2f}s  "
+                f"median {p50:.2f}s  p90 {p90:.2f}s")
+
+
+# ── CLI ───────────────────────────────────────────────────────────────────────
+def _grab_window() -> np.ndarray:
+    import bot
+    return bot.capture_region(bot.GAME_REGION)
+
+
+def capture(label: str) -> None:
+    if label not in SCENES:
+        print(f"Note: '{label}' is not one of the standard scenes {SCENES}")
+    print("Capturing in 3 seconds — switch to D2R...")
+    time.sleep(3)
+    img = cv2.resize(_grab_window(), (REF_W, REF_H), interpolation=cv2.INTER_AREA)
+    folder = os.path.join(SCENES_DIR, label)
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, f"{label}_{time.strftime('%Y%m%d_%H%M%S')}.png")
+    cv2.imwrite(path, img)
+    print(f"Saved {path}")
+
+
+def watch() -> None:
+    clf = SceneClassifier.load()
+    print(f"{len(clf.labels)} references: {sorted(set(clf.labels))}  (Ctrl+C to stop)")
+    n, t0 = 0, time.perf_counter()
+    try:
+        while True:
+            label, dist = clf.classify(_grab_window())
+            n += 1
+            rate = n / (time.perf_counter() - t0)
+            print(f"\r{label or '?':<12} d={dist:.3f}  {rate:5.1f} Hz", end="", flush=True)
+    except KeyboardInterrupt:
+        print()
+
+
+def main():
+    if len(sys.argv) == 3 and sys.argv[1] == "capture":
+        capture(sys.argv[2])
+    elif len(sys.argv) == 2 and sys.argv[1] == "watch":
+        watch()
+    else:
+        print(__doc__.split("Usage")[1])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+"""
+screen_archive.py
+
+Loot screenshots in a few append-only pack files instead of one PNG per
+run (plus a copy in found_runes/) in screens_from_runs/.
+
+Layout of an archive directory (bot.SCREEN_ARCHIVE):
+
+    pack-0000.pack   PNG-encoded frames back to back; a new pack is started
+                     once one reaches PACK_MAX bytes
+    index.jsonl      one line per stored frame ("obj": digest, pack, offset,
+                     size) and one per reference to it ("ref": name, digest,
+                     run, tags)
+
+Frames are addressed by the SHA-1 of their pixels (and shape), so an
+identical crop is stored once however many runs or imports refer to it.
+A frame's bytes are written and flushed before its index line, and a
+torn last index line is ignored on load, so a crash never leaves the index
+pointing at missing data.  There is one writer per archive (the bot's
+artifact writer thread); any number of readers.
+
+What is kept is decided before a frame is encoded (keep()): every run that
+picked anything up (its tags are the kinds and rune names picked), and one
+in SAMPLE_EVERY of the runs without loot, so the archive grows with the
+finds rather than with the runs.  prune() applies a
+stricter policy to an existing archive by copying what it keeps into new
+packs.
+
+Reads memory-map the packs: get() decodes a frame straight from the
+mapping, with no read of the file around it, so tools can pick frames at
+random out of tens of thousands.
+
+    archive = ScreenArchive("screen_archive")
+    if keep(run_number, ["Rune"]):
+        archive.put(img, "run_20260219_140320", run=7, tags=["Rune", "Shael"])
+    for ref, img in archive.frames(tag="Rune"): ...
+
+    python screen_archive.py                          # what is stored
+    python screen_archive.py --import screens_from_runs
+    python screen_archive.py --export out/ --tag Rune
+    python screen_archive.py --prune 50               # keep 1 in 50 runs without loot
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import mmap
+import os
+from dataclasses import dataclass
+
+import cv2
+import numpy as np
+
+ARCHIVE_DIR  = "screen_archive"
+INDEX        = "index.jsonl"
+PACK_MAX     = 256 << 20      # bytes per pack file before a new one is started
+SAMPLE_EVERY = 20             # one in this many runs without loot is kept
+
+
+@dataclass(frozen=True, slots=True)
+class Obj:
+    digest: str
+    pack: int
+    offset: int
+    size: int
+
+
+@dataclass(frozen=True, slots=True)
+class Ref:
+    name: str
+    digest: str
+    run: int = 0
+    tags: tuple[str, ...] = ()
+
+
+def keep(run: int, tags, sample_every: int = SAMPLE_EVERY) -> bool:
+    """Whether run *run*'s frame, tagged with what it picked up, is worth archiving."""
+    return bool(tags) or run % max(1, sample_every) == 0
+
+
+def digest_of(img: np.ndarray) -> str:
+    h = hashlib.sha1(repr(img.shape).encode())
+    h.update(np.ascontiguousarray(img).data)
+    return h.hexdigest()
+
+
+def is_archive(path: str) -> bool:
+    return os.path.isfile(os.path.join(path, INDEX))
+
+
+class ScreenArchive:
+    def __init__(self, root: str = ARCHIVE_DIR, pack_max: int = PACK_MAX):
+        self.root = root
+        self.pack_max = pack_max
+        self.objects: dict[str, Obj] = {}
+        self.refs: list[Ref] = []
+        self._by_name: dict[str, Ref] = {}
+        self._maps: dict[int, tuple[object, mmap.mmap]] = {}
+        self._pack = 0   # the pack new frames go to
+        os.makedirs(root, exist_ok=True)
+        self._load()
+        self._index = open(os.path.join(root, INDEX), "a", encoding="utf-8")
+
+    def _load(self) -> None:
+        path = os.path.join(self.root, INDEX)
+        if not os.path.exists(path):
+            return
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue   # torn last line of an interrupted write
+                if "obj" in entry:
+                    self.objects[entry["obj"]] = Obj(entry["obj"], entry["pack"],
+                                                     entry["offset"], entry["size"])
+                    self._pack = max(self._pack, entry["pack"])
+                elif "ref" in entry and entry["digest"] in self.objects:
+                    self._add_ref(Ref(entry["ref"], entry["digest"], entry.get("run", 0),
+                                      tuple(entry.get("tags", ()))))
+
+    def _add_ref(self, ref: Ref) -> None:
+        self.refs.append(ref)
+        self._by_name[ref.name] = ref
+
+    def _pack_path(self, pack: int) -> str:
+        return os.path.join(self.root, f"pack-{pack:04d}.pack")
+
+    def _append_index(self, entry: dict) -> None:
+        self._index.write(json.dumps(entry) + "\n")
+        self._index.flush()
+
+    # ── Writing ──────────────────────────────────────────────────────────────
+    def put(self, img: np.ndarray, name: str, run: int = 0, tags=()) -> str:
+        """Store *img* under *name* (once per distinct frame); returns its digest."""
+        digest = digest_of(img)
+        if digest not in self.objects:
+            ok, data = cv2.imencode(".png", img)
+            if not ok:
+                raise ValueError("PNG encoding failed")
+            self._write_object(digest, data.tobytes())
+        ref = Ref(name, digest, run, tuple(tags))
+        self._append_index({"ref": ref.name, "digest": digest, "run": run, "tags": list(ref.tags)})
+        self._add_ref(ref)
+        return digest
+
+    def _write_object(self, digest: str, data: bytes) -> None:
+        path = self._pack_path(self._pack)
+        if os.path.exists(path) and os.path.getsize(path) + len(data) > self.pack_max:
+            self._pack += 1
+            path = self._pack_path(self._pack)
+        pack = self._pack
+        with open(path, "ab") as f:
+            offset = f.tell()
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        obj = Obj(digest, pack, offset, len(data))
+        self._append_index({"obj": digest, "pack": pack, "offset": offset, "size": len(data)})
+        self.objects[digest] = obj
+
+    # ── Reading ──────────────────────────────────────────────────────────────
+    def _map(self, obj: Obj) -> mmap.mmap:
+        """The pack holding *obj*, memory-mapped (remapped if it has grown since)."""
+        held = self._maps.get(obj.pack)
+        if held is None or len(held[1]) < obj.offset + obj.size:
+            if held is not None:
+                held[1].close()
+                held[0].close()
+            f = open(self._pack_path(obj.pack), "rb")
+            held = self._maps[obj.pack] = (f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        return held[1]
+
+    def get(self, digest: str) -> np.ndarray:
+        """The frame stored under *digest* (BGR)."""
+        obj = self.objects[digest]
+        data = np.frombuffer(self._map(obj), np.uint8, obj.size, obj.offset)
+        return cv2.imdecode(data, cv2.IMREAD_COLOR)
+
+    def find(self, name: str) -> Ref | None:
+        return self._by_name.get(name)
+
+    def frames(self, tag: str | None = None):
+        """(ref, frame) for every reference, or those tagged *tag*; each frame once."""
+        seen = set()
+        for ref in self.refs:
+            if ref.digest in seen or (tag is not None and tag not in ref.tags):
+                continue
+            seen.add(ref.digest)
+            yield ref, self.get(ref.digest)
+
+    def size(self) -> int:
+        """Bytes of frame data stored."""
+        return sum(o.size for o in self.objects.values())
+
+    def stats(self) -> str:
+        runes = sum(1 for r in self.refs if "Rune" in r.tags)
+        packs = len({o.pack for o in self.objects.values()})
+        return (f"{len(self.refs)} screenshots ({runes} with runes), "
+                f"{len(self.objects)} distinct frames, {self.size() / 2**20:.1f} MB "
+                f"in {packs} pack(s)")
+
+    # ── Retention ────────────────────────────────────────────────────────────
+    def prune(self, sample_every: int = SAMPLE_EVERY) -> tuple[int, int]:
+        """
+        Drop the references keep() rejects under *sample_every* and copy the
+        frames still referenced into new packs; returns (refs, frames) dropped.
+        The old packs are removed only once the new index is in place.
+        """
+        kept = [r for r in self.refs if keep(r.run, r.tags, sample_every)]
+        live = {r.digest for r in kept}
+        old = self.objects
+        old_packs = {o.pack for o in old.values()}
+        self._index.close()
+        tmp = os.path.join(self.root, INDEX + ".new")
+        self._index = open(tmp, "w", encoding="utf-8")
+        self.objects, self._pack = {}, max(old_packs, default=-1) + 1
+        for digest, o in old.items():
+            if digest in live:
+                self._write_object(digest, self._map(o)[o.offset:o.offset + o.size])
+        dropped = len(self.refs) - len(kept)
+        self.refs, self._by_name = [], {}
+        for r in kept:
+            self._append_index({"ref": r.name, "digest": r.digest, "run": r.run,
+                                "tags": list(r.tags)})
+            self._add_ref(r)
+        self._index.close()
+        os.replace(tmp, os.path.join(self.root, INDEX))
+        self._index = open(os.path.join(self.root, INDEX), "a", encoding="utf-8")
+        self._unmap()
+        for pack in old_packs:
+            os.remove(self._pack_path(pack))
+        return dropped, len(old) - len(self.objects)
+
+    def _unmap(self) -> None:
+        for f, mm in self._maps.values():
+            mm.close()
+            f.close()
+        self._maps.clear()
+
+    def close(self) -> None:
+        self._unmap()
+        if not self._index.closed:
+            self._index.close()
+
+
+def import_pngs(archive: ScreenArchive, paths) -> int:
+    """
+    Add every PNG under *paths* (files, dirs or globs), named by file;
+    returns the count.  Imports are run 0, which every policy keeps.
+    """
+    files = []
+    for p in paths:
+        files += (glob.glob(os.path.join(p, "**", "*.png"), recursive=True)
+                  if os.path.isdir(p) else glob.glob(p))
+    added = 0
+    for f in sorted(files):
+        img = cv2.imread(f)
+        if img is None:
+            continue
+        name = os.path.splitext(os.path.basename(f))[0]
+        known = archive.find(name)
+        if known is None or known.digest != digest_of(img):   # found_runes/ copies are not
+            archive.put(img, name)
+            added += 1
+    return added
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Packed, deduplicated loot screenshots.")
+    parser.add_argument("--root", default=ARCHIVE_DIR, help="archive dir (default: %(default)s)")
+    parser.add_argument("--import", dest="import_paths", nargs="+", metavar="PATH",
+                        help="add loot PNGs (files, dirs or globs)")
+    parser.add_argument("--export", metavar="DIR", help="write the frames out as PNGs")
+    parser.add_argument("--tag", help="with --export: only frames with this tag")
+    parser.add_argument("--prune", type=int, metavar="N",
+                        help="keep rune runs and one in N of the others")
+    args = parser.parse_args()
+
+    archive = ScreenArchive(args.root)
+    if args.import_paths:
+        print(f"Imported {import_pngs(archive, args.import_paths)} screenshots.")
+    if args.prune:
+        refs, frames = archive.prune(args.prune)
+        print(f"Pruned {refs} screenshots, {frames} frames.")
+    if args.export:
+        os.makedirs(args.export, exist_ok=True)
+        n = 0
+        for ref, img in archive.frames(args.tag):
+            cv2.imwrite(os.path.join(args.export, f"{ref.name}.png"), img)
+            n += 1
+        print(f"Exported {n} frames to {args.export}")
+    print(archive.stats())
+    archive.close()
+
+
+if __name__ == "__main__":
+    main()
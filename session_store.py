@@ -0,0 +1,327 @@
+"""
+session_store.py
+
+Full-fidelity session recordings: the whole game window at a fixed frame
+rate plus every input call bot.py makes, in one file per session.
+
+File layout (all little-endian)
+-------------------------------
+    header   MAGIC, u4 length, JSON {width, height, fps, keyframe_interval, ...}
+    records  u1 kind, f8 timestamp, u4 length, payload
+               KEY    zlib(raw BGR frame)
+               DELTA  zlib(frame XOR previous frame)
+               EVENT  JSON [kind, args]          (input call)
+               INDEX  frame table + event list   (written on close)
+    trailer  u8 offset of the INDEX record, INDEX_MAGIC
+
+Consecutive frames are nearly identical, so the XOR delta is mostly zeros
+and compresses to a few percent of a raw frame.  A keyframe every
+keyframe_interval frames bounds how many deltas a random seek has to apply.
+If a recording is cut short (crash, Ctrl+C) there is no trailer; the reader
+then rebuilds the index by walking the record headers.
+
+Usage
+-----
+    # Record: set RECORD_SESSION = True in bot.py, or wrap any backend:
+    rec = RecordingBackend(bot.backend, "sessions/x.session", region)
+    bot.set_backend(rec); rec.start(); ...; rec.close()
+
+    # Read:
+    s = SessionReader("sessions/x.session")
+    img = s.frame_at(s.start + 12.5)     # latest frame at or before t
+
+    python session_store.py sessions/x.session            # summary
+    python session_store.py sessions/x.session --at 12.5  # export a frame
+"""
+
+import argparse
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+
+import numpy as np
+
+import backends
+
+MAGIC       = b"D2RSESS1"
+INDEX_MAGIC = b"D2RSIDX1"
+
+KEY, DELTA, EVENT, INDEX = 0, 1, 2, 3
+
+_RECORD  = struct.Struct("<BdI")    # kind, timestamp, payload length
+_TRAILER = struct.Struct("<Q8s")    # index record offset, INDEX_MAGIC
+
+FRAME_DTYPE = np.dtype([("t", "<f8"), ("kind", "u1"), ("offset", "<u8")])
+
+KEYFRAME_INTERVAL = 30   # frames between keyframes (3 s at 10 fps)
+COMPRESS_LEVEL    = 1    # zlib level; deltas are mostly zeros, 1 is plenty
+
+
+class SessionWriter:
+    """Append frames and input events to a session file (thread-safe)."""
+
+    def __init__(self, path: str, width: int, height: int, fps: float,
+                 keyframe_interval: int = KEYFRAME_INTERVAL, **meta):
+        self.width, self.height = width, height
+        self.keyframe_interval = keyframe_interval
+        self._f = open(path, "wb")
+        self._lock = threading.Lock()
+        self._prev: np.ndarray | None = None
+        self._frames: list[tuple[float, int, int]] = []
+        self._events: list[tuple[float, str, list]] = []
+        self.raw_bytes = 0
+        header = json.dumps({"width": width, "height": height, "fps": fps,
+                             "keyframe_interval": keyframe_interval,
+                             "created": time.time(), **meta}).encode()
+        self._f.write(MAGIC + struct.pack("<I", len(header)) + header)
+
+    def _write(self, kind: int, t: float, payload: bytes) -> int:
+        offset = self._f.tell()
+        self._f.write(_RECORD.pack(kind, t, len(payload)))
+        self._f.write(payload)
+        return offset
+
+    def add_frame(self, t: float, frame: np.ndarray) -> None:
+        if frame.shape != (self.height, self.width, 3):
+            raise ValueError(f"frame shape {frame.shape} != "
+                             f"{(self.height, self.width, 3)}")
+        frame = np.ascontiguousarray(frame, dtype=np.uint8)
+        if self._prev is None or len(self._frames) % self.keyframe_interval == 0:
+            kind, data = KEY, frame
+        else:
+            kind, data = DELTA, np.bitwise_xor(frame, self._prev)
+        payload = zlib.compress(data.tobytes(), COMPRESS_LEVEL)   # outside the lock
+        with self._lock:
+            self._frames.append((t, kind, self._write(kind, t, payload)))
+            self._prev = frame
+            self.raw_bytes += frame.nbytes
+
+    def add_event(self, t: float, kind: str, args) -> None:
+        args = list(args)
+        with self._lock:
+            self._write(EVENT, t, json.dumps([kind, args]).encode())
+            self._events.append((t, kind, args))
+
+    def close(self) -> None:
+        with self._lock:
+            if self._f.closed:
+                return
+            table = np.array(self._frames, dtype=FRAME_DTYPE)
+            payload = (struct.pack("<I", len(table)) + table.tobytes()
+                       + json.dumps(self._events).encode())
+            offset = self._write(INDEX, time.time(), payload)
+            self._f.write(_TRAILER.pack(offset, INDEX_MAGIC))
+            self._f.close()
+
+
+class SessionReader:
+    """Random access to the frames and input events of a session file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._f = open(path, "rb")
+        if self._f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path}: not a session file")
+        (n,) = struct.unpack("<I", self._f.read(4))
+        self.meta = json.loads(self._f.read(n))
+        self.width, self.height = self.meta["width"], self.meta["height"]
+        self._data_start = self._f.tell()
+        self.complete = self._read_index()
+        if not self.complete:
+            self._scan()
+        self.times = self._table["t"]
+        self._keys = np.flatnonzero(self._table["kind"] == KEY)
+        self._cached: tuple[int, np.ndarray] | None = None
+
+    def _read_index(self) -> bool:
+        size = os.fstat(self._f.fileno()).st_size
+        if size < self._data_start + _TRAILER.size:
+            return False
+        self._f.seek(size - _TRAILER.size)
+        offset, magic = _TRAILER.unpack(self._f.read(_TRAILER.size))
+        if magic != INDEX_MAGIC:
+            return False
+        kind, _, payload = self._read_record(offset)
+        if kind != INDEX:
+            return False
+        (n,) = struct.unpack_from("<I", payload)
+        end = 4 + n * FRAME_DTYPE.itemsize
+        self._table = np.frombuffer(payload[4:end], dtype=FRAME_DTYPE)
+        self.events = [tuple(e) for e in json.loads(payload[end:])]
+        return True
+
+    def _scan(self) -> None:
+        """Rebuild the index from record headers (recording cut short)."""
+        frames, events = [], []
+        offset = self._data_start
+        self._f.seek(offset)
+        while True:
+            head = self._f.read(_RECORD.size)
+            if len(head) < _RECORD.size:
+                break
+            kind, t, length = _RECORD.unpack(head)
+            payload_at = self._f.tell()
+            if kind in (KEY, DELTA):
+                self._f.seek(length, os.SEEK_CUR)
+            else:
+                payload = self._f.read(length)
+                if kind == EVENT and len(payload) == length:
+                    ev_kind, args = json.loads(payload)
+                    events.append((t, ev_kind, args))
+            if payload_at + length > os.fstat(self._f.fileno()).st_size:
+                break   # truncated payload
+            if kind in (KEY, DELTA):
+                frames.append((t, kind, offset))
+            offset = payload_at + length
+        self._table = np.array(frames, dtype=FRAME_DTYPE)
+        self.events = events
+
+    def _read_record(self, offset: int) -> tuple[int, float, bytes]:
+        self._f.seek(offset)
+        kind, t, length = _RECORD.unpack(self._f.read(_RECORD.size))
+        return kind, t, self._f.read(length)
+
+    # ── Frames ───────────────────────────────────────────────────────────────
+    def __len__(self) -> int:
+        return len(self._table)
+
+    @property
+    def start(self) -> float:
+        return float(self.times[0]) if len(self) else 0.0
+
+    @property
+    def duration(self) -> float:
+        return float(self.times[-1] - self.times[0]) if len(self) else 0.0
+
+    def frame(self, i: int) -> np.ndarray:
+        """Decode frame *i* (keyframe + deltas; sequential reads reuse work)."""
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        key = self._keys[np.searchsorted(self._keys, i, side="right") - 1]
+        if self._cached is not None and key <= self._cached[0] <= i:
+            j, img = self._cached
+            img = img.copy()
+        else:
+            j, img = key, self._decode(key).copy()
+        for k in range(j + 1, i + 1):
+            np.bitwise_xor(img, self._decode(k), out=img)
+        self._cached = (i, img)
+        return img.copy()
+
+    def _decode(self, i: int) -> np.ndarray:
+        _, _, payload = self._read_record(int(self._table["offset"][i]))
+        flat = np.frombuffer(zlib.decompress(payload), dtype=np.uint8)
+        return flat.reshape(self.height, self.width, 3)   # read-only view
+
+    def index_at(self, t: float) -> int:
+        """Index of the latest frame recorded at or before *t* (0 if none)."""
+        return max(0, int(np.searchsorted(self.times, t, side="right")) - 1)
+
+    def frame_at(self, t: float) -> np.ndarray:
+        return self.frame(self.index_at(t))
+
+    def events_between(self, t0: float, t1: float) -> list[tuple[float, str, list]]:
+        return [e for e in self.events if t0 <= e[0] < t1]
+
+    def close(self) -> None:
+        self._f.close()
+
+
+class RecordingBackend:
+    """
+    Backend wrapper that records a session while the bot runs.
+
+    Input calls are logged (with the wrapped backend's timestamp) before
+    being forwarded; a background thread grabs *region* at *fps*.
+    Everything else (now, sleep, position, grab) passes straight through.
+    """
+
+    def __init__(self, inner, path: str, region: dict, fps: float = 10.0,
+                 keyframe_interval: int = KEYFRAME_INTERVAL):
+        self.inner = inner
+        self.region = region
+        self.fps = fps
+        self.writer = SessionWriter(path, region["width"], region["height"], fps,
+                                    keyframe_interval, region=region)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._capture_loop, daemon=True)
+        self.dropped = 0   # capture ticks skipped because encoding fell behind
+
+    def __getattr__(self, name):
+        return getattr(self.inner, name)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        self.writer.close()
+
+    def _capture_loop(self) -> None:
+        period = 1.0 / self.fps
+        deadline = time.perf_counter()
+        while not self._stop.is_set():
+            self.writer.add_frame(self.inner.now(), self.inner.grab(self.region))
+            deadline += period
+            late = time.perf_counter() - deadline
+            if late > 0:
+                skipped = int(late // period) + 1
+                self.dropped += skipped
+                deadline += skipped * period
+            self._stop.wait(max(0.0, deadline - time.perf_counter()))
+
+    def move_to(self, x: int, y: int, duration: float = 0.0,
+                pause: float | None = None, tween: str = "linear") -> None:
+        self.writer.add_event(self.inner.now(), "move", (x, y, duration))
+        self.inner.move_to(x, y, duration, pause, tween)
+
+    def move(self, x: int, y: int, profile=None) -> None:
+        profile = profile or backends.INSTANT
+        self.move_to(x, y, profile.duration, profile.pause, profile.tween)
+
+    def click(self, pause: float | None = None) -> None:
+        self.writer.add_event(self.inner.now(), "click", self.inner.position())
+        self.inner.click(pause)
+
+    def press(self, key: str, pause: float | None = None) -> None:
+        self.writer.add_event(self.inner.now(), "press", (key,))
+        self.inner.press(key, pause)
+
+    # Same batching as the wrapped backend, but through the recording methods
+    batch = backends.InputBackend.batch
+
+    def _after(self, pause: float | None) -> None:
+        self.inner._after(pause)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect a recorded session.")
+    parser.add_argument("path")
+    parser.add_argument("--at", type=float, metavar="SECONDS",
+                        help="export the frame at this offset from the start")
+    parser.add_argument("-o", "--out", default="session_frame.png")
+    args = parser.parse_args()
+
+    s = SessionReader(args.path)
+    size = os.path.getsize(args.path)
+    raw = len(s) * s.width * s.height * 3
+    keys = len(s._keys)
+    print(f"{args.path}{'' if s.complete else '  (no index — recording cut short)'}")
+    print(f"  {s.width}x{s.height}  {len(s)} frames ({keys} key) over {s.duration:.1f} s, "
+          f"{len(s.events)} input events")
+    if raw:
+        print(f"  {size / 2**20:.1f} MiB on disk vs {raw / 2**20:.0f} MiB raw "
+              f"({size / raw:.1%})")
+    if args.at is not None:
+        import cv2
+        cv2.imwrite(args.out, s.frame_at(s.start + args.at))
+        print(f"  frame at +{args.at:.2f} s → {args.out}")
+
+
+if __name__ == "__main__":
+    main()
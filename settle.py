@@ -0,0 +1,62 @@
+"""
+settle.py
+
+Visual settle detection: tells the bot when the screen has finished
+reacting to an action, so fixed sleeps can become timeout ceilings.
+
+Frames are shrunk to a coarse grayscale thumbnail (every STRIDE-th pixel),
+so each sample costs well under a millisecond beyond the grab.  The
+detector is fed one thumbnail per sample and reports "settled" once
+
+  1. the scene has changed from a thumbnail taken *before* the action by
+     more than CHANGE_THRESHOLD (mean absolute difference, 0-255 levels) —
+     skipped when no "before" is given — and then
+  2. SETTLE_SAMPLES consecutive samples each differ from the previous one
+     by less than SETTLE_THRESHOLD.
+
+Town animations (fire, NPCs) move only a few pixels, far below the
+thresholds; walking scrolls the whole view and a Blade Warp or menu
+redraws it.
+
+bot.wait_settled() drives this against the live screen.
+"""
+
+import numpy as np
+
+STRIDE           = 8     # sample every 8th pixel in each direction
+CHANGE_THRESHOLD = 6.0   # mean abs diff that counts as "the action happened"
+SETTLE_THRESHOLD = 1.5   # mean abs diff between samples that counts as "still"
+SETTLE_SAMPLES   = 3     # consecutive still samples needed
+
+
+def thumbnail(frame: np.ndarray) -> np.ndarray:
+    """Coarse grayscale thumbnail of a BGR frame (int16, ready for diffs)."""
+    small = frame[::STRIDE, ::STRIDE].astype(np.int16)
+    return (small[..., 0] + small[..., 1] + small[..., 2]) // 3
+
+
+def mean_abs_diff(a: np.ndarray, b: np.ndarray) -> float:
+    return float(np.abs(a - b).mean())
+
+
+class SettleDetector:
+    """Feed thumbnails one at a time; feed() returns True once settled."""
+
+    def __init__(self, before: np.ndarray | None = None):
+        self.before = before
+        self.changed = before is None
+        self.still = 0
+        self._prev: np.ndarray | None = None
+
+    def feed(self, thumb: np.ndarray) -> bool:
+        if not self.changed:
+            self.changed = mean_abs_diff(thumb, self.before) > CHANGE_THRESHOLD
+        if self._prev is None:
+            self._prev = thumb
+            return False
+        if mean_abs_diff(thumb, self._prev) < SETTLE_THRESHOLD:
+            self.still += 1
+        else:
+            self.still = 0
+        self._prev = thumb
+        return self.changed and self.still >= SETTLE_SAMPLES
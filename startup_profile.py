@@ -0,0 +1,74 @@
+"""
+startup_profile.py
+
+Measure bot start-up cost: module import time (via python -X importtime)
+and, optionally, the detector warm-up that main() runs on character select.
+
+Each measurement runs in a fresh interpreter so nothing is already cached.
+
+Usage
+-----
+    python startup_profile.py            # import-time table for `import bot`
+    python startup_profile.py --warm     # ... plus bot.warm_up() per stage
+    python startup_profile.py -n 25      # show the 25 slowest imports
+"""
+
+import argparse
+import subprocess
+import sys
+
+WARM_SNIPPET = """
+import time
+t0 = time.perf_counter()
+import bot
+t1 = time.perf_counter()
+timings = bot.warm_up()
+t2 = time.perf_counter()
+print(f"import bot   {(t1 - t0) * 1000:8.1f} ms")
+for name, secs in timings.items():
+    print(f"  {name:<16}{secs * 1000:8.1f} ms")
+print(f"warm_up      {(t2 - t1) * 1000:8.1f} ms")
+"""
+
+
+def import_times(module: str) -> list[tuple[int, int, str]]:
+    """Return [(self_us, cumulative_us, name), ...] from -X importtime."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue   # header row
+        rows.append((int(fields[0]), int(fields[1]), fields[2].rstrip()))
+    if proc.returncode != 0:
+        print(proc.stderr.strip().splitlines()[-1], file=sys.stderr)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("-n", type=int, default=15, help="rows to show")
+    parser.add_argument("--module", default="bot", help="module to import")
+    parser.add_argument("--warm", action="store_true", help="also time bot.warm_up()")
+    args = parser.parse_args()
+
+    rows = import_times(args.module)
+    # Top-level imports (no indent) sum to the whole import cost
+    total = sum(cum for _, cum, name in rows if not name.startswith("  "))
+    print(f"{'self ms':>8} {'cum ms':>8}  module")
+    for self_us, cum_us, name in sorted(rows, key=lambda r: -r[1])[:args.n]:
+        print(f"{self_us / 1000:8.1f} {cum_us / 1000:8.1f}  {name.strip()}")
+    print(f"\nimport {args.module}: {total / 1000:.1f} ms over {len(rows)} modules")
+
+    if args.warm:
+        print()
+        subprocess.run([sys.executable, "-c", WARM_SNIPPET])
+
+
+if __name__ == "__main__":
+    main()
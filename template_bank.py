@@ -0,0 +1,187 @@
+"""
+template_bank.py
+
+Precompiled bundle of every template-derived asset the detectors need:
+letter templates and their binarized / tight-cropped forms, the word
+templates with their colour masks, the item lexicon and its decoding trie.
+
+Everything lives under templates/bank/, one directory per entry named
+after the entry and the hash of the source files it was built from
+(template PNGs, item_names.txt and the .py module that builds it), with
+each array an uncompressed .npy inside it:
+
+    templates/bank/item_trie-3f2a9c0d1e4b5a67/depth.npy
+                                             /edge_char.npy ...
+
+An entry is opened by memory-mapping its .npy files (mmap_mode="r"), so
+nothing is read or copied until a detector touches the pages it uses,
+and the arrays come back read-only.  When a source changes the hash
+no longer matches; the entry alone is rebuilt on first use, written
+to a temporary directory and renamed into place, and its old directory
+removed.  The other entries are left as they are.
+
+Detectors fetch their assets through cached(key, sources, build), so a
+missing or stale bank is never an error — it only costs the old cold start.
+
+Usage
+-----
+    python template_bank.py     # build / refresh every entry
+"""
+
+import hashlib
+import os
+import shutil
+
+import numpy as np
+
+BANK_VERSION = 2
+BANK_DIR     = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            "templates", "bank")
+
+_entries: dict[str, tuple[str, dict[str, np.ndarray]]] = {}   # entry → (hash, arrays)
+_file_hashes: dict[str, str] = {}                             # path → sha1
+_rebuilt: set[str] = set()                                    # entries built this process
+
+
+# ── Hashing ───────────────────────────────────────────────────────────────────
+def _hash_file(path: str) -> str:
+    path = os.path.abspath(path)
+    digest = _file_hashes.get(path)
+    if digest is None:
+        h = hashlib.sha1()
+        try:
+            with open(path, "rb") as f:
+                h.update(f.read())
+        except FileNotFoundError:
+            h.update(b"<missing>")
+        digest = _file_hashes[path] = h.hexdigest()
+    return digest
+
+
+def sources_hash(sources) -> str:
+    """Combined hash of BANK_VERSION and every file in *sources*."""
+    h = hashlib.sha1(f"v{BANK_VERSION}".encode())
+    for path in sorted(os.path.abspath(p) for p in sources):
+        h.update(os.path.basename(path).encode())
+        h.update(_hash_file(path).encode())
+    return h.hexdigest()
+
+
+def png_sources(*dirs: str) -> list[str]:
+    """All .png files directly inside each of *dirs* (missing dirs skipped)."""
+    paths = []
+    for d in dirs:
+        if os.path.isdir(d):
+            paths += [os.path.join(d, f) for f in os.listdir(d)
+                      if f.lower().endswith(".png")]
+    return paths
+
+
+# ── Bank directory ────────────────────────────────────────────────────────────
+def _entry_dir(key: str, digest: str) -> str:
+    return os.path.join(BANK_DIR, f"{key}-{digest[:16]}")
+
+
+def _load_entry(path: str) -> dict[str, np.ndarray] | None:
+    """Every .npy in *path*, memory-mapped; None if it is not a complete entry."""
+    try:
+        files = [f for f in os.listdir(path) if f.endswith(".npy")]
+    except OSError:
+        return None
+    try:
+        return {f[:-4]: np.load(os.path.join(path, f), mmap_mode="r", allow_pickle=False)
+                for f in files}
+    except (OSError, ValueError):
+        return None
+
+
+def _save_entry(key: str, digest: str, entry: dict[str, np.ndarray]) -> None:
+    """Write entry *key* to its own directory and drop its stale ones."""
+    final = _entry_dir(key, digest)
+    tmp = f"{final}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(tmp, exist_ok=True)
+        for name, arr in entry.items():
+            np.save(os.path.join(tmp, f"{name}.npy"), np.asarray(arr), allow_pickle=False)
+        os.rename(tmp, final)
+    except OSError:
+        # Read-only checkout, or another process got there first — keep
+        # using the in-memory copy.
+        shutil.rmtree(tmp, ignore_errors=True)
+        return
+    for name in os.listdir(BANK_DIR):
+        path = os.path.join(BANK_DIR, name)
+        if (name.rpartition("-")[0] == key and path != final
+                and not name.endswith(".tmp")):   # another process's build in progress
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def cached(key: str, sources, build) -> dict[str, np.ndarray]:
+    """
+    Return bank entry *key*, rebuilding it with build() if missing or stale.
+
+    sources : files the entry is derived from (include the building module).
+    build   : zero-arg callable returning {name: ndarray}; names must be
+              usable as file names.
+    """
+    digest = sources_hash(sources)
+    held = _entries.get(key)
+    if held is not None and held[0] == digest:
+        return held[1]
+    entry = _load_entry(_entry_dir(key, digest))
+    if entry is None:
+        entry = dict(build())
+        _rebuilt.add(key)
+        _save_entry(key, digest, entry)
+    _entries[key] = (digest, entry)
+    return entry
+
+
+# ── Helpers for lists of named images ─────────────────────────────────────────
+def pack_images(pairs) -> dict[str, np.ndarray]:
+    """[(name, image), ...] → bank entry (order and duplicate names kept)."""
+    pairs = list(pairs)
+    entry = {"names": np.array([name for name, _ in pairs], dtype=str)}
+    for i, (_, img) in enumerate(pairs):
+        entry[f"{i:04d}"] = img
+    return entry
+
+
+def unpack_images(entry) -> list[tuple[str, np.ndarray]]:
+    """Inverse of pack_images()."""
+    return [(str(name), entry[f"{i:04d}"])
+            for i, name in enumerate(entry["names"].tolist())]
+
+
+# ── CLI ───────────────────────────────────────────────────────────────────────
+def _warm_all() -> list[str]:
+    """Touch every detector's bank entries; return the entry keys."""
+    import find_charms
+    import find_runes
+    import ocr_items
+    import read_loot
+    import rune_names
+    find_runes._get_template()
+    find_charms._get_template()
+    ocr_items._get_templates()
+    ocr_items._get_item_trie()
+    read_loot.get_tc_templates()
+    rune_names._get_templates()
+    on_disk = {name.rpartition("-")[0] for name in os.listdir(BANK_DIR)
+               if not name.endswith(".tmp")} if os.path.isdir(BANK_DIR) else set()
+    return sorted(on_disk | set(_entries))
+
+
+def main():
+    keys = _warm_all()
+    size = sum(os.path.getsize(os.path.join(d, f))
+               for d, _, files in os.walk(BANK_DIR) for f in files)
+    print(f"{BANK_DIR}  ({len(keys)} entries, {size / 1024:.0f} KiB)")
+    for key in keys:
+        print(f"  {key:<20} {'rebuilt' if key in _rebuilt else 'up to date'}")
+
+
+if __name__ == "__main__":
+    # Run against the importable module so the detectors share its state.
+    import template_bank
+    template_bank.main()
@@ -0,0 +1,57 @@
+"""
+Tests for the background artifact writer (artifact_writer.py).
+Run with:  python -m pytest test_artifact_writer.py -q
+"""
+
+import threading
+
+import cv2
+import numpy as np
+
+from artifact_writer import ArtifactWriter, write_png
+
+
+def test_jobs_run_in_order_and_close_flushes():
+    done = []
+    writer = ArtifactWriter().start()
+    for i in range(20):
+        writer.submit(done.append, i)
+    writer.close()
+    assert done == list(range(20))
+    assert len(writer.latencies) == 20
+    assert writer.report().startswith("20 jobs")
+
+
+def test_full_queue_blocks_submit():
+    gate = threading.Event()
+    writer = ArtifactWriter(maxsize=2).start()
+    writer.submit(gate.wait)               # the thread is busy with this one
+    writer.submit(len, "a")
+    writer.submit(len, "b")                # queue full now
+    assert writer.depth == 2
+    threading.Timer(0.05, gate.set).start()
+    writer.submit(len, "c")                # waits for room
+    writer.close()
+    assert writer.stalled > 0.02
+    assert writer.max_depth == 2
+
+
+def test_failed_job_is_reported_and_writing_goes_on():
+    logged, done = [], []
+    writer = ArtifactWriter(log=logged.append).start()
+    writer.submit(open, "/nonexistent/dir/file", label="screenshot")
+    writer.submit(done.append, 1)
+    writer.flush()
+    assert done == [1]
+    assert writer.errors and writer.errors[0].startswith("screenshot:")
+    assert logged and "screenshot" in logged[0]
+    writer.close()
+    assert "1 failed" in writer.report()
+
+
+def test_write_png_writes_every_copy(tmp_path):
+    img = np.random.default_rng(0).integers(0, 255, (40, 60, 3), dtype=np.uint8)
+    a, b = str(tmp_path / "run.png"), str(tmp_path / "found" / "run.png")
+    write_png(img, a, b)
+    assert open(a, "rb").read() == open(b, "rb").read()
+    assert np.array_equal(cv2.imread(b), img)
@@ -0,0 +1,31 @@
+"""
+Tests for input pacing and accounting in backends.py, on the replay stub.
+Run with:  python -m pytest test_backends.py -q
+"""
+
+import pytest
+
+from backends import MoveProfile, ReplayBackend
+
+
+def test_explicit_pause_overrides_default():
+    b = ReplayBackend(100, 100, start=0.0)
+    b.press("a")                 # default pause (0.1 s)
+    b.press("b", pause=0.0)
+    b.move_to(10, 10, 0.3, pause=0.05)
+    assert b.now() == pytest.approx(0.45)
+    assert [t for t, _, _ in b.events] == pytest.approx([0.0, 0.1, 0.1])
+
+
+def test_batch_pauses_once_and_accounts_time():
+    b = ReplayBackend(100, 100, start=0.0)
+    hover = MoveProfile(0.5, pause=0.2)
+    b.batch([("move", 40, 50, hover), ("click",), ("press", "alt")], pause=0.1)
+    assert [kind for _, kind, _ in b.events] == ["move", "click", "press"]
+    assert b.events[1][2] == (40, 50)
+    assert b.now() == pytest.approx(0.8)
+    stats = b.input_stats
+    assert stats.seconds["move"] == pytest.approx(0.5)
+    assert stats.pause == pytest.approx(0.3)
+    assert stats.total == pytest.approx(0.8)
+    assert dict(stats.calls) == {"move": 1, "click": 1, "press": 1}
@@ -0,0 +1,58 @@
+"""
+Tests for the boss health-bar reader (boss_health.py).
+Run with:  python -m pytest test_boss_health.py -q
+"""
+
+import numpy as np
+
+from boss_health import DEAD_SAMPLES, KillDetector, bar_fill
+
+H, W = 24, 400
+
+
+def _bar(fill: float) -> np.ndarray:
+    """The bar ROI with the left *fill* of it red, over dark scenery."""
+    frame = np.full((H, W, 3), 30, dtype=np.uint8)
+    frame[4:-4, :int(W * fill)] = (20, 20, 180)
+    return frame
+
+
+def _feed_until_dead(detector, fills):
+    for i, fill in enumerate(fills):
+        if detector.feed(fill):
+            return i
+    return None
+
+
+def test_bar_fill_measures_red_columns():
+    assert bar_fill(_bar(0.0)) == 0.0
+    assert abs(bar_fill(_bar(0.4)) - 0.4) < 0.01
+    assert bar_fill(_bar(1.0)) == 1.0
+
+
+def test_name_text_and_orange_fire_are_not_bar():
+    frame = _bar(0.0)
+    frame[8:16, 100:200] = (200, 200, 200)   # white name text
+    frame[2:22, 300:340] = (40, 140, 230)    # torch fire
+    assert bar_fill(frame) == 0.0
+
+
+def test_dead_once_bar_empties():
+    fills = [1.0, 0.7, 0.3, 0.1, 0.0] + [0.0] * 5
+    assert _feed_until_dead(KillDetector(), fills) == 3 + DEAD_SAMPLES
+
+
+def test_no_kill_without_seeing_the_bar():
+    assert _feed_until_dead(KillDetector(), [0.0] * 20) is None
+
+
+def test_bar_flicker_resets_the_count():
+    fills = [0.8, 0.1, 0.0, 0.0, 0.1] + [0.0] * DEAD_SAMPLES
+    assert _feed_until_dead(KillDetector(), fills) == 4 + DEAD_SAMPLES
+
+
+def test_full_bar_that_vanishes_is_not_a_kill():
+    # Cursor slid off a healthy Pindleskin (or onto a dying minion and back)
+    fills = [1.0, 0.9] + [0.0] * 10 + [0.6, 0.1] + [0.0] * DEAD_SAMPLES
+    assert _feed_until_dead(KillDetector(), fills) == 13 + DEAD_SAMPLES
+
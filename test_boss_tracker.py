@@ -0,0 +1,66 @@
+"""
+Tests for the spell-aim tracker (boss_tracker.py).
+Run with:  python -m pytest test_boss_tracker.py -q
+"""
+
+import cv2
+import numpy as np
+
+from boss_tracker import MAX_STEP, SEARCH_RADIUS, BossTracker
+
+H, W = 1050, 1680
+BOUNDS = {"left": 0, "top": 0, "width": W, "height": H}
+
+
+def _sprite() -> np.ndarray:
+    """A 60x90 textured figure standing in for Pindleskin."""
+    blobs = np.random.default_rng(7).integers(40, 240, (15, 10), dtype=np.uint8)
+    gray = cv2.resize(blobs, (60, 90), interpolation=cv2.INTER_LINEAR)
+    return np.repeat(gray[:, :, None], 3, axis=2)
+
+
+def _screen(center: tuple[int, int] | None) -> np.ndarray:
+    screen = np.full((H, W, 3), 20, dtype=np.uint8)
+    if center is not None:
+        x, y = center
+        screen[y - 45:y + 45, x - 30:x + 30] = _sprite()
+    return screen
+
+
+def _grab(screen, region):
+    return screen[region["top"]:region["top"] + region["height"],
+                  region["left"]:region["left"] + region["width"]]
+
+
+def _tick(tracker, screen):
+    region = tracker.window()
+    return tracker.update(_grab(screen, region), region)
+
+
+def test_template_follows_the_boss_each_tick():
+    tracker = BossTracker((1047, 536), _sprite(), bounds=BOUNDS)
+    for center in [(1060, 540), (1090, 560), (1130, 590)]:
+        x, y = _tick(tracker, _screen(center))
+        assert abs(x - center[0]) <= 2 and abs(y - center[1]) <= 2
+    assert tracker.fixes["template"] == 3
+
+
+def test_motion_fix_without_a_template_is_step_limited():
+    tracker = BossTracker((1047, 536), bounds=BOUNDS)
+    assert _tick(tracker, _screen(None)) == (1047, 536)
+    x, y = _tick(tracker, _screen((1047 + 100, 536)))
+    assert tracker.fixes["motion"] == 1
+    assert x - 1047 == MAX_STEP and y == 536
+
+
+def test_aim_stays_when_nothing_is_seen():
+    tracker = BossTracker((1047, 536), _sprite(), bounds=BOUNDS)
+    for _ in range(3):
+        assert _tick(tracker, _screen(None)) == (1047, 536)
+    assert tracker.fixes["none"] == 3
+
+
+def test_window_is_clamped_to_the_screen():
+    tracker = BossTracker((10, 1040), bounds=BOUNDS)
+    w = tracker.window()
+    assert (w["left"], w["top"]) == (0, H - 2 * SEARCH_RADIUS)
@@ -22,9 +22,13 @@ import time
 from datetime import datetime
 
 import cv2
-import mss
 import numpy as np
-import pyautogui
+
+from lazy_import import lazy_import
+
+# Display-bound modules load on first use, so pytest can collect this script
+mss       = lazy_import("mss")
+pyautogui = lazy_import("pyautogui")
 
 from find_charms import find_charms, find_charms_img
 
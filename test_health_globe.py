@@ -0,0 +1,110 @@
+"""
+Tests for the health globe watcher (health_globe.py).
+Run with:  python -m pytest test_health_globe.py -q
+"""
+
+import cv2
+import numpy as np
+
+import health_globe
+from health_globe import HealthWatcher
+
+STRIP = health_globe.strip_of(cv2.imread("templates/health_globe.png"), 16)
+FULL = health_globe.raw_fill(STRIP)
+REGION = {"left": 0, "top": 0, "width": 16, "height": 110}
+
+
+def _drained(fill):
+    """The full-life strip with the top (1 - fill) of it emptied to dark glass."""
+    frame = STRIP.copy()
+    frame[:round(len(frame) * (1 - fill))] = (14, 10, 12)
+    return frame
+
+
+def test_fill_follows_the_liquid_level():
+    assert health_globe.globe_fill(STRIP, FULL) == 1.0
+    for fill in (0.8, 0.5, 0.2):
+        assert abs(health_globe.globe_fill(_drained(fill), FULL) - fill) < 0.05
+    assert health_globe.globe_fill(np.zeros((110, 16, 3), np.uint8), FULL) == 0.0
+
+
+def test_low_life_fires_once_and_only_when_armed():
+    frames = iter([_drained(0.1), STRIP, _drained(0.6), _drained(0.2), _drained(0.1)])
+    fired = []
+    w = HealthWatcher(lambda region: next(frames), REGION, chicken=0.35, full=FULL,
+                      on_low=fired.append)
+    w.sample()                       # not armed: loading screen, menus
+    w.arm()
+    w.sample(), w.sample()
+    assert not w.low.is_set()
+    w.sample()
+    assert w.low.is_set() and len(fired) == 1 and fired[0] < 0.35
+    w.sample()
+    assert len(fired) == 1           # once per arming
+    w.disarm()
+    assert not w.low.is_set()
+
+
+def test_nothing_counts_until_the_globe_is_seen():
+    w = HealthWatcher(lambda region: np.zeros((110, 16, 3), np.uint8), REGION, 0.35, FULL)
+    w.arm()
+    for _ in range(5):
+        w.sample()
+    assert w.value == 0.0 and not w.low.is_set()
+
+
+class _FakeClock:
+    """perf_counter() stand-in that only moves when told to."""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_cost_accounting_stays_fixed_size():
+    clock = _FakeClock()
+
+    def grab(region):
+        clock.now += 0.002           # 2 ms to grab
+        return STRIP
+
+    w = HealthWatcher(grab, REGION, 0.35, FULL, clock=clock)
+    for _ in range(1000):
+        w.sample()
+    assert w.samples == 1000
+    assert abs(w.cost - 2.0) < 1e-6 and abs(w.cost_max - 0.002) < 1e-9
+    assert w.read == 0.0             # the clock did not move while reading
+    assert not any(isinstance(v, list) for v in vars(w).values())   # no per-sample history
+    assert "1000 samples at 500.0 Hz" in w.report() and "2.00 ms mean" in w.report()
+
+
+def test_load_is_cost_over_time_since_start():
+    clock = _FakeClock()
+
+    def grab(region):
+        clock.now += 0.0001          # 0.1 ms per sample
+        return STRIP
+
+    w = HealthWatcher(grab, REGION, 0.35, FULL, clock=clock)
+    w._thread, w._started = object(), clock()   # as if start() had run
+    for _ in range(40):              # one second at 40 Hz
+        w.sample()
+        clock.now += 0.025 - 0.0001
+    w._stopped = clock()
+    assert abs(w.load() - 0.004) < 1e-9
+    assert "within" in w.report()
+
+
+def test_region_is_the_middle_of_the_globe():
+    import bot
+    template = cv2.imread(bot.HEALTH_TEMPLATE)   # captured 110x110 around the globe centre
+    cx, cy = bot.HEALTH_GLOBE_AT
+    h, w = template.shape[:2]
+    screen = np.zeros((cy + h, cx + w, 3), np.uint8)
+    screen[cy - h // 2:cy - h // 2 + h, cx - w // 2:cx - w // 2 + w] = template
+    r = bot.HEALTH_REGION
+    strip = screen[r["top"]:r["top"] + r["height"], r["left"]:r["left"] + r["width"]]
+    assert np.array_equal(strip, health_globe.strip_of(template, r["width"]))
+    assert health_globe.globe_fill(strip, FULL) == 1.0
@@ -0,0 +1,96 @@
+"""
+Tests for the inventory occupancy scanner (inventory.py).
+Run with:  python -m pytest test_inventory.py -q
+"""
+
+import glob
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+import inventory
+from inventory import COLS, ROWS
+from pickup import Target
+
+CELL = 48
+
+
+def _grid(taken, seed=0):
+    """A grab of the grid: dark noisy cells with grid lines, items where *taken*."""
+    rng = np.random.default_rng(seed)
+    img = rng.integers(5, 25, (ROWS * CELL, COLS * CELL, 3)).astype(np.uint8)
+    img[::CELL] = img[:, ::CELL] = 90   # grid lines
+    for r, c in zip(*np.nonzero(taken)):
+        item = rng.integers(40, 220, (CELL - 8, CELL - 8, 3))
+        img[r * CELL + 4:(r + 1) * CELL - 4, c * CELL + 4:(c + 1) * CELL - 4] = item
+    return img
+
+
+def _occ(cells):
+    occ = np.zeros((ROWS, COLS), dtype=bool)
+    for r, c in cells:
+        occ[r, c] = True
+    return occ
+
+
+def test_occupancy_reads_every_cell():
+    taken = np.random.default_rng(1).random((ROWS, COLS)) < 0.4
+    assert (inventory.occupancy(_grid(taken)) == taken).all()
+    assert not inventory.occupancy(_grid(np.zeros((ROWS, COLS), bool))).any()
+
+
+def test_occupancy_tolerates_a_grab_a_few_pixels_too_big():
+    taken = _occ([(0, 0), (3, 9), (1, 5)])
+    img = np.pad(_grid(taken), ((0, 3), (0, 5), (0, 0)))
+    assert (inventory.occupancy(img) == taken).all()
+
+
+def test_free_blocks_and_column_first_placement():
+    occ = _occ([(0, 0), (1, 0), (2, 0)])
+    assert inventory.free_blocks(occ, 1, 4)[0].tolist() == [False] + [True] * (COLS - 1)
+    placed = inventory.place(occ, 1, 3)
+    assert placed[:3, 1].all() and placed.sum() == 6   # next column, not row 3
+    assert inventory.place(np.ones((ROWS, COLS), bool), 1, 1) is None
+    assert inventory.free_blocks(occ, 1, ROWS + 1).size == 0
+
+
+def test_fit_skips_what_does_not_fit_and_fills_in_order():
+    # Everything taken but column 9 rows 0-1 and row 3 column 4
+    occ = np.ones((ROWS, COLS), bool)
+    occ[0:2, 9] = occ[3, 4] = False
+    route = [Target("Rune", 0, 0, "Ist Rune"), Target("Charm", 0, 0, "Grand Charm"),
+             Target("Charm", 0, 0, "Large Charm"), Target("Charm", 0, 0)]
+    take, skip, after = inventory.fit(route, occ)
+    # The rune takes the single cell (column 4 comes first), the large charm
+    # column 9; the grand charm and the last one find no room
+    assert take == [route[0], route[2]] and skip == [route[1], route[3]]
+    assert inventory.free_cells(after) == 0 and after.all()
+    assert inventory.report(after).startswith("0/40 free")
+
+
+def test_sizes_by_name_then_kind():
+    assert inventory.size_of("Charm", "Vital Grand Charm of Life") == (1, 3)
+    assert inventory.size_of("Charm", "Small Charm") == (1, 1)
+    assert inventory.size_of("Charm") == (1, 3)   # unread: room for a Grand Charm
+    assert inventory.size_of("Rune", "") == (1, 1)
+    assert inventory.size_of("Unique", "Shako") == (1, 1)
+
+
+def test_parse_grid():
+    occ = inventory.parse_grid("#.........\n.........#\n..........\n##########\n")
+    assert occ.shape == (ROWS, COLS) and inventory.free_cells(occ) == 28
+
+
+# Real captures (python inventory.py), each with the cells it holds in a .txt
+CAPTURES = [p for p in sorted(glob.glob(os.path.join(inventory.SAMPLES_DIR, "*.png")))
+            if os.path.exists(os.path.splitext(p)[0] + ".txt")]
+
+
+@pytest.mark.parametrize("path", CAPTURES)
+def test_real_captures(path):
+    with open(os.path.splitext(path)[0] + ".txt") as f:
+        expected = inventory.parse_grid(f.read())
+    assert (inventory.occupancy(cv2.imread(path)) == expected).all()
+
@@ -0,0 +1,62 @@
+"""
+test_item_trie.py
+
+Tests for the lexicon-constrained line decoder in item_trie.py.
+"""
+
+from item_trie import ItemTrie
+
+NAMES = ["Super Mana Potion", "Super Healing Potion", "Stamina Potion",
+         "Shael Rune", "Ral Rune", "Rune Sword", "Gold"]
+
+
+def _glyphs(text, score=0.9):
+    """One single-candidate position per letter of *text* (spaces dropped)."""
+    return [[(ch, score)] for ch in text.replace(" ", "")]
+
+
+def test_exact_line_decodes_with_high_confidence():
+    trie = ItemTrie(NAMES)
+    result = trie.decode(_glyphs("Shael Rune"))
+    assert result.name == "Shael Rune"
+    assert result.confidence > 0.85
+
+
+def test_missing_letters_are_recovered():
+    trie = ItemTrie(NAMES)
+    result = trie.decode(_glyphs("su r mana po on"))
+    assert result.name == "Super Mana Potion"
+
+
+def test_second_candidate_is_used_when_first_is_wrong():
+    trie = ItemTrie(NAMES)
+    positions = _glyphs("ra")
+    positions.append([("i", 0.85), ("l", 0.80)])
+    positions += _glyphs("rune")
+    assert trie.decode(positions).name == "Ral Rune"
+
+
+def test_unreadable_letters_are_cheap_to_skip():
+    readable = set("abcdefghiklmnoprstuvwxyz")   # no 'j' / 'q' templates
+    trie = ItemTrie(["Full Rejuvination Potion", "Full Plate Mail"], readable)
+    result = trie.decode(_glyphs("full re uvination potion"))
+    assert result.name == "Full Rejuvination Potion"
+    assert result.confidence > 0.85
+
+
+def test_garbage_is_rejected():
+    trie = ItemTrie(NAMES)
+    assert trie.decode(_glyphs("xqzkvw")) is None
+
+
+def test_empty_line():
+    assert ItemTrie(NAMES).decode([]) is None
+
+
+def test_array_round_trip_decodes_identically():
+    readable = set("abcdefghiklmnoprstuvwxyz")
+    trie = ItemTrie(NAMES, readable)
+    clone = ItemTrie.from_arrays(trie.to_arrays())
+    line = _glyphs("su r mana po on")
+    assert clone.decode(line) == trie.decode(line)
+    assert clone.readable == trie.readable
@@ -0,0 +1,96 @@
+"""
+Tests for the loot label-location prior (label_prior.py).
+Run with:  python -m pytest test_label_prior.py -q
+"""
+
+import random
+
+import numpy as np
+
+import label_prior
+from label_prior import MIN_LABELS, LabelPrior
+
+SHAPE = (640, 700)
+
+
+def _clustered(n=MIN_LABELS, seed=0):
+    """A prior that has seen *n* labels around (250, 300) over n // 5 runs."""
+    rng = random.Random(seed)
+    prior = LabelPrior(SHAPE)
+    for _ in range(n // 5):
+        prior.add([(rng.randint(180, 320), rng.randint(250, 350)) for _ in range(5)])
+    return prior
+
+
+def _detect_bright(img):
+    ys, xs = np.nonzero(img[..., 0] == 255)
+    return [(int(x), int(y)) for x, y in zip(xs, ys)]
+
+
+def test_regions_cover_the_cluster_only():
+    rects = _clustered().regions()
+    area = sum(r["width"] * r["height"] for r in rects)
+    assert area < 0.25 * SHAPE[0] * SHAPE[1]
+    inside = lambda x, y: any(r["left"] <= x < r["left"] + r["width"]
+                              and r["top"] <= y < r["top"] + r["height"] for r in rects)
+    assert inside(250, 300) and not inside(600, 50)
+
+
+def test_search_maps_hits_back_and_skips_cold_tiles():
+    prior = _clustered()
+    img = np.zeros((*SHAPE, 3), dtype=np.uint8)
+    img[300, 250] = 255    # in the cluster
+    img[50, 600] = 255     # never seen there
+    assert prior.search(img, _detect_bright) == [(250, 300)]
+    assert sorted(prior.search(img, _detect_bright, full=True)) == [(250, 300), (600, 50)]
+
+
+def test_untrusted_prior_searches_everything():
+    prior = _clustered(n=10)
+    assert not prior.trusted and prior.audit_due()
+    img = np.zeros((*SHAPE, 3), dtype=np.uint8)
+    img[50, 600] = 255
+    assert prior.search(img, _detect_bright) == [(600, 50)]
+
+
+def test_audit_runs_come_round():
+    prior = _clustered()
+    due = []
+    for _ in range(label_prior.AUDIT_EVERY):
+        prior.add([])
+        due.append(prior.audit_due())
+    assert due.count(True) == 1
+
+
+def test_saved_prior_round_trips(tmp_path):
+    prior = _clustered()
+    prior.add([(10, 10)], source="run_1.png")
+    path = str(tmp_path / "prior.npz")
+    prior.save(path)
+    loaded = LabelPrior.load(path, SHAPE)
+    assert np.array_equal(loaded.counts, prior.counts)
+    assert (loaded.labels, loaded.runs, loaded.sources) == (prior.labels, prior.runs, {"run_1.png"})
+    assert LabelPrior.load(path, (100, 100)).labels == 0
+    assert LabelPrior.load(str(tmp_path / "missing.npz"), SHAPE).labels == 0
+
+
+def test_seeding_reads_the_screenshot_archive(tmp_path, monkeypatch):
+    import sys
+
+    import bot
+    import ocr_items
+    import screen_archive
+
+    frame = np.zeros((bot.LOOT_HEIGHT, bot.LOOT_WIDTH, 3), np.uint8)
+    archive = screen_archive.ScreenArchive(str(tmp_path / "archive"))
+    archive.put(frame, "run_20260301_120000", run=1, tags=["Rune"])
+    archive.put(frame + 1, "run_20260301_120100", run=2, tags=["Charm"])
+    archive.close()
+    monkeypatch.setattr(ocr_items, "read_items_img", lambda img: [(300, 200)])
+    out = str(tmp_path / "prior.npz")
+    monkeypatch.setattr(sys, "argv", ["label_prior.py", str(tmp_path / "archive"), "-o", out])
+    label_prior.main()
+    label_prior.main()   # a second pass adds nothing new
+    prior = LabelPrior.load(out, (bot.LOOT_HEIGHT, bot.LOOT_WIDTH))
+    assert prior.sources == {"run_20260301_120000.png", "run_20260301_120100.png"}
+    assert prior.labels == 2
@@ -0,0 +1,65 @@
+"""
+Tests for minimap localization and routing (minimap.py), on a synthetic town.
+Run with:  python -m pytest test_minimap.py -q
+"""
+
+import cv2
+import numpy as np
+
+from minimap import CLICK_REACH, Localizer, build, path_graph, stitch
+
+MM_H, MM_W = 90, 120
+
+
+def _town() -> np.ndarray:
+    """A 600x600 'minimap world': smooth random blobs, like walls and paths."""
+    blobs = np.random.default_rng(3).integers(0, 255, (60, 60), dtype=np.uint8)
+    return cv2.resize(blobs, (600, 600), interpolation=cv2.INTER_CUBIC)
+
+
+def _minimap(world, x, y) -> np.ndarray:
+    """The overlay centred on the player at world (x, y)."""
+    return world[y - MM_H // 2:y - MM_H // 2 + MM_H, x - MM_W // 2:x - MM_W // 2 + MM_W]
+
+
+def _walk(points, step=3):
+    """Positions every *step* pixels along the polyline through *points*."""
+    out = []
+    for (x0, y0), (x1, y1) in zip(points, points[1:]):
+        n = max(abs(x1 - x0), abs(y1 - y0)) // step
+        out += [(x0 + (x1 - x0) * i // n, y0 + (y1 - y0) * i // n) for i in range(n)]
+    return out + [points[-1]]
+
+
+WALK = _walk([(150, 150), (400, 150), (400, 300), (160, 300), (160, 450), (450, 450)])
+
+
+def test_stitched_map_reproduces_the_walk(tmp_path):
+    world = _town()
+    ref, positions = stitch([_minimap(world, x, y) for x, y in WALK])
+    offset = positions[0] - WALK[0]
+    assert np.abs(positions - offset - np.asarray(WALK)).max() <= 1
+    assert ref.shape[0] >= 300 + MM_H - 2
+
+
+def test_locate_tracks_the_player(tmp_path):
+    world = _town()
+    loc = build([_minimap(world, x, y) for x, y in WALK], str(tmp_path / "town.npz"))
+    offset = np.asarray(loc.nodes[0]) - WALK[0]
+    loc = Localizer.load(str(tmp_path / "town.npz"))
+    for x, y in [(200, 152), (390, 220), (300, 300), (170, 440)]:
+        pos = loc.locate(_minimap(world, x, y))
+        assert pos is not None
+        assert np.abs(np.asarray(pos) - offset - (x, y)).max() <= 1
+
+
+def test_route_takes_the_shortcut_where_the_walk_doubled_back():
+    # Out along y=100, back along y=104, then on to the portal at (300, 104)
+    positions = np.asarray(_walk([(0, 100), (200, 100), (200, 104), (0, 104),
+                                  (0, 104), (300, 104)], step=2))
+    nodes, edges = path_graph(positions)
+    loc = Localizer(np.zeros((1, 1), np.uint8), nodes, edges, len(nodes) - 1)
+    start = (10, 100)
+    assert loc.to_portal(start) < 300
+    tx, ty = loc.next_target(start)
+    assert tx > start[0] and np.hypot(tx - start[0], ty - start[1]) <= CLICK_REACH
@@ -0,0 +1,62 @@
+"""
+Tests for the pickit rule engine (pickit.py).
+Run with:  python -m pytest test_pickit.py -q
+"""
+
+import pytest
+
+from ocr_items import COLOR_TO_CLASS, Item
+from pickit import Pickit, kind_of
+
+CLASSES = set(COLOR_TO_CLASS.values())
+
+RULES = """
+# runes, charms, one set item and every unique
+class: Rune
+match: \\bCharm$
+class: set & name: Tal Rasha's Guardianship
+class: Unique
+class: Magic & match: ^Jewel
+"""
+
+
+def _wants(rules, name, cls):
+    return rules.wants(Item(name=name, classification=cls))
+
+
+def test_rules_pick_by_class_name_and_pattern():
+    rules = Pickit.parse(RULES, CLASSES)
+    assert _wants(rules, "Shael Rune", "Rune")
+    assert _wants(rules, "Grand Charm", "Magic")
+    assert _wants(rules, "tal rasha's guardianship", "Set")
+    assert not _wants(rules, "Tal Rasha's Guardianship", "Normal")
+    assert _wants(rules, "Shako", "Unique")
+    assert _wants(rules, "Jewel", "Magic")
+    assert not _wants(rules, "Jewel", "Rare")
+    assert not _wants(rules, "Super Mana Potion", "Normal")
+    assert not _wants(rules, "Charming Ring", "Magic")
+
+
+def test_rules_compile_to_sets_and_one_regex_per_class():
+    rules = Pickit.parse(RULES, CLASSES)
+    assert rules.classes == {"Rune", "Unique"}
+    assert rules.class_names == {("Set", "tal rasha's guardianship")}
+    assert set(rules.patterns) == {None, "Magic"}
+
+
+@pytest.mark.parametrize("text", ["colour: Unique", "class: Legendary",
+                                  "match: (unclosed", "name: Shako & match: Sh"])
+def test_bad_rules_are_reported(text):
+    with pytest.raises(ValueError):
+        Pickit.parse(text, CLASSES)
+
+
+def test_shipped_rules_load():
+    rules = Pickit.load("pickit.txt", CLASSES)
+    assert _wants(rules, "Ist Rune", "Rune") and _wants(rules, "Small Charm", "Magic")
+
+
+def test_kind_of_counts_runes_and_charms():
+    assert kind_of(Item("Ber Rune", "Rune")) == "Rune"
+    assert kind_of(Item("Large Charm", "Magic")) == "Charm"
+    assert kind_of(Item("Shako", "Unique")) == "Unique"
@@ -0,0 +1,78 @@
+"""
+Tests for the loot pickup planner (pickup.py).
+Run with:  python -m pytest test_pickup.py -q
+"""
+
+import glob
+import itertools
+import random
+
+import cv2
+import numpy as np
+
+import pickup
+from pickup import MISSED, MOVED, PICKED, Target, label_box, plan, travel, verify
+
+
+def test_higher_value_kinds_come_first():
+    targets = [Target("Charm", 210, 200), Target("Rune", 900, 600), Target("Charm", 220, 210)]
+    route = plan(targets, start=(200, 200))
+    assert [t.kind for t in route] == ["Rune", "Charm", "Charm"]
+
+
+def test_route_is_the_shortest_within_a_kind():
+    rng = random.Random(1)
+    targets = [Target("Rune", rng.randint(0, 700), rng.randint(0, 640)) for _ in range(5)]
+    route = plan(targets, start=(200, 200))
+    best = min(travel(list(r), (200, 200)) for r in itertools.permutations(targets))
+    assert abs(travel(route, (200, 200)) - best) < 1e-6
+
+
+def test_many_labels_beat_detection_order():
+    rng = random.Random(2)
+    targets = [Target("Rune", rng.randint(0, 700), rng.randint(0, 640)) for _ in range(12)]
+    route = plan(targets, start=(200, 200))
+    assert sorted(route, key=id) == sorted(targets, key=id)
+    assert travel(route, (200, 200)) < travel(targets, (200, 200))
+
+
+# ── Label-box verification ───────────────────────────────────────────────────
+RUNE_AT = (239, 312)   # "Shael Rune" in test_cases/1
+
+
+def _loot_frame():
+    return cv2.imread(glob.glob("test_cases/1/*.png")[0])
+
+
+def test_label_box_covers_the_label_text():
+    box = label_box(_loot_frame(), *RUNE_AT)
+    assert box.left <= 135 and box.right >= 270          # "Shael Rune" spans ~130-272
+    assert box.top < RUNE_AT[1] < box.bottom and box.bottom - box.top <= 21
+
+
+def test_verify_tells_picked_missed_and_moved():
+    before = _loot_frame()
+    box = label_box(before, *RUNE_AT)
+
+    gone = before.copy()
+    box.of(gone)[:] = 40
+    moved = before.copy()
+    moved[box.top + 15:box.bottom + 15, box.left:box.right] = box.of(before)
+    box.of(moved)[:5] = 40
+
+    assert verify(before, before.copy(), box) == MISSED
+    assert verify(before, gone, box) == PICKED
+    assert verify(before, moved, box) == MOVED
+
+
+def test_label_the_view_scrolled_away_is_not_picked():
+    before = _loot_frame()
+    box = label_box(before, *RUNE_AT)
+    scrolled = np.full_like(before, 20)
+    scrolled[:-25, 40:] = before[25:, :-40]   # the view moved 40 right and 25 up
+
+    assert pickup.find_text(before, scrolled, box) == (40, -25)
+    assert verify(before, scrolled, box) == MOVED
+    box.of(scrolled)[:] = 20
+    scrolled[box.top - 25:box.bottom - 25, box.left + 40:box.right + 40] = 20
+    assert verify(before, scrolled, box) == PICKED   # gone from where it scrolled to as well
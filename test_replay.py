@@ -0,0 +1,214 @@
+"""
+Offline replay of the full bot loop (see replay.py).
+Run with:  python -m pytest test_replay.py -q
+"""
+
+import json
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import pytest
+
+import bot
+import replay
+from label_prior import LabelPrior
+from run_store import RunStore
+from screen_archive import ScreenArchive
+
+RUNE_FRAME = "test_cases/1"   # Shael Rune among other labels
+PRIOR_SHAPE = (bot.LOOT_HEIGHT, bot.LOOT_WIDTH)
+
+
+def _store(tmp_path) -> RunStore:
+    return RunStore(str(tmp_path / "runs.db"))
+
+
+def test_runs_complete_on_virtual_clock(tmp_path):
+    frames = replay.load_frames([RUNE_FRAME])
+    sim = replay.replay(frames, runs=2, workdir=str(tmp_path))
+    presses = [args[0] for _, kind, args in sim.events if kind == "press"]
+    assert presses.count("h") == 2
+    assert presses.count("escape") == 2
+    assert sim.scene == "char_select"
+
+
+def test_rune_is_picked_up(tmp_path, monkeypatch):
+    saved_on = []
+    save = LabelPrior.save
+    monkeypatch.setattr(LabelPrior, "save", lambda self, path: (
+        saved_on.append(threading.current_thread().name), save(self, path)))
+    frames = replay.load_frames([RUNE_FRAME])
+    sim = replay.replay(frames, runs=1, workdir=str(tmp_path))
+    assert sim.pickups == 1
+    totals = _store(tmp_path).totals()
+    assert totals["total_runes_found"] == 1
+    assert totals["shael_runes_found"] == 1
+    assert totals["mal_plus_runes_found"] == 0
+    # The screenshot is written behind the bot, and is archived once replay() returns
+    (shot,) = sqlite3.connect(tmp_path / "runs.db").execute("SELECT screenshot FROM runs").fetchone()
+    ref = ScreenArchive(str(tmp_path / "screen_archive")).find(shot)
+    assert ref is not None and set(ref.tags) == {"Rune", "Shael"}
+    # So is the label prior
+    assert saved_on == ["artifacts"]
+    assert LabelPrior.load(str(tmp_path / "label_prior.npz"), PRIOR_SHAPE).runs == 1
+
+
+def test_rune_the_ocr_misses_is_still_picked_up(tmp_path):
+    # The OCR does not read the "Amn Rune" label at the crop edge; the word template does
+    frames = replay.load_frames(["samples/test_rune_20260219_141302.png"])
+    sim = replay.replay(frames, runs=1, workdir=str(tmp_path))
+    assert sim.pickups == 1
+    totals = _store(tmp_path).totals()
+    assert totals["total_runes_found"] == 1
+    assert totals["amn_runes_found"] == 1
+
+
+class MissesFirstExit(replay.PindleReplay):
+    """The first Save and Exit click does nothing, as if the menu lagged."""
+
+    missed = False
+
+    def on_click(self, x, y):
+        if self.scene == "menu" and not self.missed:
+            self.missed = True
+            return
+        super().on_click(x, y)
+
+
+def test_stalled_exit_recovers(tmp_path):
+    frames = replay.load_frames([RUNE_FRAME])
+    sim = replay.replay(frames, runs=2, workdir=str(tmp_path),
+                        backend_class=MissesFirstExit)
+    assert sim.missed and sim.scene == "char_select"
+    history = [json.loads(line) for line in open(tmp_path / "run_states.jsonl")]
+    outcomes = [(e["state"], e["outcome"]) for e in history]
+    assert ("char_select", "timeout") in outcomes
+    assert _store(tmp_path).last_run_number() == 2
+
+
+def test_kill_ends_when_the_boss_bar_empties(tmp_path):
+    frames = replay.load_frames([RUNE_FRAME])
+    replay.replay(frames, runs=2, workdir=str(tmp_path))
+    cap = replay.bot.KILL_ROUNDS * sum(wait for _, wait in replay.bot.KILL_ROTATION)
+    assert len(replay.bot.kill_times) == 2
+    assert all(t < cap for t in replay.bot.kill_times)
+    db = sqlite3.connect(tmp_path / "runs.db")
+    assert db.execute("SELECT COUNT(*) FROM phases WHERE name = 'kill' AND source = 'stat'"
+                      ).fetchone() == (2,)
+
+
+def test_all_labels_picked_up_in_one_pass(tmp_path):
+    frame = replay.load_frames([RUNE_FRAME])[0]
+    frame[470:496, 380:540] = frame[299:325, 125:285]   # a second Shael Rune label
+    sim = replay.replay([frame], runs=1, workdir=str(tmp_path))
+    assert sim.pickups == 2
+    assert _store(tmp_path).totals()["total_runes_found"] == 2
+    clicks = [t for t, kind, args in sim.events if kind == "click" and args != (819, 507)]
+    bot = replay.bot
+    one_by_one = bot.LOOT_MOVE.duration + bot.LOOT_MOVE.pause + bot.LOOT_CLICK_GAP + bot.PICKUP_SETTLE
+    assert clicks[-1] - clicks[-2] < one_by_one   # back to back, no check in between
+
+
+class ScrollsOnPickup(replay.PindleReplay):
+    """The camera follows the character: each loot click scrolls the view by SCROLL."""
+
+    SCROLL = (-30, 20)
+
+    def _pick_up(self, x, y):
+        super()._pick_up(x, y)
+        left, top = self.loot_rect
+        region = self.screen[top:top + replay.bot.LOOT_HEIGHT, left:left + replay.bot.LOOT_WIDTH]
+        region[:] = np.roll(region, self.SCROLL[::-1], axis=(0, 1))
+
+
+def test_clicks_follow_a_scrolling_view(tmp_path):
+    frame = replay.load_frames([RUNE_FRAME])[0]
+    frame[470:496, 380:540] = frame[299:325, 125:285]   # a second Shael Rune label
+    sim = replay.replay([frame], runs=1, workdir=str(tmp_path), backend_class=ScrollsOnPickup)
+    assert sim.pickups == 2
+    assert _store(tmp_path).totals()["total_runes_found"] == 2
+    park = max(i for i, (_, kind, args) in enumerate(sim.events)
+               if kind == "move" and args[:2] == (200, 200))   # loot_items() starts here
+    loot_clicks = [args for _, kind, args in sim.events[park:]
+                   if kind == "click" and args != (819, 507)]
+    assert len(loot_clicks) == 2   # both landed in the first pass
+
+
+class MissesFirstPickup(replay.PindleReplay):
+    """The first click on a loot label does nothing, as if the character was blocked."""
+
+    missed = False
+
+    def _pick_up(self, x, y):
+        if not self.missed:
+            self.missed = True
+            return
+        super()._pick_up(x, y)
+
+
+def test_missed_pickup_is_clicked_again(tmp_path):
+    frames = replay.load_frames([RUNE_FRAME])
+    sim = replay.replay(frames, runs=1, workdir=str(tmp_path), backend_class=MissesFirstPickup)
+    assert sim.missed and sim.pickups == 1
+    assert _store(tmp_path).totals()["total_runes_found"] == 1
+
+
+class ChickensFirstFight(replay.PindleReplay):
+    """Life drops below the chicken level at the first cast of the first fight."""
+
+    chickened = False
+
+    def on_press(self, key):
+        super().on_press(key)
+        if key == "d" and not self.chickened:
+            self.chickened = True
+            replay.bot.chicken(0.2)
+
+
+def test_low_life_abandons_the_run(tmp_path):
+    frames = replay.load_frames([RUNE_FRAME])
+    sim = replay.replay(frames, runs=1, workdir=str(tmp_path), backend_class=ChickensFirstFight)
+    history = [json.loads(line) for line in open(tmp_path / "run_states.jsonl")]
+    kills = [e["outcome"] for e in history if e["state"] == "kill"]
+    assert kills[0] != "ok" and kills[-1] == "ok"
+    assert sim.pickups == 1 and not replay.bot._abort_flag.is_set()
+
+
+class AbortsAfterChicken(ChickensFirstFight):
+    """The mouse monitor runs; the user moves into the abort zone after the chicken."""
+
+    monitor = None
+
+    def on_press(self, key):
+        if self.monitor is None:
+            self.monitor = threading.Thread(target=replay.bot._mouse_monitor, daemon=True)
+            self.monitor.start()
+        super().on_press(key)
+        if key == "h" and self.chickened:
+            self.mouse = (0, self.mouse[1])
+            time.sleep(0.3)   # the monitor polls in real time
+
+
+def test_abort_after_chicken_stops_the_bot(tmp_path):
+    frames = replay.load_frames([RUNE_FRAME])
+    try:
+        with pytest.raises(replay.bot.AbortBot):
+            replay.replay(frames, runs=3, workdir=str(tmp_path), backend_class=AbortsAfterChicken)
+    finally:
+        replay.bot._abort_flag.clear()
+        replay.bot._wake.clear()
+    history = [json.loads(line) for line in open(tmp_path / "run_states.jsonl")]
+    assert any(e["state"] == "kill" and e["outcome"] != "ok" for e in history)
+
+
+def test_old_text_logs_are_imported_on_first_open(tmp_path):
+    (tmp_path / "runs.log").write_text("20260219_140320  run=41  RUNE x1  walk=3.10s\n")
+    (tmp_path / "totals.txt").write_text("total_runes_found=12\ntotal_charms_found=4\n")
+    frames = replay.load_frames([RUNE_FRAME])
+    replay.replay(frames, runs=1, workdir=str(tmp_path))
+    store = _store(tmp_path)
+    assert store.totals()["total_runes_found"] == 13
+    assert [number for number, _, _ in store.recent()] == [41, 42]
+
@@ -0,0 +1,109 @@
+"""
+Tests for the run state machine (run_state.py), on a fake clock.
+Run with:  python -m pytest test_run_state.py -q
+"""
+
+import asyncio
+import json
+
+import pytest
+
+import run_state
+from run_state import RunMachine, State, StateTimeout, Stuck, resume_point
+
+
+class Clock:
+    def __init__(self):
+        self.t = 0.0
+
+    def __call__(self):
+        return self.t
+
+
+def _states(clock, stall=()):
+    """a → b → a ...; b ends a run; states named in *stall* hang for 100 s."""
+    def step(name, seconds):
+        def fn(run):
+            clock.t += 100 if name in stall else seconds
+            if name in stall:
+                machine.check()
+        return fn
+    states = {
+        "a": State("a", step("a", 1), "b", 10, begins_run=True),
+        "b": State("b", step("b", 2), "a", 10, ends_run=True),
+        "recover": State("recover", lambda run: "a", None, 10),
+    }
+    machine = RunMachine(states, "a", 1, clock=clock, now=clock)
+    return machine
+
+
+def test_runs_until_max_runs():
+    m = _states(Clock())
+    m.run(max_runs=3)
+    assert m.completed == 3 and m.run_number == 4
+    assert [e["state"] for e in m.history] == ["a", "b"] * 3
+    assert all(e["outcome"] == "ok" for e in m.history)
+
+
+def test_timeout_goes_to_recovery_then_gives_up():
+    m = _states(Clock(), stall=("b",))
+    with pytest.raises(Stuck):
+        m.run(max_runs=1)
+    outcomes = [(e["state"], e["outcome"]) for e in m.history]
+    assert outcomes[:3] == [("a", "ok"), ("b", "timeout"), ("recover", "ok")]
+    assert m.failed["b"] == m.max_failures
+
+
+def test_fatal_errors_stop_the_machine():
+    class Abort(Exception):
+        pass
+
+    def boom(run):
+        raise Abort
+    m = RunMachine({"a": State("a", boom, "a", 10)}, "a", 1,
+                   clock=Clock(), now=Clock(), fatal=(Abort,))
+    with pytest.raises(Abort):
+        m.run()
+    assert m.history[-1]["outcome"] == "aborted"
+
+
+def test_history_is_persisted_and_resumable(tmp_path):
+    path = str(tmp_path / "states.jsonl")
+    m = _states(Clock())
+    m.history_path = path
+    m.run(max_runs=2)
+    lines = [json.loads(line) for line in open(path)]
+    assert len(lines) == 4
+    assert resume_point(path) == lines[-1]
+    assert resume_point(path)["run"] == 2 and resume_point(path)["outcome"] == "ok"
+    assert resume_point(str(tmp_path / "missing.jsonl")) is None
+
+
+def test_async_steps_are_cancelled_at_the_timeout():
+    async def hang(run):
+        await asyncio.sleep(10)
+
+    m = RunMachine({"a": State("a", hang, "a", 0.01, recover="b"),
+                    "b": State("b", lambda run: None, "a", 1, ends_run=True)},
+                   "a", 1, max_failures=1)
+    with pytest.raises(Stuck) as err:
+        asyncio.run(m.run_async())
+    assert isinstance(err.value.__cause__, StateTimeout)
+
+
+def test_history_is_moved_aside_when_large(tmp_path, monkeypatch):
+    monkeypatch.setattr(run_state, "HISTORY_MAX", 300)
+    path = str(tmp_path / "states.jsonl")
+    m = _states(Clock())
+    m.history_path = path
+    m.run(max_runs=5)
+    assert (tmp_path / "states.jsonl.1").exists()
+    assert len(open(path).readlines()) < 10
+    assert resume_point(path) == m.history[-1]
+
+
+def test_resume_point_reads_only_the_tail(tmp_path):
+    path = tmp_path / "states.jsonl"
+    path.write_text("not json\n" * 5000 + json.dumps({"run": 7, "state": "kill"}) + "\n")
+    assert resume_point(str(path)) == {"run": 7, "state": "kill"}
+
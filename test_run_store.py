@@ -0,0 +1,141 @@
+"""
+Tests for the SQLite run store (run_store.py).
+Run with:  python -m pytest test_run_store.py -q
+"""
+
+import multiprocessing
+import sqlite3
+import threading
+
+from run_store import RunRecord, RunStore
+
+
+def _record(number, started=1000.0, **kw):
+    return RunRecord(run_number=number, started=started, **kw)
+
+
+def test_records_and_totals():
+    store = RunStore(":memory:")
+    store.add(_record(1, summary="RUNE x1", phases={"kill": 4.0}, stats={"kill": 2.5},
+                      detections=[("Rune", "Shael Rune", 900, 400)],
+                      items=[("Shael Rune", "Rune", 190, 310, 0.9)],
+                      counts={"total_runes_found": 1, "shael_runes_found": 1}))
+    store.add(_record(2, started=4600.0, summary="no items", phases={"kill": 6.0}))
+    assert store.last_run_number() == 2
+    totals = store.totals()
+    assert totals["total_runes_found"] == 1 and totals["shael_runes_found"] == 1
+    assert totals["total_charms_found"] == 0 and totals["mal_plus_runes_found"] == 0
+    assert store.phase_means() == {"kill": 5.0}
+    assert store.phase_means("stat") == {"kill": 2.5}
+    assert store.recent(1) == [(2, 4600.0, "no items")]
+    rates = store.rates()
+    assert rates["runs"] == 2 and rates["runs_per_hour"] == 1.0
+    assert rates["total_runes_found_per_run"] == 0.5
+    assert store.rates(since=2000.0)["runs"] == 1
+
+
+def test_writes_are_batched(tmp_path):
+    path = str(tmp_path / "runs.db")
+    store = RunStore(path, flush_every=3)
+    other = sqlite3.connect(path)
+    store.add(_record(1))
+    store.add(_record(2))
+    assert other.execute("SELECT COUNT(*) FROM runs").fetchone() == (0,)
+    store.add(_record(3))
+    assert other.execute("SELECT COUNT(*) FROM runs").fetchone() == (3,)
+    store.add(_record(4))
+    store.close()
+    assert other.execute("SELECT COUNT(*) FROM runs").fetchone() == (4,)
+    assert other.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+
+
+def test_legacy_import_runs_once(tmp_path):
+    (tmp_path / "runs.log").write_text(
+        "20260219_140320  run=1  no items  walk=3.10s\n"
+        "20260219_140616  run=2  RUNE x1  +  CHARM x1  walk=2.90s  kill=1.75s\n"
+        "garbage line\n")
+    (tmp_path / "totals.txt").write_text(
+        "total_runes_found=12\nmal_plus_runes_found=1\ntotal_charms_found=4\n")
+    store = RunStore(str(tmp_path / "runs.db"))
+    assert store.import_legacy(str(tmp_path / "runs.log"), str(tmp_path / "totals.txt")) == (2, 3)
+    assert store.import_legacy(str(tmp_path / "runs.log"), str(tmp_path / "totals.txt")) == (0, 0)
+    assert store.last_run_number() == 2
+    assert [s for _, _, s in store.recent()] == ["no items", "RUNE x1  +  CHARM x1"]
+    assert store.phase_means("stat") == {"walk": 3.0, "kill": 1.75}
+    store.add(_record(3, counts={"total_runes_found": 1}))
+    assert store.totals()["total_runes_found"] == 13
+
+
+def _writer(path, first):
+    store = RunStore(path)
+    for n in range(first, first + 25):
+        store.add(_record(n, counts={"total_runes_found": 1}))
+    store.close()
+
+
+def _claimer(path, out):
+    store = RunStore(path)
+    out.extend([store.claim_run() for _ in range(25)])
+    store.close()
+
+
+def test_concurrent_processes_share_the_database(tmp_path):
+    path = str(tmp_path / "runs.db")
+    RunStore(path).close()
+    procs = [multiprocessing.Process(target=_writer, args=(path, i * 100)) for i in range(4)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+    assert all(p.exitcode == 0 for p in procs)
+    store = RunStore(path)
+    assert store.rates()["runs"] == 100
+    assert store.totals()["total_runes_found"] == 100
+
+
+def test_threads_share_one_store(tmp_path):
+    store = RunStore(str(tmp_path / "runs.db"))
+    big = [("Rune", "", x, 400) for x in range(2000)]
+    errors = []
+
+    def writer():
+        try:
+            for n in range(1, 51):
+                store.add(_record(n, detections=big, counts={"total_runes_found": 1}))
+        except Exception as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    while thread.is_alive():
+        store.totals()
+    thread.join()
+    assert not errors
+    assert store.totals()["total_runes_found"] == 50
+    assert store.rates()["runs"] == 50
+
+
+def test_claimed_run_numbers_are_unique_across_processes(tmp_path):
+    path = str(tmp_path / "runs.db")
+    store = RunStore(path)
+    store.add(_record(41))
+    assert store.claim_run() == 42
+    with multiprocessing.Manager() as manager:
+        out = manager.list()
+        procs = [multiprocessing.Process(target=_claimer, args=(path, out)) for _ in range(4)]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join()
+        numbers = list(out)
+    assert sorted(numbers) == list(range(43, 143))
+
+
+def test_nothing_to_import_leaves_the_import_open(tmp_path):
+    store = RunStore(str(tmp_path / "runs.db"))
+    log, totals = str(tmp_path / "runs.log"), str(tmp_path / "totals.txt")
+    assert store.import_legacy(log, totals) == (0, 0)
+    (tmp_path / "totals.txt").write_text("total_runes_found=3\n")
+    assert store.import_legacy(log, totals) == (0, 1)
+    assert store.totals()["total_runes_found"] == 3
+
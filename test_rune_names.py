@@ -0,0 +1,67 @@
+"""
+Tests for the rune name recognizer (rune_names.py).
+Run with:  python -m pytest test_rune_names.py -q
+"""
+
+import cv2
+import numpy as np
+import pytest
+
+import find_runes
+import rune_names
+
+# Screenshot → the rune its one "Rune" label names
+SAMPLES = {
+    "samples/loot_20260219_120222.png": "Ral",
+    "test_cases/1/loot_20260219_120326.png": "Shael",
+    "samples/loot_20260219_120538.png": "Thul",
+    "samples/test_rune_20260219_141302.png": "Amn",   # the full OCR misses this one
+    "samples/test_rune_20260219_141334.png": "Tal",
+}
+
+
+@pytest.mark.parametrize("path,name", SAMPLES.items())
+def test_names_rune_left_of_each_hit(path, name):
+    img = cv2.imread(path)
+    (x, y), = find_runes.find_runes_img(img)
+    assert rune_names.classify(img, x, y) == name
+
+
+def test_rune_half_width_matches_word_template():
+    tmpl, _ = find_runes._get_template()
+    assert tmpl.shape[1] // 2 == rune_names.RUNE_HALF_W
+    assert tmpl.shape[0] == rune_names.ROW_H
+
+
+def test_name_mask_is_only_the_word_before_rune():
+    img = cv2.imread("test_cases/1/loot_20260219_120326.png")
+    mask = rune_names.name_mask(img, 239, 312)
+    # "Shael": five letters, nothing of "Rune" or the labels around it
+    assert 50 <= mask.shape[1] <= 70 and mask.shape[0] <= rune_names.ROW_H
+    assert mask[:, 0].any() and mask[:, -1].any()
+
+
+def test_no_text_and_unknown_names_read_as_none(monkeypatch):
+    assert rune_names.classify(np.zeros((60, 200, 3), np.uint8), 150, 30) is None
+    img = cv2.imread("test_cases/1/loot_20260219_120326.png")
+    others = [(n, t) for n, t in rune_names._get_templates() if n != "Shael"]
+    monkeypatch.setattr(rune_names, "_templates", others)
+    assert rune_names.classify(img, 239, 312) is None
+
+
+def test_short_name_does_not_match_end_of_long_one(monkeypatch):
+    img = cv2.imread("test_cases/1/loot_20260219_120326.png")
+    mask = rune_names.name_mask(img, 239, 312)
+    # An "El" cut from the end of "Shael" matches it exactly, but is far narrower
+    el = mask[:, -mask.shape[1] * 2 // 5:]
+    monkeypatch.setattr(rune_names, "_templates", [("El", el)])
+    assert rune_names.classify_mask(mask) == (None, 0.0)
+
+
+def test_item_names_and_mal_plus():
+    assert rune_names.rune_of("Shael Rune") == "Shael"
+    assert rune_names.rune_of("Rune") is None
+    assert rune_names.rune_of("Runic Talons") is None
+    assert len(rune_names.RUNES) == 33
+    assert rune_names.is_mal_plus("Mal") and rune_names.is_mal_plus("Zod")
+    assert not rune_names.is_mal_plus("Um") and not rune_names.is_mal_plus(None)
@@ -0,0 +1,82 @@
+import asyncio
+import time
+
+import numpy as np
+
+import bot
+import runtime
+from run_state import RunMachine, State
+
+
+def test_stream_region_covers_every_ui_region():
+    r = runtime.STREAM_REGION
+    assert (r["left"], r["top"], r["width"], r["height"]) == (0, 0, 1680, 1100)
+
+
+def test_crop_maps_screen_regions_into_the_frame():
+    frame = np.zeros((1100, 1680, 3), dtype=np.uint8)
+    frame[951, 765] = 255
+    part = runtime.crop(frame, bot.PLAY_BUTTON_REGION)
+    assert part.shape == (80, 160, 3)
+    assert part[0, 0, 0] == 255
+
+
+def test_subscribers_share_one_grab_per_frame():
+    grabs = []
+
+    def grab(region):
+        grabs.append(region)
+        return np.full((2, 2, 3), len(grabs), dtype=np.uint8)
+
+    async def take(stream, n):
+        seen = []
+        async for seq, frame in stream.frames():
+            seen.append((seq, int(frame[0, 0, 0])))
+            if len(seen) == n:
+                return seen
+
+    async def main():
+        stream = runtime.CaptureStream(grab, {"left": 0}, 0.01, None)
+        consumers = asyncio.gather(take(stream, 3), take(stream, 3))
+        producer = asyncio.ensure_future(stream.run())
+        a, b = await consumers
+        producer.cancel()
+        return a, b, stream
+
+    a, b, stream = asyncio.run(main())
+    assert a == b == [(1, 1), (2, 2), (3, 3)]
+    assert len(grabs) == stream.seq
+    assert stream.subscribers == 0
+
+
+def test_timed_out_blocking_step_stops_before_recovery():
+    rt = runtime.Runtime()
+    events = []
+
+    def stale():
+        try:
+            while True:
+                time.sleep(0.005)
+                machine.check()   # the clock never moves: only the cancel stops it
+        finally:
+            events.append("stale step stopped")
+
+    async def hang(run):
+        await rt.blocking(stale)
+
+    def recover(run):
+        events.append("recover")
+        return "b"
+
+    machine = RunMachine({"a": State("a", hang, "a", 0.05, begins_run=True),
+                          "recover": State("recover", recover, None, 1),
+                          "b": State("b", lambda run: None, "a", 1, ends_run=True)},
+                         "a", 1, clock=lambda: 0.0)
+    try:
+        asyncio.run(machine.run_async(max_runs=1))
+    finally:
+        rt.input_pool.shutdown()
+    assert events == ["stale step stopped", "recover"]
+    assert [(e["state"], e["outcome"]) for e in machine.history] == [
+        ("a", "timeout"), ("recover", "ok"), ("b", "ok")]
+
@@ -0,0 +1,55 @@
+"""
+Tests for the scene classifier and learned poll pacing (scene_classifier.py).
+Run with:  python -m pytest test_scene_classifier.py -q
+"""
+
+import numpy as np
+
+from scene_classifier import (FAST_POLL, SLOW_POLL, LoadTimes, SceneClassifier,
+                              fingerprint)
+
+H, W = 210, 336
+
+
+def _frame(kind: str, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    img = np.zeros((H, W, 3), dtype=np.uint8)
+    if kind == "loading":
+        img[150:160, 60:280] = 200                   # progress bar on black
+    elif kind == "char_select":
+        img[:] = (40, 30, 20)
+        img[170:195, 140:200] = (30, 60, 160)        # play button
+    elif kind == "town":
+        img[:180] = rng.integers(60, 140, (180, W, 3), dtype=np.uint8)
+        img[180:] = 25                               # HUD
+    return img
+
+
+def _classifier():
+    kinds = ["loading", "char_select", "town"]
+    return SceneClassifier(kinds, [fingerprint(_frame(k)) for k in kinds])
+
+
+def test_classifies_noisy_frames():
+    clf = _classifier()
+    rng = np.random.default_rng(1)
+    for kind in ("loading", "char_select"):
+        noisy = np.clip(_frame(kind).astype(int) + rng.integers(-8, 9, (H, W, 3)),
+                        0, 255).astype(np.uint8)
+        assert clf.classify(noisy)[0] == kind
+    assert clf.classify(_frame("town", seed=5))[0] == "town"   # other texture
+
+
+def test_unknown_frame_is_rejected():
+    white = np.full((H, W, 3), 255, dtype=np.uint8)
+    label, dist = _classifier().classify(white)
+    assert label is None and dist > 0.5
+
+
+def test_poll_interval_speeds_up_near_usual_load_time():
+    times = LoadTimes()
+    assert times.poll_interval("town", 0.0) == FAST_POLL   # nothing learned yet
+    for secs in (5.0, 5.5, 6.0, 6.2):
+        times.record("town", secs)
+    assert times.poll_interval("town", 0.5) == SLOW_POLL
+    assert times.poll_interval("town", 4.8) == FAST_POLL
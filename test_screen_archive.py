@@ -0,0 +1,84 @@
+"""
+Tests for the packed screenshot archive (screen_archive.py).
+Run with:  python -m pytest test_screen_archive.py -q
+"""
+
+import os
+
+import cv2
+import numpy as np
+
+import screen_archive
+from screen_archive import ScreenArchive, keep
+
+
+def _frame(seed: int) -> np.ndarray:
+    return np.random.default_rng(seed).integers(0, 255, (64, 80, 3), dtype=np.uint8)
+
+
+def test_identical_frames_are_stored_once(tmp_path):
+    archive = ScreenArchive(str(tmp_path))
+    a = archive.put(_frame(1), "run_1", run=1, tags=["Rune", "Shael"])
+    b = archive.put(_frame(1).copy(), "run_1_copy", run=1)
+    c = archive.put(_frame(2), "run_2", run=2)
+    assert a == b != c
+    assert len(archive.objects) == 2 and len(archive.refs) == 3
+    assert np.array_equal(archive.get(a), _frame(1))
+    assert [r.name for r, _ in archive.frames()] == ["run_1", "run_2"]
+    assert [r.name for r, _ in archive.frames(tag="Rune")] == ["run_1"]
+
+
+def test_reopened_archive_reads_from_mapped_packs(tmp_path):
+    archive = ScreenArchive(str(tmp_path), pack_max=1)   # one frame per pack
+    digests = [archive.put(_frame(i), f"run_{i}", run=i) for i in range(3)]
+    archive.close()
+    assert sorted(os.listdir(tmp_path)) == ["index.jsonl", "pack-0000.pack",
+                                            "pack-0001.pack", "pack-0002.pack"]
+    archive = ScreenArchive(str(tmp_path))
+    for i in (2, 0, 1):
+        assert np.array_equal(archive.get(digests[i]), _frame(i))
+    assert archive.find("run_1").digest == digests[1]
+    archive.close()
+
+
+def test_torn_index_line_is_ignored(tmp_path):
+    archive = ScreenArchive(str(tmp_path))
+    archive.put(_frame(1), "run_1")
+    archive.close()
+    with open(tmp_path / "index.jsonl", "a") as f:
+        f.write('{"obj": "abc", "pack": 0, "off')
+    archive = ScreenArchive(str(tmp_path))
+    assert len(archive.objects) == 1 and archive.find("run_1") is not None
+
+
+def test_retention_keeps_loot_runs_and_samples_the_rest():
+    assert keep(7, ["Rune", "Shael"])
+    assert keep(7, ["Charm"])
+    assert not keep(7, [])
+    assert keep(40, [], sample_every=20)
+    assert sum(keep(run, []) for run in range(1, 201)) == 200 // screen_archive.SAMPLE_EVERY
+
+
+def test_prune_drops_unkept_frames(tmp_path):
+    archive = ScreenArchive(str(tmp_path))
+    for run in range(1, 11):
+        tags = {3: ["Rune", "Ral"], 4: ["Charm"]}.get(run, [])
+        archive.put(_frame(run), f"run_{run}", run=run, tags=tags)
+    assert archive.prune(sample_every=5) == (6, 6)
+    assert sorted(r.run for r in archive.refs) == [3, 4, 5, 10]
+    assert os.listdir(tmp_path).count("pack-0000.pack") == 0
+    archive.close()
+    archive = ScreenArchive(str(tmp_path))
+    assert np.array_equal(archive.get(archive.find("run_5").digest), _frame(5))
+
+
+def test_import_dedupes_found_copies(tmp_path):
+    src = tmp_path / "screens"
+    (src / "found_runes").mkdir(parents=True)
+    cv2.imwrite(str(src / "run_a.png"), _frame(1))
+    cv2.imwrite(str(src / "run_b.png"), _frame(2))
+    cv2.imwrite(str(src / "found_runes" / "run_a.png"), _frame(1))
+    archive = ScreenArchive(str(tmp_path / "archive"))
+    assert screen_archive.import_pngs(archive, [str(src)]) == 2
+    assert screen_archive.import_pngs(archive, [str(src)]) == 0
+    assert len(archive.objects) == 2
@@ -0,0 +1,64 @@
+"""
+Round-trip tests for the delta-encoded session file (session_store.py).
+Run with:  python -m pytest test_session_store.py -q
+"""
+
+import os
+
+import numpy as np
+
+from session_store import SessionReader, SessionWriter
+
+W, H = 64, 48
+
+
+def _frames(n):
+    rng = np.random.default_rng(0)
+    base = rng.integers(0, 255, (H, W, 3), dtype=np.uint8)
+    frames = []
+    for i in range(n):
+        f = base.copy()
+        f[i % H, :, :] = 255 - f[i % H, :, :]   # one changed row per frame
+        frames.append(f)
+    return frames
+
+
+def _write(path, frames, keyframe_interval=4, close=True):
+    w = SessionWriter(str(path), W, H, fps=10, keyframe_interval=keyframe_interval)
+    for i, f in enumerate(frames):
+        w.add_frame(100.0 + i * 0.1, f)
+        if i == 5:
+            w.add_event(100.0 + i * 0.1, "press", ("alt",))
+    if close:
+        w.close()
+    else:
+        w._f.close()   # simulate a crash: no index, no trailer
+
+
+def test_random_access_matches_frames(tmp_path):
+    frames = _frames(11)
+    _write(tmp_path / "s.session", frames)
+    s = SessionReader(str(tmp_path / "s.session"))
+    assert s.complete and len(s) == 11
+    for i in (10, 3, 4, 9, 0, 7):
+        assert np.array_equal(s.frame(i), frames[i])
+    assert np.array_equal(s.frame_at(100.55), frames[5])
+    assert s.events == [(100.5, "press", ["alt"])]
+
+
+def test_unindexed_session_is_recovered(tmp_path):
+    frames = _frames(7)
+    path = tmp_path / "s.session"
+    _write(path, frames, close=False)
+    with open(path, "ab") as f:
+        f.write(b"\x01\x00")   # half-written record header
+    s = SessionReader(str(path))
+    assert not s.complete and len(s) == 7
+    assert np.array_equal(s.frame(6), frames[6])
+    assert [e[1] for e in s.events] == ["press"]
+
+
+def test_deltas_are_small(tmp_path):
+    path = tmp_path / "s.session"
+    _write(path, _frames(20), keyframe_interval=20)
+    assert os.path.getsize(path) < 2 * W * H * 3   # 20 frames ≈ 1 keyframe + rows
@@ -0,0 +1,51 @@
+"""
+Tests for the visual settle detector (settle.py).
+Run with:  python -m pytest test_settle.py -q
+"""
+
+import numpy as np
+
+from settle import SETTLE_SAMPLES, SettleDetector, thumbnail
+
+H, W = 240, 320
+
+
+def _scene(shift: int) -> np.ndarray:
+    """A textured frame scrolled *shift* pixels, like the camera following a walk."""
+    x = np.arange(W)[None, :] + shift
+    y = np.arange(H)[:, None]
+    gray = ((x * 7 + y * 3) % 256).astype(np.uint8) * ((x // 16 + y // 16) % 2)
+    return np.repeat(gray[:, :, None], 3, axis=2)
+
+
+def _feed_until_settled(detector, frames):
+    for i, frame in enumerate(frames):
+        if detector.feed(thumbnail(frame)):
+            return i
+    return None
+
+
+def test_settles_after_movement_stops():
+    before = thumbnail(_scene(0))
+    frames = [_scene(s) for s in (0, 10, 20, 30, 40)] + [_scene(40)] * 6
+    settled_at = _feed_until_settled(SettleDetector(before), frames)
+    assert settled_at == 4 + SETTLE_SAMPLES
+
+
+def test_waits_for_expected_change():
+    before = thumbnail(_scene(0))
+    assert _feed_until_settled(SettleDetector(before), [_scene(0)] * 10) is None
+
+
+def test_no_before_only_waits_for_stillness():
+    settled_at = _feed_until_settled(SettleDetector(), [_scene(5)] * 10)
+    assert settled_at == SETTLE_SAMPLES
+
+
+def test_small_animation_counts_as_still():
+    frames = []
+    for i in range(8):
+        f = _scene(0)
+        f[100:110, 150 + i:160 + i] = 255   # a flickering torch
+        frames.append(f)
+    assert _feed_until_settled(SettleDetector(), frames) == SETTLE_SAMPLES
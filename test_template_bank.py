@@ -0,0 +1,48 @@
+import os
+
+import numpy as np
+import pytest
+
+import template_bank
+
+
+@pytest.fixture
+def bank(tmp_path, monkeypatch):
+    monkeypatch.setattr(template_bank, "BANK_DIR", str(tmp_path / "bank"))
+    monkeypatch.setattr(template_bank, "_entries", {})
+    monkeypatch.setattr(template_bank, "_file_hashes", {})
+    return tmp_path
+
+
+def _source(path, text):
+    path.write_text(text)
+    template_bank._file_hashes.clear()
+    return [str(path)]
+
+
+def test_entries_are_memory_mapped_and_rebuilt_alone(bank):
+    a = _source(bank / "a.txt", "one")
+    b = _source(bank / "b.txt", "two")
+    builds = []
+
+    def build(value):
+        def _build():
+            builds.append(value)
+            return {"values": np.arange(value), "label": np.array("x")}
+        return _build
+
+    template_bank.cached("a", a, build(3))
+    template_bank.cached("b", b, build(4))
+    b_dir = {n for n in os.listdir(template_bank.BANK_DIR) if n.startswith("b-")}
+    template_bank._entries.clear()   # a new process
+    entry = template_bank.cached("a", a, build(3))
+    assert builds == [3, 4]
+    assert isinstance(entry["values"], np.memmap)
+    assert entry["values"].tolist() == [0, 1, 2] and str(entry["label"]) == "x"
+
+    a = _source(bank / "a.txt", "changed")
+    assert template_bank.cached("a", a, build(5))["values"].tolist() == list(range(5))
+    assert builds == [3, 4, 5]
+    names = os.listdir(template_bank.BANK_DIR)
+    assert sum(n.startswith("a-") for n in names) == 1   # the stale directory is gone
+    assert b_dir <= set(names)                             # b was not rewritten
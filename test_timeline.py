@@ -0,0 +1,55 @@
+"""
+Tests for drift-free action timelines (timeline.py), on a virtual clock.
+Run with:  python -m pytest test_timeline.py -q
+"""
+
+import threading
+
+import pytest
+
+from backends import ReplayBackend
+from timeline import Aborted, Timeline
+
+
+class SlowKeys(ReplayBackend):
+    """Each key press takes 30 ms, like a laggy input path."""
+
+    def on_press(self, key):
+        self.advance(0.03)
+
+
+def _press_times(backend):
+    return [t - backend.events[0][0] for t, kind, _ in backend.events if kind == "press"]
+
+
+def test_actions_fire_at_absolute_offsets():
+    b = SlowKeys(100, 100, start=0.0)
+    tl = Timeline().press("a").wait(0.1).press("b").wait(0.1).press("c")
+    tl.run(b, threading.Event())
+    # Input-call overhead does not push later actions back
+    assert _press_times(b) == pytest.approx([0.0, 0.1, 0.2])
+    assert [late for _, _, late in tl.timings] == pytest.approx([0, 0, 0])
+
+
+def test_overrun_is_reported_not_accumulated():
+    b = SlowKeys(100, 100, start=0.0)
+    tl = Timeline().press("a").press("b").wait(0.1).press("c")
+    tl.run(b, threading.Event())
+    labels_late = [(label, round(late, 3)) for label, _, late in tl.timings]
+    assert labels_late == [("press a", 0.0), ("press b", 0.03), ("press c", 0.0)]
+
+
+def test_call_reanchors_later_steps():
+    b = ReplayBackend(100, 100, start=0.0)
+    tl = Timeline().press("a").call(lambda: b.advance(0.4)).wait(0.1).press("b")
+    tl.run(b, threading.Event())
+    assert _press_times(b) == pytest.approx([0.0, 0.5])
+
+
+def test_abort_stops_the_timeline():
+    b = ReplayBackend(100, 100, start=0.0)
+    abort = threading.Event()
+    tl = Timeline().press("a").call(abort.set).wait(1.0).press("b")
+    with pytest.raises(Aborted):
+        tl.run(b, abort)
+    assert [args for _, kind, args in b.events] == [("a",)]
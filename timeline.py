@@ -0,0 +1,113 @@
+"""
+timeline.py
+
+Drift-free action timelines.
+
+A Timeline is a planned sequence of moves, clicks, key presses and waits.
+Every action gets an absolute offset from the start of the timeline, and
+run() fires each one at origin + offset on the backend's monotonic clock
+(perf_counter when live).  Lateness does not accumulate the way chained
+sleeps do: an action that starts 8 ms late does not push back the ones
+after it.
+
+Waiting happens in backend.wait_until(), which blocks on the abort Event,
+so an abort interrupts a wait immediately rather than at the next 0.1 s
+tick.  Timeline inputs are sent with pause=0, so the waits written into the
+timeline are the only ones.
+
+Steps whose length is not known in advance (e.g. "click, then wait until
+the screen settles") go in with call(); the actions after it keep their
+planned spacing from the moment it returns.
+
+    tl = Timeline("kill").move(1047, 536, 0.3).press("f5").wait(0.2).press("d")
+    tl.run(backend, abort_event)
+    tl.timings   # [(label, planned offset, lateness), ...]
+"""
+
+import threading
+from dataclasses import dataclass
+from typing import Callable
+
+import numpy as np
+
+
+class Aborted(Exception):
+    """Raised by Timeline.run when the abort event fires mid-timeline."""
+
+
+@dataclass(slots=True)
+class Step:
+    at: float                        # planned start, seconds after the origin
+    label: str
+    fn: Callable[[object], None]     # fn(backend)
+    dynamic: bool = False            # re-anchor later steps when it returns
+
+
+class Timeline:
+    def __init__(self, name: str = ""):
+        self.name = name
+        self.steps: list[Step] = []
+        self.timings: list[tuple[str, float, float]] = []
+        self._t = 0.0
+
+    @property
+    def duration(self) -> float:
+        """Planned length, not counting call() steps."""
+        return self._t
+
+    def _add(self, label: str, fn, duration: float = 0.0, dynamic: bool = False):
+        self.steps.append(Step(self._t, label, fn, dynamic))
+        self._t += duration
+        return self
+
+    # ── Building ─────────────────────────────────────────────────────────────
+    def move(self, x: int, y: int, duration: float = 0.0,
+             tween: str = "linear") -> "Timeline":
+        return self._add("move", lambda b: b.move_to(x, y, duration, pause=0.0,
+                                                     tween=tween), duration)
+
+    def click(self) -> "Timeline":
+        return self._add("click", lambda b: b.click(pause=0.0))
+
+    def press(self, key: str) -> "Timeline":
+        return self._add(f"press {key}", lambda b: b.press(key, pause=0.0))
+
+    def wait(self, seconds: float) -> "Timeline":
+        self._t += seconds
+        return self
+
+    def call(self, fn: Callable[[], object], label: str = "call") -> "Timeline":
+        """Run fn() at this point; later steps are timed from when it returns."""
+        return self._add(label, lambda b: fn(), dynamic=True)
+
+    # ── Running ──────────────────────────────────────────────────────────────
+    def run(self, backend, abort: threading.Event) -> list[tuple[str, float, float]]:
+        """
+        Execute every step at its deadline.  Returns (and keeps in .timings)
+        [(label, planned offset, lateness seconds), ...].  Raises Aborted if
+        *abort* is set before the timeline finishes.
+        """
+        self.timings = []
+        origin = backend.monotonic()
+        for step in self.steps:
+            deadline = origin + step.at
+            if backend.wait_until(deadline, abort):
+                raise Aborted(self.name)
+            started = backend.monotonic()
+            step.fn(backend)
+            self.timings.append((step.label, step.at, started - deadline))
+            if step.dynamic:
+                origin = backend.monotonic() - step.at
+        if backend.wait_until(origin + self._t, abort):
+            raise Aborted(self.name)
+        return self.timings
+
+
+def jitter_report(lateness: dict[str, list[float]]) -> str:
+    """Table of per-action lateness (actual minus scheduled start), in ms."""
+    lines = [f"{'action':<16}{'n':>6}{'mean ms':>9}{'p95 ms':>9}{'max ms':>9}"]
+    for label, values in sorted(lateness.items()):
+        ms = np.asarray(values) * 1000
+        lines.append(f"{label:<16}{len(ms):6d}{ms.mean():9.1f}"
+                     f"{np.percentile(ms, 95):9.1f}{ms.max():9.1f}")
+    return "\n".join(lines)